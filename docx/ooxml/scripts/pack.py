@@ -7,13 +7,22 @@ Example usage:
 """
 
 import argparse
-import shutil
+import io
 import subprocess
 import sys
 import tempfile
-import defusedxml.minidom
+import defusedxml.sax
 import zipfile
 from pathlib import Path
+from xml.sax.handler import property_lexical_handler
+from xml.sax.saxutils import XMLGenerator
+
+# Media that is already compressed; deflating it again costs time and saves nothing
+STORED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".tif", ".tiff", ".wdp", ".jxr",
+    ".emz", ".wmz", ".mp3", ".m4a", ".wma", ".mp4", ".m4v", ".mov", ".wmv",
+    ".docx", ".pptx", ".xlsx", ".zip",
+}
 
 
 def main():
@@ -61,28 +70,27 @@ def pack_document(input_dir, output_file, validate=False):
     if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
         raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
 
-    # Work in temporary directory to avoid modifying original
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        # Process XML files to remove pretty-printing whitespace
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
-
-        # Create final Office file as zip archive
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-        # Validate if requested
-        if validate:
-            if not validate_document(output_file):
-                output_file.unlink()  # Delete the corrupt file
-                return False
+    # Stream every part straight into the zip: XML is condensed on the fly and
+    # nothing in input_dir is modified or copied
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
+        for f in input_dir.rglob("*"):
+            if not f.is_file():
+                continue
+            arcname = f.relative_to(input_dir).as_posix()
+            if f.name.lower().endswith((".xml", ".rels")):  # includes _rels/.rels
+                with zf.open(arcname, "w") as dest:
+                    condense_xml(f, dest)
+            elif f.suffix.lower() in STORED_EXTENSIONS:
+                zf.write(f, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
+                zf.write(f, arcname)
+
+    # Validate if requested
+    if validate:
+        if not validate_document(output_file):
+            output_file.unlink()  # Delete the corrupt file
+            return False
 
     return True
 
@@ -130,29 +138,85 @@ def validate_document(doc_path):
             return False
 
 
-def condense_xml(xml_file):
-    """Strip unnecessary whitespace and remove comments."""
-    with open(xml_file, "r", encoding="utf-8") as f:
-        dom = defusedxml.minidom.parse(f)
-
-    # Process each element to remove whitespace and comments
-    for element in dom.getElementsByTagName("*"):
-        # Skip w:t elements and their processing
-        if element.tagName.endswith(":t"):
-            continue
-
-        # Remove whitespace-only text nodes and comment nodes
-        for child in list(element.childNodes):
-            if (
-                child.nodeType == child.TEXT_NODE
-                and child.nodeValue
-                and child.nodeValue.strip() == ""
-            ) or child.nodeType == child.COMMENT_NODE:
-                element.removeChild(child)
-
-    # Write back the condensed XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
+class _CondensingHandler(XMLGenerator):
+    """SAX handler that re-serializes a part without formatting whitespace or comments.
+
+    Text is buffered until the next markup event so that a run of character
+    data can be judged as a whole: whitespace-only runs are dropped unless they
+    are the content of a *:t element, where spaces are significant.
+    """
+
+    def __init__(self, out):
+        super().__init__(out, encoding="UTF-8", short_empty_elements=True)
+        self._tags = []
+        self._text = []
+
+    def _flush_text(self):
+        if self._text:
+            text = "".join(self._text)
+            self._text = []
+            if text.strip() or (self._tags and self._tags[-1].endswith(":t")):
+                super().characters(text)
+
+    def startDocument(self):
+        # The XML declaration is written by condense_xml
+        pass
+
+    def startElement(self, name, attrs):
+        self._flush_text()
+        self._tags.append(name)
+        super().startElement(name, attrs)
+
+    def endElement(self, name):
+        self._flush_text()
+        self._tags.pop()
+        super().endElement(name)
+
+    def characters(self, content):
+        self._text.append(content)
+
+    def ignorableWhitespace(self, content):
+        self._text.append(content)
+
+    def processingInstruction(self, target, data):
+        self._flush_text()
+        super().processingInstruction(target, data)
+
+    # Lexical handler events: comments are dropped, CDATA content is kept as text
+    def comment(self, content):
+        self._flush_text()
+
+    def startCDATA(self):
+        pass
+
+    def endCDATA(self):
+        pass
+
+    def startDTD(self, name, public_id, system_id):
+        pass
+
+    def endDTD(self):
+        pass
+
+
+def condense_xml(xml_file, out):
+    """Strip unnecessary whitespace and remove comments.
+
+    Args:
+        xml_file: Path to the pretty-printed XML part
+        out: Binary stream (e.g. an open zip entry) receiving the condensed XML
+    """
+    # Own the text layer so it can be detached afterwards without closing out
+    text = io.TextIOWrapper(
+        out, encoding="utf-8", errors="xmlcharrefreplace", newline="\n", write_through=True
+    )
+    text.write('<?xml version="1.0" encoding="UTF-8"?>')
+    handler = _CondensingHandler(text)
+    parser = defusedxml.sax.make_parser()
+    parser.setContentHandler(handler)
+    parser.setProperty(property_lexical_handler, handler)
+    parser.parse(str(xml_file))
+    text.detach()
 
 
 if __name__ == "__main__":
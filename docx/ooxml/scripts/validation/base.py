@@ -2,11 +2,78 @@
 Base validator with common validation logic for document files.
 """
 
+import copy
+import io
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import lxml.etree
 
+# Compiled XSD schemas shared by every validator in the process. A compiled schema
+# collects errors in a single log, so a thread checks one out with load_schema and
+# hands it back with release_schema; the pool grows to one schema per concurrent
+# thread and keeps them across passes and validators.
+_SCHEMA_POOL = {}
+_SCHEMA_KEYS = {}
+_SCHEMA_ERRORS = {}
+_SCHEMA_POOL_LOCK = threading.Lock()
+
+
+def _schema_key(schema_path):
+    """Return the resolved path for schema_path, resolving each requested path once."""
+    key = _SCHEMA_KEYS.get(str(schema_path))
+    if key is None:
+        key = _SCHEMA_KEYS[str(schema_path)] = str(Path(schema_path).resolve())
+    return key
+
+
+def load_schema(schema_path):
+    """Check out a compiled XSD schema for schema_path, compiling one if none is free.
+
+    The OOXML schemas import dozens of sub-schemas, so compiling one is far more
+    expensive than validating a typical part against it. Pass the schema back to
+    release_schema when done so other threads and later passes can reuse it.
+
+    Args:
+        schema_path: Path to the top-level XSD file
+
+    Returns:
+        lxml.etree.XMLSchema: Compiled schema, owned by the caller until released
+    """
+    with _SCHEMA_POOL_LOCK:
+        key = _schema_key(schema_path)
+        if key in _SCHEMA_ERRORS:
+            raise _SCHEMA_ERRORS[key]
+        idle = _SCHEMA_POOL.get(key)
+        if idle:
+            return idle.pop()
+    # Compile outside the lock so threads needing other schemas are not held up
+    try:
+        with open(key, "rb") as xsd_file:
+            parser = lxml.etree.XMLParser()
+            xsd_doc = lxml.etree.parse(xsd_file, parser=parser, base_url=key)
+        return lxml.etree.XMLSchema(xsd_doc)
+    except lxml.etree.LxmlError as e:
+        # A schema that does not compile never will; remember the failure
+        with _SCHEMA_POOL_LOCK:
+            _SCHEMA_ERRORS[key] = e
+        raise
+
+
+def release_schema(schema_path, schema):
+    """Return a schema checked out with load_schema to the pool."""
+    with _SCHEMA_POOL_LOCK:
+        _SCHEMA_POOL.setdefault(_schema_key(schema_path), []).append(schema)
+
+
+def clear_schema_cache():
+    """Drop every pooled schema (used by the benchmark to measure cold compiles)."""
+    with _SCHEMA_POOL_LOCK:
+        _SCHEMA_POOL.clear()
+        _SCHEMA_ERRORS.clear()
+
 
 class BaseSchemaValidator:
     """Base validator with common validation logic for document files."""
@@ -103,11 +170,23 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file, verbose=False):
+    def __init__(self, unpacked_dir, original_file, verbose=False, workers=1):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file)
         self.verbose = verbose
 
+        # Threads for per-file checks (lxml releases the GIL while parsing and
+        # validating); 1 runs every check in the calling thread
+        self.workers = max(1, workers)
+        self._lock = threading.Lock()
+
+        # XML parts of the original package (read on first use) and their XSD errors
+        self._original_parts = None
+        self._original_errors = {}
+
+        # Parsed trees (or parse errors) of unpacked parts, shared by every pass
+        self._parsed_documents = {}
+
         # Set schemas directory
         self.schemas_dir = Path(__file__).parent.parent.parent / "schemas"
 
@@ -124,24 +203,52 @@ class BaseSchemaValidator:
         """Run all validation checks and return True if all pass."""
         raise NotImplementedError("Subclasses must implement the validate method")
 
-    def validate_xml(self):
-        """Validate that all XML files are well-formed."""
-        errors = []
+    def _map_files(self, check, files=None):
+        """Run check(xml_file) for each file and return the results in file order.
 
-        for xml_file in self.xml_files:
+        Per-file checks run on a thread pool when workers > 1; results are still
+        returned in the order of files (self.xml_files by default), so reports
+        do not depend on scheduling. Checks that span files merge these results
+        afterwards in the calling thread.
+        """
+        files = self.xml_files if files is None else files
+        if self.workers <= 1 or len(files) < 2:
+            return [check(xml_file) for xml_file in files]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(check, files))
+
+    def _gather_errors(self, check, files=None):
+        """Run a per-file check returning error lists and concatenate them in file order."""
+        return [error for errors in self._map_files(check, files) for error in errors]
+
+    def _parse_xml(self, xml_file):
+        """Parse an unpacked XML file once and return the shared tree.
+
+        The tree is cached for the lifetime of the validator and handed to every
+        pass, so callers must not modify it; copy it first (copy.deepcopy) if a
+        pass needs to remove or rewrite elements. A file that fails to parse
+        raises the same error on every call.
+
+        Args:
+            xml_file: Path to the XML file to parse
+
+        Returns:
+            lxml.etree._ElementTree: Parsed document
+        """
+        key = str(xml_file)
+        if key not in self._parsed_documents:
             try:
-                # Try to parse the XML file
-                lxml.etree.parse(str(xml_file))
-            except lxml.etree.XMLSyntaxError as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"Line {e.lineno}: {e.msg}"
-                )
+                self._parsed_documents[key] = lxml.etree.parse(key)
             except Exception as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"Unexpected error: {str(e)}"
-                )
+                self._parsed_documents[key] = e
+        result = self._parsed_documents[key]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def validate_xml(self):
+        """Validate that all XML files are well-formed."""
+        errors = self._gather_errors(self._check_xml_file)
 
         if errors:
             print(f"FAILED - Found {len(errors)} XML violations:")
@@ -153,26 +260,26 @@ class BaseSchemaValidator:
                 print("PASSED - All XML files are well-formed")
             return True
 
+    def _check_xml_file(self, xml_file):
+        """Return well-formedness errors for one file."""
+        try:
+            # Try to parse the XML file
+            self._parse_xml(xml_file)
+        except lxml.etree.XMLSyntaxError as e:
+            return [
+                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                f"Line {e.lineno}: {e.msg}"
+            ]
+        except Exception as e:
+            return [
+                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                f"Unexpected error: {str(e)}"
+            ]
+        return []
+
     def validate_namespaces(self):
         """Validate that namespace prefixes in Ignorable attributes are declared."""
-        errors = []
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
-
-                for attr_val in [
-                    v for k, v in root.attrib.items() if k.endswith("Ignorable")
-                ]:
-                    undeclared = set(attr_val.split()) - declared
-                    errors.extend(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Namespace '{ns}' in Ignorable but not declared"
-                        for ns in undeclared
-                    )
-            except lxml.etree.XMLSyntaxError:
-                continue
+        errors = self._gather_errors(self._check_namespaces_file)
 
         if errors:
             print(f"FAILED - {len(errors)} namespace issues:")
@@ -183,86 +290,53 @@ class BaseSchemaValidator:
             print("PASSED - All namespace prefixes properly declared")
         return True
 
+    def _check_namespaces_file(self, xml_file):
+        """Return undeclared Ignorable namespace prefixes for one file."""
+        errors = []
+        try:
+            root = self._parse_xml(xml_file).getroot()
+            declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
+
+            for attr_val in [
+                v for k, v in root.attrib.items() if k.endswith("Ignorable")
+            ]:
+                undeclared = set(attr_val.split()) - declared
+                errors.extend(
+                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                    f"Namespace '{ns}' in Ignorable but not declared"
+                    for ns in undeclared
+                )
+        except lxml.etree.XMLSyntaxError:
+            pass
+        return errors
+
     def validate_unique_ids(self):
         """Validate that specific IDs are unique according to OOXML requirements."""
         errors = []
         global_ids = {}  # Track globally unique IDs across all files
 
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                file_ids = {}  # Track IDs that must be unique within this file
-
-                # Remove all mc:AlternateContent elements from the tree
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
+        # Collect IDs per file, then check global uniqueness in file order
+        file_entries = self._map_files(self._collect_unique_ids)
+        for xml_file, entries in zip(self.xml_files, file_entries):
+            for entry in entries:
+                if entry[0] == "error":
+                    errors.append(entry[1])
+                    continue
 
-                # Now check IDs in the cleaned tree
-                for elem in root.iter():
-                    # Get the element name without namespace
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
+                _, id_value, sourceline, tag = entry
+                if id_value in global_ids:
+                    prev_file, prev_line, prev_tag = global_ids[id_value]
+                    errors.append(
+                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                        f"Line {sourceline}: Global ID '{id_value}' in <{tag}> "
+                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
+                    )
+                else:
+                    global_ids[id_value] = (
+                        xml_file.relative_to(self.unpacked_dir),
+                        sourceline,
+                        tag,
                     )
-
-                    # Check if this element type has ID uniqueness requirements
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        # Look for the specified attribute
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
-                            )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                # Check global uniqueness
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
-                                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                # Check file-level uniqueness
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
-                                        f"(first occurrence at line {prev_line})"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
 
         if errors:
             print(f"FAILED - Found {len(errors)} ID uniqueness violations:")
@@ -274,6 +348,81 @@ class BaseSchemaValidator:
                 print("PASSED - All required IDs are unique")
             return True
 
+    def _collect_unique_ids(self, xml_file):
+        """Check file-scoped IDs in one file and collect its global-scope IDs.
+
+        Returns:
+            list: Entries in document order, either ("error", message) for a
+            file-level violation or ("global", id_value, line, tag) for an ID
+            that must be unique across all files
+        """
+        entries = []
+        try:
+            root = self._parse_xml(xml_file).getroot()
+            file_ids = {}  # Track IDs that must be unique within this file
+
+            # Remove all mc:AlternateContent elements from a private copy of
+            # the shared tree (only copied when there is something to remove)
+            mc_path = ".//mc:AlternateContent"
+            mc_namespaces = {"mc": self.MC_NAMESPACE}
+            if root.xpath(mc_path, namespaces=mc_namespaces):
+                root = copy.deepcopy(root)
+                for elem in root.xpath(mc_path, namespaces=mc_namespaces):
+                    elem.getparent().remove(elem)
+
+            # Now check IDs in the cleaned tree
+            for elem in root.iter():
+                # Get the element name without namespace
+                tag = (
+                    elem.tag.split("}")[-1].lower()
+                    if "}" in elem.tag
+                    else elem.tag.lower()
+                )
+
+                # Check if this element type has ID uniqueness requirements
+                if tag in self.UNIQUE_ID_REQUIREMENTS:
+                    attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
+
+                    # Look for the specified attribute
+                    id_value = None
+                    for attr, value in elem.attrib.items():
+                        attr_local = (
+                            attr.split("}")[-1].lower()
+                            if "}" in attr
+                            else attr.lower()
+                        )
+                        if attr_local == attr_name:
+                            id_value = value
+                            break
+
+                    if id_value is not None:
+                        if scope == "global":
+                            # Global uniqueness is checked across files by the caller
+                            entries.append(("global", id_value, elem.sourceline, tag))
+                        elif scope == "file":
+                            # Check file-level uniqueness
+                            key = (tag, attr_name)
+                            if key not in file_ids:
+                                file_ids[key] = {}
+
+                            if id_value in file_ids[key]:
+                                prev_line = file_ids[key][id_value]
+                                entries.append((
+                                    "error",
+                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                                    f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
+                                    f"(first occurrence at line {prev_line})",
+                                ))
+                            else:
+                                file_ids[key][id_value] = elem.sourceline
+
+        except (lxml.etree.XMLSyntaxError, Exception) as e:
+            entries.append((
+                "error",
+                f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}",
+            ))
+        return entries
+
     def validate_file_references(self):
         """
         Validate that all .rels files properly reference files and that all files are referenced.
@@ -310,7 +459,7 @@ class BaseSchemaValidator:
         for rels_file in rels_files:
             try:
                 # Parse relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._parse_xml(rels_file).getroot()
 
                 # Get the directory where this .rels file is located
                 rels_dir = rels_file.parent
@@ -390,87 +539,8 @@ class BaseSchemaValidator:
         Validate that all r:id attributes in XML files reference existing IDs
         in their corresponding .rels files, and optionally validate relationship types.
         """
-        import lxml.etree
-
-        errors = []
-
-        # Process each XML file that might contain r:id references
-        for xml_file in self.xml_files:
-            # Skip .rels files themselves
-            if xml_file.suffix == ".rels":
-                continue
-
-            # Determine the corresponding .rels file
-            # For dir/file.xml, it's dir/_rels/file.xml.rels
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
-
-            # Skip if there's no corresponding .rels file (that's okay)
-            if not rels_file.exists():
-                continue
-
-            try:
-                # Parse the .rels file to get valid relationship IDs and their types
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-                rid_to_type = {}
-
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
-                    if rid:
-                        # Check for duplicate rIds
-                        if rid in rid_to_type:
-                            rels_rel_path = rels_file.relative_to(self.unpacked_dir)
-                            errors.append(
-                                f"  {rels_rel_path}: Line {rel.sourceline}: "
-                                f"Duplicate relationship ID '{rid}' (IDs must be unique)"
-                            )
-                        # Extract just the type name from the full URL
-                        type_name = (
-                            rel_type.split("/")[-1] if "/" in rel_type else rel_type
-                        )
-                        rid_to_type[rid] = type_name
-
-                # Parse the XML file to find all r:id references
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all elements with r:id attributes
-                for elem in xml_root.iter():
-                    # Check for r:id attribute (relationship ID)
-                    rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
-                    if rid_attr:
-                        xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                        elem_name = (
-                            elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-                        )
-
-                        # Check if the ID exists
-                        if rid_attr not in rid_to_type:
-                            errors.append(
-                                f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                f"<{elem_name}> references non-existent relationship '{rid_attr}' "
-                                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
-                            )
-                        # Check if we have type expectations for this element
-                        elif self.ELEMENT_RELATIONSHIP_TYPES:
-                            expected_type = self._get_expected_relationship_type(
-                                elem_name
-                            )
-                            if expected_type:
-                                actual_type = rid_to_type[rid_attr]
-                                # Check if the actual type matches or contains the expected type
-                                if expected_type not in actual_type.lower():
-                                    errors.append(
-                                        f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                        f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
-                                        f"but should point to a '{expected_type}' relationship"
-                                    )
-
-            except Exception as e:
-                xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error processing {xml_rel_path}: {e}")
+        # Each XML file is checked against its own .rels file
+        errors = self._gather_errors(self._check_relationship_ids_file)
 
         if errors:
             print(f"FAILED - Found {len(errors)} relationship ID reference errors:")
@@ -483,6 +553,88 @@ class BaseSchemaValidator:
                 print("PASSED - All relationship ID references are valid")
             return True
 
+    def _check_relationship_ids_file(self, xml_file):
+        """Return r:id reference errors for one XML file and its .rels file."""
+        errors = []
+
+        # Skip .rels files themselves
+        if xml_file.suffix == ".rels":
+            return errors
+
+        # Determine the corresponding .rels file
+        # For dir/file.xml, it's dir/_rels/file.xml.rels
+        rels_dir = xml_file.parent / "_rels"
+        rels_file = rels_dir / f"{xml_file.name}.rels"
+
+        # Skip if there's no corresponding .rels file (that's okay)
+        if not rels_file.exists():
+            return errors
+
+        try:
+            # Parse the .rels file to get valid relationship IDs and their types
+            rels_root = self._parse_xml(rels_file).getroot()
+            rid_to_type = {}
+
+            for rel in rels_root.findall(
+                f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
+            ):
+                rid = rel.get("Id")
+                rel_type = rel.get("Type", "")
+                if rid:
+                    # Check for duplicate rIds
+                    if rid in rid_to_type:
+                        rels_rel_path = rels_file.relative_to(self.unpacked_dir)
+                        errors.append(
+                            f"  {rels_rel_path}: Line {rel.sourceline}: "
+                            f"Duplicate relationship ID '{rid}' (IDs must be unique)"
+                        )
+                    # Extract just the type name from the full URL
+                    type_name = (
+                        rel_type.split("/")[-1] if "/" in rel_type else rel_type
+                    )
+                    rid_to_type[rid] = type_name
+
+            # Parse the XML file to find all r:id references
+            xml_root = self._parse_xml(xml_file).getroot()
+
+            # Find all elements with r:id attributes
+            for elem in xml_root.iter():
+                # Check for r:id attribute (relationship ID)
+                rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
+                if rid_attr:
+                    xml_rel_path = xml_file.relative_to(self.unpacked_dir)
+                    elem_name = (
+                        elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
+                    )
+
+                    # Check if the ID exists
+                    if rid_attr not in rid_to_type:
+                        errors.append(
+                            f"  {xml_rel_path}: Line {elem.sourceline}: "
+                            f"<{elem_name}> references non-existent relationship '{rid_attr}' "
+                            f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
+                        )
+                    # Check if we have type expectations for this element
+                    elif self.ELEMENT_RELATIONSHIP_TYPES:
+                        expected_type = self._get_expected_relationship_type(
+                            elem_name
+                        )
+                        if expected_type:
+                            actual_type = rid_to_type[rid_attr]
+                            # Check if the actual type matches or contains the expected type
+                            if expected_type not in actual_type.lower():
+                                errors.append(
+                                    f"  {xml_rel_path}: Line {elem.sourceline}: "
+                                    f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
+                                    f"but should point to a '{expected_type}' relationship"
+                                )
+
+        except Exception as e:
+            xml_rel_path = xml_file.relative_to(self.unpacked_dir)
+            errors.append(f"  Error processing {xml_rel_path}: {e}")
+
+        return errors
+
     def _get_expected_relationship_type(self, element_name):
         """
         Get the expected relationship type for an element.
@@ -531,7 +683,7 @@ class BaseSchemaValidator:
 
         try:
             # Parse and get all declared parts and extensions
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            root = self._parse_xml(content_types_file).getroot()
             declared_parts = set()
             declared_extensions = set()
 
@@ -593,7 +745,7 @@ class BaseSchemaValidator:
                     continue
 
                 try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
+                    root_tag = self._parse_xml(xml_file).getroot().tag
                     root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
 
                     if root_name in declarable_roots and path_str not in declared_parts:
@@ -692,11 +844,10 @@ class BaseSchemaValidator:
         valid_count = 0
         skipped_count = 0
 
-        for xml_file in self.xml_files:
+        # Files are validated independently (possibly in parallel); tally in order
+        results = self._map_files(self.validate_file_against_xsd)
+        for xml_file, (is_valid, new_file_errors) in zip(self.xml_files, results):
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
 
             if is_valid is None:
                 skipped_count += 1
@@ -823,24 +974,31 @@ class BaseSchemaValidator:
 
         return xml_doc
 
-    def _validate_single_file_xsd(self, xml_file, base_path):
-        """Validate a single XML file against XSD schema. Returns (is_valid, errors_set)."""
+    def _validate_single_file_xsd(self, xml_file, base_path, content=None):
+        """Validate a single XML file against XSD schema. Returns (is_valid, errors_set).
+
+        Args:
+            xml_file: Path of the part, used to pick the schema and cleaning rules
+            base_path: Directory the part's path is relative to
+            content: Raw XML bytes to validate instead of the cached parse of xml_file
+        """
         schema_path = self._get_schema_path(xml_file)
         if not schema_path:
             return None, None  # Skip file
 
         try:
-            # Load schema
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
+            # Check out a compiled schema (compiled once per concurrent thread)
+            schema = load_schema(schema_path)
+        except Exception as e:
+            return False, {str(e)}
 
-            # Load and preprocess XML
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
+        try:
+            # Load and preprocess XML (template tag removal works on a copy, so
+            # the cached tree is never modified)
+            if content is None:
+                xml_doc = self._parse_xml(xml_file)
+            else:
+                xml_doc = lxml.etree.parse(io.BytesIO(content))
 
             xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
             xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
@@ -865,43 +1023,59 @@ class BaseSchemaValidator:
 
         except Exception as e:
             return False, {str(e)}
+        finally:
+            release_schema(schema_path, schema)
+
+    def _read_original_parts(self):
+        """Read every XML part of the original document straight from its zip.
+
+        The archive is opened once per validator, even when several worker
+        threads ask for it at once; nothing is extracted to disk.
+
+        Returns:
+            dict: Archive member name -> raw bytes for each .xml and .rels part
+        """
+        with self._lock:
+            if self._original_parts is None:
+                import zipfile
+
+                with zipfile.ZipFile(self.original_file, "r") as zip_ref:
+                    self._original_parts = {
+                        info.filename: zip_ref.read(info)
+                        for info in zip_ref.infolist()
+                        if info.filename.endswith((".xml", ".rels"))
+                    }
+        return self._original_parts
 
     def _get_original_file_errors(self, xml_file):
         """Get XSD validation errors from a single file in the original document.
 
+        Errors are computed the first time a part is asked for and memoized.
+
         Args:
             xml_file: Path to the XML file in unpacked_dir to check
 
         Returns:
             set: Set of error messages from the original file
         """
-        import tempfile
-        import zipfile
-
         # Resolve both paths to handle symlinks (e.g., /var vs /private/var on macOS)
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
+        member = relative_path.as_posix()
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Extract original file
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
-
-            # Find corresponding file in original
-            original_xml_file = temp_path / relative_path
-
-            if not original_xml_file.exists():
+        if member not in self._original_errors:
+            content = self._read_original_parts().get(member)
+            if content is None:
                 # File didn't exist in original, so no original errors
-                return set()
-
-            # Validate the specific file in original
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
+                self._original_errors[member] = set()
+            else:
+                # Validate the original bytes under the same relative path
+                is_valid, errors = self._validate_single_file_xsd(
+                    xml_file, unpacked_dir, content=content
+                )
+                self._original_errors[member] = errors if errors else set()
+        return self._original_errors[member]
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         """Remove template tags from XML text nodes and collect warnings.
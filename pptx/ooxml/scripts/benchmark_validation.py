@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-file XSD validation cost with and without the compiled schema cache.
+
+Usage:
+    python benchmark_validation.py <dir> --original <original_file> [--repeat N]
+
+The "cold" pass recompiles the schema for every part, as the validators did
+before schemas were cached; the "cached" pass compiles each schema once.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from validation import DOCXSchemaValidator, PPTXSchemaValidator, clear_schema_cache
+
+
+def time_pass(validator, xml_files, cold):
+    """Validate every file once and return the elapsed seconds."""
+    clear_schema_cache()
+    start = time.perf_counter()
+    for xml_file in xml_files:
+        if cold:
+            clear_schema_cache()
+        validator._validate_single_file_xsd(xml_file, validator.unpacked_dir)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark XSD validation")
+    parser.add_argument("unpacked_dir", help="Path to unpacked Office document directory")
+    parser.add_argument(
+        "--original",
+        required=True,
+        help="Path to original file (.docx/.pptx)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per pass; the fastest is reported",
+    )
+    args = parser.parse_args()
+
+    original_file = Path(args.original)
+    match original_file.suffix.lower():
+        case ".docx":
+            validator_class = DOCXSchemaValidator
+        case ".pptx":
+            validator_class = PPTXSchemaValidator
+        case _:
+            raise SystemExit(f"Error: {original_file} must be a .docx or .pptx file")
+
+    validator = validator_class(args.unpacked_dir, original_file)
+    xml_files = [f for f in validator.xml_files if validator._get_schema_path(f)]
+    if not xml_files:
+        raise SystemExit("Error: no files with a matching schema")
+    schemas = {validator._get_schema_path(f) for f in xml_files}
+
+    print(f"{len(xml_files)} files against {len(schemas)} schema(s)")
+    results = {}
+    for label, cold in (("cold", True), ("cached", False)):
+        elapsed = min(time_pass(validator, xml_files, cold) for _ in range(args.repeat))
+        results[label] = elapsed
+        print(
+            f"  {label:>6}: {elapsed:.3f}s total, "
+            f"{elapsed / len(xml_files) * 1000:.2f}ms per file"
+        )
+    print(f"  speedup: {results['cold'] / results['cached']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
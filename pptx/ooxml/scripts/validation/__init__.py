@@ -2,7 +2,12 @@
 Validation modules for Word document processing.
 """
 
-from .base import BaseSchemaValidator
+from .base import (
+    BaseSchemaValidator,
+    clear_schema_cache,
+    load_schema,
+    release_schema,
+)
 from .docx import DOCXSchemaValidator
 from .pptx import PPTXSchemaValidator
 from .redlining import RedliningValidator
@@ -12,4 +17,7 @@ __all__ = [
     "DOCXSchemaValidator",
     "PPTXSchemaValidator",
     "RedliningValidator",
+    "clear_schema_cache",
+    "load_schema",
+    "release_schema",
 ]
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Benchmark the process mining steps and the full pipeline on reproducible synthetic event logs."""
+
+import argparse
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+COMMON_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
+)
+SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
+for path in (COMMON_DIR, SCRIPT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from common import ExitCodes, exit_with_error, load_json, parse_list, save_json
+from process_mining_steps import (
+    build_variant_index,
+    compute_arrival_metrics,
+    compute_case_duration_stats,
+    compute_start_end,
+    compute_statistics,
+    conformance_diagnostics,
+    directly_follows_graph,
+    discover_models,
+    evaluate_models,
+    filter_event_log,
+    handover_counts,
+    load_event_log,
+    organisational_analysis,
+    performance_analysis,
+    run_data_quality_checks,
+)
+
+# Output pattern per --timestamp-format, plus the loader options that parse it back.
+TIMESTAMP_FORMATS: Dict[str, Dict[str, Any]] = {
+    "iso": {"pattern": "%Y-%m-%d %H:%M:%S", "load": {}},
+    "iso-tz": {"pattern": "%Y-%m-%dT%H:%M:%S%z", "load": {"timestamp_utc": True}},
+    "dayfirst": {"pattern": "%d/%m/%Y %H:%M:%S", "load": {"timestamp_dayfirst": True}},
+    "us-12h": {"pattern": "%m/%d/%Y %I:%M:%S %p", "load": {"timestamp_format": "%m/%d/%Y %I:%M:%S %p"}},
+}
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark process mining steps and run_pipeline on synthetic logs.")
+    parser.add_argument("--cases", default="1000,10000,100000", help="Comma-separated numbers of cases per scale.")
+    parser.add_argument("--events-per-case", type=float, default=8.0, help="Mean trace length of the variant templates.")
+    parser.add_argument("--activities", type=int, default=20, help="Number of distinct activities.")
+    parser.add_argument("--variants", type=int, default=50, help="Number of variant templates cases are drawn from.")
+    parser.add_argument("--variant-skew", type=float, default=1.2,
+                        help="Zipf exponent for variant frequencies (0 draws variants uniformly).")
+    parser.add_argument("--resources", type=int, default=50, help="Number of distinct resources.")
+    parser.add_argument("--noise", type=float, default=0.02,
+                        help="Share of events dropped or relabelled with a random activity.")
+    parser.add_argument("--timestamp-format", choices=list(TIMESTAMP_FORMATS), default="iso",
+                        help="How timestamps are written to the synthetic CSV.")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed.")
+    parser.add_argument("--steps",
+                        help="Comma-separated steps to time (default: all but conformance_alignments and evaluate_models).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per step; the minimum is reported.")
+    parser.add_argument("--no-pipeline", action="store_true", help="Skip the end-to-end run_pipeline timing.")
+    parser.add_argument("--pipeline-max-cases", type=int, default=10000,
+                        help="Skip the run_pipeline timing above this many cases (it aligns every variant).")
+    parser.add_argument("--work-dir", help="Keep synthetic logs and step outputs here instead of a temporary directory.")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against.")
+    parser.add_argument("--regression-threshold", type=float, default=1.25,
+                        help="Flag steps whose time exceeds the baseline by this factor.")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero when a regression is flagged.")
+    parser.add_argument("--output", default="benchmark_pipeline.json", help="JSON results path.")
+    return parser.parse_args()
+
+
+def _variant_templates(num_variants: int, activities: int, events_per_case: float,
+                       rng: np.random.Generator) -> List[np.ndarray]:
+    """Activity code sequences that share a start and an end activity, with optional rework loops."""
+    templates: List[np.ndarray] = []
+    seen = set()
+    inner = np.arange(1, max(activities - 1, 2))
+    attempts = 0
+    while len(templates) < num_variants and attempts < num_variants * 50:
+        attempts += 1
+        length = max(int(rng.poisson(max(events_per_case - 2, 1))), 1)
+        body = np.sort(rng.choice(inner, size=min(length, len(inner)), replace=False))
+        if len(body) > 2 and rng.random() < 0.3:
+            loop_start = int(rng.integers(0, len(body) - 1))
+            loop_end = int(rng.integers(loop_start + 1, len(body)))
+            body = np.concatenate([body[:loop_end + 1], body[loop_start:loop_end + 1], body[loop_end + 1:]])
+        sequence = np.concatenate([[0], body, [activities - 1]]).astype(np.int32)
+        if sequence.tobytes() not in seen:
+            seen.add(sequence.tobytes())
+            templates.append(sequence)
+    return templates
+
+
+def synthetic_event_log(cases: int, activities: int = 20, variants: int = 50, variant_skew: float = 1.2,
+                        resources: int = 50, noise: float = 0.02, events_per_case: float = 8.0,
+                        seed: int = 7) -> pd.DataFrame:
+    """Reproducible event log: Zipf-distributed variants, per-activity resource pools and event-level noise.
+
+    The same arguments always give the same frame, so timings can be compared across commits.
+    """
+    rng = np.random.default_rng(seed)
+    activities = max(activities, 3)
+    templates = _variant_templates(variants, activities, events_per_case, rng)
+    weights = 1.0 / np.arange(1, len(templates) + 1) ** variant_skew
+    case_variant = rng.choice(len(templates), size=cases, p=weights / weights.sum())
+    lengths = np.array([len(template) for template in templates])[case_variant]
+    codes = np.concatenate([templates[variant] for variant in case_variant])
+    case_codes = np.repeat(np.arange(cases), lengths)
+
+    # Noise: relabel some events with a random activity and drop others (never the first event of a case).
+    draw = rng.random(len(codes))
+    codes = np.where(draw < noise / 2, rng.integers(0, activities, size=len(codes)), codes)
+    first = np.concatenate([[True], case_codes[1:] != case_codes[:-1]])
+    keep = first | (draw < noise / 2) | (draw >= noise)
+    codes, case_codes = codes[keep], case_codes[keep]
+
+    arrivals = np.cumsum(rng.exponential(scale=1800.0, size=cases))
+    gaps = rng.exponential(scale=7200.0, size=len(codes))
+    gaps[np.concatenate([[True], case_codes[1:] != case_codes[:-1]])] = 0.0
+    elapsed = pd.Series(gaps).groupby(case_codes).cumsum().to_numpy()
+    seconds = np.round(arrivals[case_codes] + elapsed).astype(np.int64)
+
+    # Each activity is handled by its own slice of the resource pool.
+    pool = max(resources // activities, 1)
+    resource_codes = (codes * pool + rng.integers(0, pool, size=len(codes))) % max(resources, 1)
+    return pd.DataFrame({
+        "case:concept:name": np.char.add("case_", case_codes.astype(str)),
+        "concept:name": np.char.add("Activity ", np.char.zfill(codes.astype(str), 2)),
+        "time:timestamp": pd.Timestamp("2024-01-01") + pd.to_timedelta(seconds, unit="s"),
+        "org:resource": np.char.add("user_", resource_codes.astype(str)),
+    })
+
+
+def write_synthetic_csv(df: pd.DataFrame, path: str, timestamp_format: str = "iso") -> str:
+    """Write the log with timestamps rendered in one of TIMESTAMP_FORMATS, rows shuffled like an export."""
+    timestamps = df["time:timestamp"]
+    if timestamp_format == "iso-tz":
+        timestamps = timestamps.dt.tz_localize("UTC")
+    rendered = df.assign(**{"time:timestamp": timestamps.dt.strftime(TIMESTAMP_FORMATS[timestamp_format]["pattern"])})
+    rendered.sample(frac=1.0, random_state=0).to_csv(path, index=False)
+    return path
+
+
+def _timed(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    runs = []
+    result = None
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return {"seconds": min(runs), "median_seconds": statistics.median(runs), "runs": runs, "result": result}
+
+
+def step_table(csv_path: str, load_options: Dict[str, Any], scratch: str) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    """Step name -> callable over a shared context. Steps later in the table reuse what earlier ones stored."""
+    def load(ctx: Dict[str, Any]) -> Any:
+        ctx["df"] = load_event_log(csv_path, "csv", "case:concept:name", "concept:name", "time:timestamp",
+                                   resource_col="org:resource", **load_options)
+        return ctx["df"]
+
+    def variant_index(ctx: Dict[str, Any]) -> Any:
+        ctx["variant_index"] = build_variant_index(ctx["df"])
+        return ctx["variant_index"]
+
+    def discover(ctx: Dict[str, Any]) -> Any:
+        ctx["models"] = discover_models(ctx["df"], scratch, 0.0, 0.5, 0.0, "both", variant_index=ctx["variant_index"])
+        return ctx["models"]
+
+    return {
+        "load_event_log": load,
+        "run_data_quality_checks": lambda ctx: run_data_quality_checks(ctx["df"].copy(), {}),
+        "build_variant_index": variant_index,
+        "compute_statistics": lambda ctx: compute_statistics(ctx["df"], ctx["variant_index"]),
+        "filter_event_log": lambda ctx: filter_event_log(ctx["df"], min_activity_frequency=0.01, top_variants=10),
+        "compute_start_end": lambda ctx: compute_start_end(ctx["df"]),
+        "compute_arrival_metrics": lambda ctx: compute_arrival_metrics(ctx["df"]),
+        "compute_case_duration_stats": lambda ctx: compute_case_duration_stats(ctx["df"]),
+        "directly_follows_graph": lambda ctx: directly_follows_graph(ctx["df"]),
+        "handover_counts": lambda ctx: handover_counts(ctx["df"], "org:resource"),
+        "performance_analysis": lambda ctx: performance_analysis(ctx["df"], scratch),
+        "organisational_analysis": lambda ctx: organisational_analysis(ctx["df"], scratch),
+        "discover_models": discover,
+        "conformance_token": lambda ctx: conformance_diagnostics(ctx["df"], ctx["models"], scratch, method="token"),
+        "conformance_alignments": lambda ctx: conformance_diagnostics(
+            ctx["df"], ctx["models"], scratch, method="alignments", variant_index=ctx["variant_index"], checkpoint=False
+        ),
+        "evaluate_models": lambda ctx: evaluate_models(ctx["df"], ctx["models"], scratch),
+    }
+
+
+# Steps whose context other steps read, mapped to the steps that need them.
+PREREQUISITES = {
+    "load_event_log": None,
+    "build_variant_index": None,
+    "discover_models": ("conformance_token", "conformance_alignments", "evaluate_models"),
+}
+# pm4py alignments and model metrics take minutes on noisy logs; select them explicitly.
+DEFAULT_SKIPPED_STEPS = {"conformance_alignments", "evaluate_models"}
+
+
+def time_pipeline(csv_path: str, output_dir: str, timestamp_format: str) -> Dict[str, Any]:
+    """Wall time and peak RSS of a fresh run_pipeline.py process."""
+    command = [
+        sys.executable, os.path.join(SCRIPT_DIR, "run_pipeline.py"),
+        "--file", csv_path, "--format", "csv", "--resource", "org:resource", "--output", output_dir,
+        "--no-cache", "--chart-format", "data", "--miner-selection", "both",
+    ]
+    for option, value in TIMESTAMP_FORMATS[timestamp_format]["load"].items():
+        flag = "--" + option.replace("_", "-")
+        command += [flag] if value is True else [flag, str(value)]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    seconds = time.perf_counter() - start
+    entry: Dict[str, Any] = {"seconds": seconds, "returncode": process.returncode}
+    manifest = load_json(os.path.join(output_dir, "manifest.json")) or {}
+    rss = [step.get("max_rss_mb") for step in manifest.get("instrumentation", []) if step.get("max_rss_mb") is not None]
+    if rss:
+        entry["max_rss_mb"] = max(rss)
+    if process.returncode:
+        entry["error"] = stderr.decode("utf-8", "replace").strip().splitlines()[-1:]
+    return entry
+
+
+def run_scale(cases: int, args: argparse.Namespace, steps: List[str], work_dir: str) -> List[Dict[str, Any]]:
+    scale_dir = os.path.join(work_dir, f"cases_{cases}")
+    scratch = os.path.join(scale_dir, "steps")
+    os.makedirs(scratch, exist_ok=True)
+    df = synthetic_event_log(cases, args.activities, args.variants, args.variant_skew, args.resources,
+                             args.noise, args.events_per_case, args.seed)
+    csv_path = write_synthetic_csv(df, os.path.join(scale_dir, "synthetic_log.csv"), args.timestamp_format)
+    scale = {"cases": cases, "events": int(len(df))}
+    table = step_table(csv_path, TIMESTAMP_FORMATS[args.timestamp_format]["load"], scratch)
+    context: Dict[str, Any] = {}
+    results = []
+    for name, func in table.items():
+        if name not in steps:
+            # Run unselected prerequisites once, untimed; None means every step needs it.
+            if name in PREREQUISITES and (PREREQUISITES[name] is None or set(PREREQUISITES[name]) & set(steps)):
+                func(context)
+            continue
+        try:
+            timing = _timed(lambda: func(context), args.repeat)
+            timing.pop("result")
+            entry = {**scale, "step": name, **timing}
+        except Exception as exc:
+            entry = {**scale, "step": name, "error": str(exc)}
+        results.append(entry)
+        print(entry)
+    if not args.no_pipeline and cases <= args.pipeline_max_cases:
+        entry = {**scale, "step": "run_pipeline", **time_pipeline(csv_path, os.path.join(scale_dir, "pipeline"),
+                                                                    args.timestamp_format)}
+        results.append(entry)
+        print(entry)
+    return results
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[Dict[str, Any]]:
+    """Annotate results with the baseline time and ratio; return the entries slower than threshold x baseline."""
+    baseline = load_json(baseline_path)
+    if not baseline:
+        exit_with_error(f"Baseline results not found: {baseline_path}")
+    previous = {(entry["cases"], entry["step"]): entry.get("seconds") for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in results:
+        before = previous.get((entry["cases"], entry["step"]))
+        if not before or entry.get("seconds") is None:
+            continue
+        entry["baseline_seconds"] = before
+        entry["ratio"] = entry["seconds"] / before
+        if entry["ratio"] > threshold:
+            regressions.append(entry)
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=SCRIPT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> Dict[str, Any]:
+    try:
+        import pm4py
+        pm4py_version = pm4py.__version__
+    except ImportError:
+        pm4py_version = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "pm4py": pm4py_version,
+    }
+
+
+def main() -> None:
+    args = parse_arguments()
+    sizes = [int(item) for item in parse_list(args.cases) or []]
+    if not sizes:
+        exit_with_error("No benchmark sizes provided.")
+    table_names = list(step_table("", {}, ""))
+    steps = parse_list(args.steps) or [name for name in table_names if name not in DEFAULT_SKIPPED_STEPS]
+    unknown = sorted(set(steps) - set(table_names))
+    if unknown:
+        exit_with_error(f"Unknown steps: {', '.join(unknown)}. Choose from: {', '.join(table_names)}.")
+    config = {key: value for key, value in vars(args).items()
+              if key not in ("output", "baseline", "work_dir", "fail_on_regression")}
+    config["steps"] = steps
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="pm_benchmark_") as temp_dir:
+        work_dir = args.work_dir or temp_dir
+        for cases in sizes:
+            results.extend(run_scale(cases, args, steps, work_dir))
+
+    regressions = []
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.regression_threshold)
+        for entry in regressions:
+            print(f"Regression: {entry['step']} at {entry['cases']} cases took {entry['seconds']:.3f}s "
+                  f"({entry['ratio']:.2f}x baseline {entry['baseline_seconds']:.3f}s)")
+    save_json({
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "environment": environment_info(),
+        "config": config,
+        "results": results,
+        "regressions": [{"cases": entry["cases"], "step": entry["step"], "ratio": entry["ratio"]} for entry in regressions],
+    }, args.output)
+    if regressions and args.fail_on_regression:
+        exit_with_error(f"{len(regressions)} step(s) slower than {args.regression_threshold}x baseline.",
+                        ExitCodes.RUNTIME_ERROR)
+
+
+if __name__ == "__main__":
+    main()
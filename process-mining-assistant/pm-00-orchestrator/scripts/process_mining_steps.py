@@ -1,15 +1,43 @@
 #!/usr/bin/env python3
 """Process mining pipeline steps."""
 
+import gzip
 import json
 import logging
+import math
 import os
 import hashlib
-from typing import Dict, List, Optional, Tuple, Any
+import io
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from multiprocessing import connection as mp_connection
+from statistics import NormalDist
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib import cbook
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+COMMON_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
+)
+if COMMON_DIR not in sys.path:
+    sys.path.insert(0, COMMON_DIR)
+
+from common import cached_file_hash, current_rss_mb, file_hash, instrumented, load_json, save_json
 
 try:
     import pm4py
@@ -23,20 +51,20 @@ if pm4py is not None:
         from pm4py.objects.log.importer.xes import importer as xes_importer
         from pm4py.algo.discovery.inductive import algorithm as inductive_miner
         from pm4py.algo.discovery.heuristics import algorithm as heuristic_miner
-        from pm4py.statistics.start_activities.log import get as start_activities_get
-        from pm4py.statistics.end_activities.log import get as end_activities_get
         from pm4py.statistics.variants.log import get as variants_get
         from pm4py.visualization.petri_net import visualizer as pn_vis
+        from pm4py.objects.log.obj import Event, EventLog, Trace
     except ImportError:
         log_converter = None
         dataframe_utils = None
         xes_importer = None
         inductive_miner = None
         heuristic_miner = None
-        start_activities_get = None
-        end_activities_get = None
         variants_get = None
         pn_vis = None
+        Event = None
+        EventLog = None
+        Trace = None
 
     try:
         from pm4py.evaluation.replay_fitness import evaluator as fitness_evaluator
@@ -65,16 +93,24 @@ if pm4py is not None:
         from pm4py.algo.conformance.tokenreplay import algorithm as token_replay
     except ImportError:
         token_replay = None
+
+    try:
+        from pm4py.algo.discovery.heuristics.variants import classic as heuristics_classic
+        from pm4py.objects.conversion.heuristics_net import converter as heuristics_net_converter
+    except ImportError:
+        heuristics_classic = None
+        heuristics_net_converter = None
 else:
     log_converter = None
     dataframe_utils = None
     xes_importer = None
     inductive_miner = None
     heuristic_miner = None
-    start_activities_get = None
-    end_activities_get = None
     variants_get = None
     pn_vis = None
+    Event = None
+    EventLog = None
+    Trace = None
     fitness_evaluator = None
     precision_evaluator = None
     generalization_evaluator = None
@@ -83,6 +119,8 @@ else:
     pm4py_conformance = None
     pm4py_analysis = None
     token_replay = None
+    heuristics_classic = None
+    heuristics_net_converter = None
 
 
 def require_pm4py() -> None:
@@ -90,6 +128,42 @@ def require_pm4py() -> None:
         raise RuntimeError("pm4py is required. Install it before running the pipeline.")
 
 
+TIMESTAMP_SAMPLE_SIZE = 1000
+ISO_OFFSET_PATTERN = r"(?:Z|[+-]\d{2}:?\d{2})\s*$"
+
+
+def infer_timestamp_format(series: pd.Series, dayfirst: bool = False, sample_size: int = TIMESTAMP_SAMPLE_SIZE) -> Optional[str]:
+    """Pick the strptime format that parses the most of an evenly spaced sample of timestamp strings.
+
+    Returns "ISO8601" when the whole sample is ISO 8601 (any precision, with or without offsets),
+    and None when no candidate parses any of the sample, leaving pandas to guess per call.
+    """
+    present = np.flatnonzero(series.notna().to_numpy())
+    if not len(present):
+        return None
+    positions = present[np.unique(np.linspace(0, len(present) - 1, min(sample_size, len(present))).astype(np.int64))]
+    sample = pd.Series(pd.unique(series.iloc[positions].astype(str).str.strip()), dtype=object)
+    if pd.to_datetime(sample, format="ISO8601", errors="coerce", utc=True).notna().all():
+        return "ISO8601"
+    guesses: Dict[str, int] = {}
+    for value in sample:
+        for first in (dayfirst, not dayfirst):
+            with warnings.catch_warnings():
+                # guess_datetime_format warns when the guess contradicts dayfirst; both are tried anyway.
+                warnings.simplefilter("ignore", UserWarning)
+                guess = guess_datetime_format(value, dayfirst=first)
+            if guess:
+                guesses[guess] = guesses.get(guess, 0) + (2 if first == dayfirst else 1)
+    best, best_parsed = None, 0
+    for candidate in sorted(guesses, key=guesses.get, reverse=True):
+        parsed = int(pd.to_datetime(sample, format=candidate, errors="coerce", utc=True).notna().sum())
+        if parsed > best_parsed:
+            best, best_parsed = candidate, parsed
+        if parsed == len(sample):
+            break
+    return best
+
+
 def normalize_timestamps(
     series: pd.Series,
     timestamp_format: Optional[str] = None,
@@ -97,7 +171,30 @@ def normalize_timestamps(
     utc: Optional[bool] = None,
     timezone: Optional[str] = None,
 ) -> pd.Series:
-    parsed = pd.to_datetime(series, format=timestamp_format, errors="coerce", dayfirst=dayfirst, utc=utc)
+    """Parse timestamps once: datetime input is kept, strings use an explicit or sample-inferred format.
+
+    Apart from naive ISO 8601, which pandas parses in C, strings are parsed once per distinct value
+    and mapped back onto the rows; event logs repeat timestamps and strptime/offset parsing is slow.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        parsed = pd.to_datetime(series, utc=True) if utc else series
+    elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        timestamp_format = timestamp_format or infer_timestamp_format(series, dayfirst=dayfirst)
+        first = series.iloc[:TIMESTAMP_SAMPLE_SIZE].dropna().head(1).astype(str)
+        if timestamp_format == "ISO8601" and not first.str.contains(ISO_OFFSET_PATTERN, regex=True).any():
+            # pandas' C parser handles naive ISO 8601 faster than factorizing the strings.
+            parsed = pd.to_datetime(series, format=timestamp_format, errors="coerce", utc=utc)
+        else:
+            codes, uniques = pd.factorize(series)
+            uniques = pd.Series(uniques, dtype=object)
+            try:
+                values = pd.to_datetime(uniques, format=timestamp_format, errors="coerce", dayfirst=dayfirst, utc=utc)
+            except ValueError:
+                # Mixed UTC offsets (e.g. either side of a DST change) have no common fixed-offset dtype.
+                values = pd.to_datetime(uniques, format=timestamp_format, errors="coerce", dayfirst=dayfirst, utc=True)
+            parsed = pd.Series(values.array.take(codes, allow_fill=True), index=series.index, name=series.name)
+    else:
+        parsed = pd.to_datetime(series, format=timestamp_format, errors="coerce", dayfirst=dayfirst, utc=utc)
     if timezone:
         try:
             if parsed.dt.tz is None:
@@ -109,6 +206,7 @@ def normalize_timestamps(
     return parsed
 
 
+@instrumented
 def load_csv_dataframe(
     file_path: str,
     case_col: str,
@@ -119,8 +217,17 @@ def load_csv_dataframe(
     timestamp_dayfirst: bool = False,
     timestamp_utc: Optional[bool] = None,
     timestamp_timezone: Optional[str] = None,
+    parsed_timestamps: Optional[Tuple[str, pd.Series]] = None,
 ) -> pd.DataFrame:
+    """Read a CSV log and rename it to XES column names with parsed timestamps.
+
+    parsed_timestamps, from load_parsed_timestamps, replaces the raw column so it is not parsed again.
+    """
     df = pd.read_csv(file_path)
+    if parsed_timestamps is not None:
+        column, values = parsed_timestamps
+        if column in df.columns and len(values) == len(df):
+            df[column] = values.set_axis(df.index)
     rename_map = {
         case_col: "case:concept:name",
         activity_col: "concept:name",
@@ -140,6 +247,7 @@ def load_csv_dataframe(
     return df
 
 
+@instrumented
 def convert_dataframe_to_event_log(df: pd.DataFrame) -> object:
     require_pm4py()
     if log_converter is None or dataframe_utils is None:
@@ -148,7 +256,414 @@ def convert_dataframe_to_event_log(df: pd.DataFrame) -> object:
     return log_converter.apply(df)
 
 
-def load_event_log(
+XES_NAMESPACE = "http://www.xes-standard.org/"
+XES_ATTRIBUTE_TAGS = ("string", "date", "int", "float", "boolean", "id")
+# Standard extensions declared in the log header when a column uses their prefix.
+XES_EXTENSIONS = {
+    "concept": ("Concept", "http://www.xes-standard.org/concept.xesext"),
+    "time": ("Time", "http://www.xes-standard.org/time.xesext"),
+    "lifecycle": ("Lifecycle", "http://www.xes-standard.org/lifecycle.xesext"),
+    "org": ("Organizational", "http://www.xes-standard.org/org.xesext"),
+}
+
+
+def _open_xes(file_path: str, mode: str) -> Any:
+    """Open plain or gzip-compressed XES; reads sniff the gzip magic, writes follow a .gz suffix.
+
+    Text modes are always UTF-8, the encoding the writer declares, whatever the platform locale.
+    """
+    if "r" in mode:
+        with open(file_path, "rb") as handle:
+            compressed = handle.read(2) == b"\x1f\x8b"
+    else:
+        compressed = file_path.endswith(".gz")
+    encoding = None if "b" in mode else "utf-8"
+    opener = gzip.open if compressed else open
+    return opener(file_path, mode, encoding=encoding)
+
+
+def _xes_column(xes_type: str, size: int, rows: List[int], values: List[str]) -> pd.Series:
+    if len(rows) == size:
+        raw = pd.Series(values, dtype=object)
+    else:
+        raw = pd.Series(np.full(size, None, dtype=object))
+        raw.iloc[np.asarray(rows, dtype=np.int64)] = values
+    if xes_type == "date":
+        return pd.to_datetime(raw, utc=True, format="ISO8601", errors="coerce")
+    if xes_type in ("int", "float"):
+        return pd.to_numeric(raw, errors="coerce")
+    if xes_type == "boolean":
+        return raw.map({"true": True, "false": False, "True": True, "False": False})
+    return raw.astype("str") if len(rows) == size else raw
+
+
+@instrumented
+def read_xes_dataframe(file_path: str) -> pd.DataFrame:
+    """Stream an XES (or .xes.gz) file into the event DataFrame without building a pm4py EventLog.
+
+    Each trace is parsed, flattened into per-attribute columns and cleared before the next one,
+    so memory follows the DataFrame rather than the XML tree. Trace attributes become `case:`
+    columns after the event columns, as pm4py's converter lays them out; nested attributes are skipped.
+    """
+    event_columns: Dict[str, Tuple[str, List[int], List[str]]] = {}
+    case_columns: Dict[str, Tuple[str, List[int], List[str]]] = {}
+    trace_lengths: List[int] = []
+    rows = 0
+    with _open_xes(file_path, "rb") as handle:
+        context = ElementTree.iterparse(handle, events=("start", "end"))
+        _, root = next(context)
+        for action, element in context:
+            if action != "end" or element.tag.rpartition("}")[2] != "trace":
+                continue
+            trace_index = len(trace_lengths)
+            trace_start = rows
+            for child in element:
+                tag = child.tag.rpartition("}")[2]
+                if tag == "event":
+                    for attribute in child:
+                        xes_type = attribute.tag.rpartition("}")[2]
+                        key = attribute.get("key")
+                        if xes_type not in XES_ATTRIBUTE_TAGS or key is None:
+                            continue
+                        column = event_columns.setdefault(key, (xes_type, [], []))
+                        column[1].append(rows)
+                        column[2].append(attribute.get("value"))
+                    rows += 1
+                elif tag in XES_ATTRIBUTE_TAGS and child.get("key") is not None:
+                    column = case_columns.setdefault("case:" + child.get("key"), (tag, [], []))
+                    column[1].append(trace_index)
+                    column[2].append(child.get("value"))
+            trace_lengths.append(rows - trace_start)
+            # Drop the finished trace (and anything else parsed so far) from the tree.
+            root.clear()
+    data = {key: _xes_column(xes_type, rows, positions, values)
+            for key, (xes_type, positions, values) in event_columns.items()}
+    trace_of_row = np.repeat(np.arange(len(trace_lengths)), trace_lengths)
+    for key, (xes_type, positions, values) in case_columns.items():
+        data[key] = _xes_column(xes_type, len(trace_lengths), positions, values).iloc[trace_of_row].reset_index(drop=True)
+    return pd.DataFrame(data, index=pd.RangeIndex(rows))
+
+
+def _xes_escape(values: pd.Series) -> pd.Series:
+    """Attribute-value escaping equivalent to xml.sax.saxutils.quoteattr inside double quotes."""
+    if not values.str.contains('[&<>"\n\r\t]', regex=True).any():
+        return values
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"),
+                         ("\n", "&#10;"), ("\r", "&#13;"), ("\t", "&#9;")):
+        values = values.str.replace(char, entity, regex=False)
+    return values
+
+
+def _xes_timestamps(series: pd.Series) -> pd.Series:
+    """ISO 8601 like datetime.isoformat(): fractional seconds only when present, offset with a colon."""
+    tz = series.dt.tz
+    if tz is None or str(tz) == "UTC":
+        # numpy formats naive/UTC values far faster than strftime.
+        naive = series.dt.tz_convert(None) if tz is not None else series
+        text = pd.Series(np.datetime_as_string(naive.to_numpy(dtype="datetime64[s]"), unit="s"), index=series.index, dtype=object)
+    else:
+        text = series.dt.strftime("%Y-%m-%dT%H:%M:%S").astype(object)
+    micro = series.dt.microsecond
+    if (micro.fillna(0) != 0).any():
+        text = text.where(micro == 0, text + "." + micro.astype("Int64").astype(str).str.zfill(6))
+    if tz is not None and str(tz) == "UTC":
+        text = text + "+00:00"
+    elif tz is not None:
+        offset = series.dt.strftime("%z")
+        text = text + offset.str[:3] + ":" + offset.str[3:]
+    return text
+
+
+def _xes_attribute_lines(series: pd.Series, key: str, indent: str) -> pd.Series:
+    """One `<type key=... value=... />` line per row, or an empty string where the value is missing."""
+    present = series.notna()
+    # Object columns (e.g. booleans with gaps) are typed by their non-missing values.
+    inferred = pd.api.types.infer_dtype(series, skipna=True) if series.dtype == object else None
+    if key == "concept:name" or key.endswith(":concept:name"):
+        xes_type, values = "string", series.astype(str)
+    elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+        xes_type, values = "date", _xes_timestamps(series)
+    elif pd.api.types.is_bool_dtype(series.dtype) or inferred == "boolean":
+        xes_type, values = "boolean", series.astype(str).str.lower()
+    elif pd.api.types.is_integer_dtype(series.dtype) or inferred == "integer":
+        xes_type, values = "int", series.astype(str)
+    elif pd.api.types.is_float_dtype(series.dtype) or inferred in ("floating", "mixed-integer-float"):
+        xes_type, values = "float", series.astype(str)
+    else:
+        xes_type, values = "string", series.astype(str)
+    name = _xes_escape(pd.Series([key])).iloc[0]
+    lines = f'{indent}<{xes_type} key="{name}" value="' + _xes_escape(values.astype(object).where(present, "")) + '" />\n'
+    return lines.where(present, "").astype(object)
+
+
+@instrumented
+def write_xes_dataframe(event_log: object, file_path: str, chunk_cases: int = 20000) -> str:
+    """Stream the event DataFrame to XES (gzip when file_path ends in .gz), one block of cases at a time.
+
+    Events are grouped into traces by case in as_event_dataframe order; `case:` columns become
+    trace attributes taken from each case's first event. Attribute lines are rendered per column
+    with vectorized string operations, so no pm4py EventLog is built.
+    """
+    df = as_event_dataframe(event_log)
+    case_keys = [column for column in df.columns if column.startswith("case:")]
+    event_keys = [column for column in df.columns if not column.startswith("case:")]
+    prefixes = {key.split(":", 1)[0] for key in event_keys + [key[len("case:"):] for key in case_keys] if ":" in key}
+    case_codes = pd.factorize(df["case:concept:name"])[0] if len(df) else np.array([], dtype=np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(case_codes)) + 1]) if len(df) else np.array([], dtype=np.int64)
+    bounds = np.append(starts, len(df))
+    with _open_xes(file_path, "wt") as handle:
+        handle.write('<?xml version="1.0" encoding="utf-8" ?>\n')
+        handle.write(f'<log xes.version="1849-2016" xes.features="nested-attributes" xmlns="{XES_NAMESPACE}">\n')
+        for prefix, (name, uri) in XES_EXTENSIONS.items():
+            if prefix in prefixes:
+                handle.write(f'\t<extension name="{name}" prefix="{prefix}" uri="{uri}" />\n')
+        for first in range(0, len(starts), max(chunk_cases, 1)):
+            last = min(first + chunk_cases, len(starts))
+            block = df.iloc[bounds[first]:bounds[last]]
+            events = pd.Series("\t\t<event>\n", index=block.index, dtype=object)
+            for key in event_keys:
+                events = events + _xes_attribute_lines(block[key], key, "\t\t\t")
+            events = (events + "\t\t</event>\n").tolist()
+            heads = block.iloc[starts[first:last] - bounds[first]]
+            traces = pd.Series("\t<trace>\n", index=heads.index, dtype=object)
+            for key in case_keys:
+                traces = traces + _xes_attribute_lines(heads[key], key[len("case:"):], "\t\t")
+            offsets = bounds[first:last + 1] - bounds[first]
+            handle.write("".join(
+                head + "".join(events[offsets[i]:offsets[i + 1]]) + "\t</trace>\n"
+                for i, head in enumerate(traces.tolist())
+            ))
+        handle.write("</log>\n")
+    return file_path
+
+
+def export_xes(event_log: object, file_path: str, engine: str = "stream") -> str:
+    """Write XES with the streaming writer or, for engine="pm4py", pm4py.write_xes."""
+    if engine == "pm4py":
+        require_pm4py()
+        pm4py.write_xes(event_log, file_path)
+        return file_path
+    return write_xes_dataframe(event_log, file_path)
+
+
+EVENT_LOG_CACHE_VERSION = 2
+
+
+def event_log_cache_options(
+    log_format: str,
+    case_col: str,
+    activity_col: str,
+    timestamp_col: str,
+    resource_col: Optional[str] = None,
+    timestamp_format: Optional[str] = None,
+    timestamp_dayfirst: bool = False,
+    timestamp_utc: Optional[bool] = None,
+    timestamp_timezone: Optional[str] = None,
+    keep_columns: Optional[List[str]] = None,
+    xes_engine: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Parsing options that change the cached content; part of the cache key."""
+    options = {
+        "format": log_format.lower(),
+        "case": case_col,
+        "activity": activity_col,
+        "timestamp": timestamp_col,
+        "resource": resource_col,
+        "timestamp_format": timestamp_format,
+        "timestamp_dayfirst": bool(timestamp_dayfirst),
+        "timestamp_utc": bool(timestamp_utc),
+        "timestamp_timezone": timestamp_timezone,
+    }
+    if keep_columns is not None:
+        options["keep_columns"] = sorted(keep_columns)
+    if xes_engine is not None:
+        options["xes_engine"] = xes_engine
+    return options
+
+
+def event_log_cache_key(file_path: str, options: Dict[str, Any], cache_dir: str) -> str:
+    """Key a cached log by source content hash, parsing options, and cache layout version."""
+    payload = {
+        "version": EVENT_LOG_CACHE_VERSION,
+        "source_sha256": cached_file_hash(file_path, os.path.join(cache_dir, "hash_index.json")),
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def begin_columnar_cache(cache_dir: str) -> str:
+    """Create a private staging directory for a cache entry that is committed later."""
+    root = os.path.join(cache_dir, "event_logs")
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix=".tmp-", dir=root)
+
+
+def append_columnar_part(staging_dir: str, df: pd.DataFrame, part_index: int) -> Dict[str, Any]:
+    """Write one DataFrame part as one NumPy file per column, with object columns stored as int32 codes."""
+    part_name = f"part_{part_index:05d}"
+    os.makedirs(os.path.join(staging_dir, part_name))
+    columns = []
+    for idx, col in enumerate(df.columns):
+        series = df[col]
+        spec: Dict[str, Any] = {"name": col, "dtype": str(series.dtype), "file": f"{part_name}/col_{idx:04d}.npy"}
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            tz = getattr(series.dtype, "tz", None)
+            spec["kind"] = "datetime"
+            spec["tz"] = str(tz) if tz is not None else None
+            values = series.to_numpy() if tz is None else series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy()
+        elif isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+            spec["kind"] = "numeric"
+            values = series.to_numpy()
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            spec["kind"] = "codes"
+            spec["categories"] = [item.item() if hasattr(item, "item") else item for item in uniques.tolist()]
+            values = codes.astype(np.int32)
+        np.save(os.path.join(staging_dir, spec["file"]), values, allow_pickle=False)
+        columns.append(spec)
+    return {"rows": int(len(df)), "columns": columns}
+
+
+def commit_columnar_cache(staging_dir: str, cache_dir: str, key: str,
+                          parts: List[Dict[str, Any]], metadata: Dict[str, Any]) -> str:
+    """Publish a staged cache entry under its key and prune older entries for the same source."""
+    entry_dir = os.path.join(cache_dir, "event_logs", key)
+    meta = dict(metadata)
+    meta.update({
+        "version": EVENT_LOG_CACHE_VERSION,
+        "key": key,
+        "rows": int(sum(part["rows"] for part in parts)),
+        "parts": parts,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+    })
+    with open(os.path.join(staging_dir, "meta.json"), "w", encoding="utf-8") as handle:
+        json.dump(meta, handle, indent=2, sort_keys=True, default=str)
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(staging_dir, entry_dir)
+    prune_columnar_cache(cache_dir, metadata.get("source_path"), keep=key)
+    return entry_dir
+
+
+def write_columnar_cache(df: pd.DataFrame, cache_dir: str, key: str, metadata: Dict[str, Any]) -> str:
+    """Persist a DataFrame as a single-part cache entry."""
+    staging_dir = begin_columnar_cache(cache_dir)
+    try:
+        parts = [append_columnar_part(staging_dir, df, 0)]
+        return commit_columnar_cache(staging_dir, cache_dir, key, parts, metadata)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+
+def _read_columnar_part(entry_dir: str, part: Dict[str, Any]) -> pd.DataFrame:
+    data = {}
+    for spec in part["columns"]:
+        values = np.load(os.path.join(entry_dir, spec["file"]), mmap_mode="r", allow_pickle=False)
+        if spec["kind"] == "datetime":
+            series = pd.Series(np.array(values))
+            if spec.get("tz"):
+                series = series.dt.tz_localize("UTC").dt.tz_convert(spec["tz"])
+        elif spec["kind"] == "numeric":
+            series = pd.Series(np.array(values))
+        else:
+            categories = pd.Index(spec["categories"], dtype=object)
+            series = pd.Series(pd.Categorical.from_codes(np.array(values), categories=categories))
+            if spec["dtype"] != "category":
+                try:
+                    series = series.astype(spec["dtype"])
+                except (TypeError, ValueError):
+                    series = series.astype(object)
+        data[spec["name"]] = series
+    return pd.DataFrame(data, columns=[spec["name"] for spec in part["columns"]])
+
+
+def read_columnar_cache(cache_dir: str, key: str) -> Optional[pd.DataFrame]:
+    """Load a cached DataFrame by key, returning None on a miss or unreadable entry."""
+    entry_dir = os.path.join(cache_dir, "event_logs", key)
+    meta = load_json(os.path.join(entry_dir, "meta.json"))
+    if meta.get("version") != EVENT_LOG_CACHE_VERSION or meta.get("key") != key:
+        return None
+    try:
+        frames = [_read_columnar_part(entry_dir, part) for part in meta["parts"]]
+    except (OSError, KeyError, ValueError) as exc:
+        logging.warning("Ignoring unreadable event log cache entry %s: %s", key, exc)
+        return None
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def prune_columnar_cache(cache_dir: str, source_path: Optional[str], keep: str) -> None:
+    """Remove stale cache entries that were built from the same source path."""
+    root = os.path.join(cache_dir, "event_logs")
+    if not source_path or not os.path.isdir(root):
+        return
+    for name in os.listdir(root):
+        if name == keep or ".tmp-" in name:
+            continue
+        meta = load_json(os.path.join(root, name, "meta.json"))
+        if meta.get("source_path") == source_path:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+@instrumented
+def persist_parsed_timestamps(df: pd.DataFrame, csv_path: str, cache_dir: str,
+                              column: str = "time:timestamp") -> Optional[str]:
+    """Store the parsed timestamp column of a CSV this pipeline just wrote as int64 epoch values.
+
+    The entry is keyed by the CSV's content hash, so a later stage loading that CSV takes the
+    timestamps from here instead of parsing the strings again; any edit to the file misses.
+    """
+    if column not in df.columns or not pd.api.types.is_datetime64_any_dtype(df[column].dtype):
+        return None
+    series = df[column]
+    tz = series.dt.tz
+    values = (series.dt.tz_convert("UTC").dt.tz_localize(None) if tz is not None else series).to_numpy()
+    unit = np.datetime_data(values.dtype)[0]
+    digest = cached_file_hash(csv_path, os.path.join(cache_dir, "hash_index.json"))
+    root = os.path.join(cache_dir, "timestamps")
+    os.makedirs(root, exist_ok=True)
+    source_path = os.path.abspath(csv_path)
+    for name in os.listdir(root):
+        if name.endswith(".json") and name != f"{digest}.json" and load_json(os.path.join(root, name)).get("source_path") == source_path:
+            for stale in (name, name[:-len(".json")] + ".npy"):
+                try:
+                    os.remove(os.path.join(root, stale))
+                except OSError:
+                    pass
+    np.save(os.path.join(root, f"{digest}.npy"), values.view(np.int64), allow_pickle=False)
+    meta = {"source_path": source_path, "column": column, "rows": int(len(series)),
+            "unit": unit, "tz": str(tz) if tz is not None else None}
+    save_json(meta, os.path.join(root, f"{digest}.json"))
+    return os.path.join(root, f"{digest}.npy")
+
+
+def load_parsed_timestamps(csv_path: str, cache_dir: str) -> Optional[Tuple[str, pd.Series]]:
+    """Return (column, timestamps) persisted for this exact CSV content, or None."""
+    root = os.path.join(cache_dir, "timestamps")
+    if not os.path.isdir(root):
+        return None
+    digest = cached_file_hash(csv_path, os.path.join(cache_dir, "hash_index.json"))
+    meta = load_json(os.path.join(root, f"{digest}.json"))
+    if not meta:
+        return None
+    try:
+        values = np.load(os.path.join(root, f"{digest}.npy"), allow_pickle=False)
+    except (OSError, ValueError) as exc:
+        logging.warning("Ignoring unreadable parsed timestamps for %s: %s", csv_path, exc)
+        return None
+    if len(values) != meta.get("rows"):
+        return None
+    series = pd.Series(values.view(f"datetime64[{meta['unit']}]"))
+    if meta.get("tz"):
+        series = series.dt.tz_localize("UTC").dt.tz_convert(meta["tz"])
+    return meta["column"], series
+
+
+@instrumented
+def load_event_dataframe(
     file_path: str,
     log_format: str,
     case_col: str,
@@ -159,16 +674,91 @@ def load_event_log(
     timestamp_dayfirst: bool = False,
     timestamp_utc: Optional[bool] = None,
     timestamp_timezone: Optional[str] = None,
-) -> object:
-    """Load an event log from XES or CSV."""
+    cache_dir: Optional[str] = None,
+    xes_engine: str = "stream",
+) -> pd.DataFrame:
+    """Load a cleaned, sorted event DataFrame from XES or CSV, reusing the columnar cache when possible.
+
+    XES is read by read_xes_dataframe unless xes_engine is "pm4py" (pm4py importer plus conversion).
+    CSVs written by an earlier stage reuse the timestamps persisted by persist_parsed_timestamps.
+    """
     require_pm4py()
-    if log_format.lower() == "xes" and xes_importer is None:
+    log_format = log_format.lower()
+    if log_format == "xes" and xes_engine == "pm4py" and xes_importer is None:
         raise RuntimeError("PM4Py XES importer is unavailable in this environment.")
-    if log_format.lower() == "xes":
-        return xes_importer.apply(file_path)
+    key = None
+    if cache_dir:
+        options = event_log_cache_options(
+            log_format,
+            case_col,
+            activity_col,
+            timestamp_col,
+            resource_col=resource_col,
+            timestamp_format=timestamp_format,
+            timestamp_dayfirst=timestamp_dayfirst,
+            timestamp_utc=timestamp_utc,
+            timestamp_timezone=timestamp_timezone,
+            xes_engine=xes_engine if log_format == "xes" else None,
+        )
+        key = event_log_cache_key(file_path, options, cache_dir)
+        cached = read_columnar_cache(cache_dir, key)
+        if cached is not None:
+            logging.info("Loaded %s from event log cache %s", file_path, key[:12])
+            return cached
+
+    if log_format == "xes" and xes_engine == "pm4py":
+        df = log_to_dataframe(xes_importer.apply(file_path))
+    elif log_format == "xes":
+        df = read_xes_dataframe(file_path)
+    else:
+        df = load_csv_dataframe(
+            file_path,
+            case_col,
+            activity_col,
+            timestamp_col,
+            resource_col=resource_col,
+            timestamp_format=timestamp_format,
+            timestamp_dayfirst=timestamp_dayfirst,
+            timestamp_utc=timestamp_utc,
+            timestamp_timezone=timestamp_timezone,
+            parsed_timestamps=load_parsed_timestamps(file_path, cache_dir) if cache_dir else None,
+        )
+        df = df.dropna(subset=["case:concept:name", "concept:name", "time:timestamp"])
+        df = df.drop_duplicates()
+        df = sort_log_dataframe(df)
+    df = df.reset_index(drop=True)
+    if cache_dir and key:
+        try:
+            write_columnar_cache(df, cache_dir, key, {"source_path": os.path.abspath(file_path), "options": options})
+        except (OSError, TypeError, ValueError) as exc:
+            logging.warning("Unable to write event log cache for %s: %s", file_path, exc)
+    return df
 
-    df = load_csv_dataframe(
+
+@instrumented
+def load_event_log(
+    file_path: str,
+    log_format: str,
+    case_col: str,
+    activity_col: str,
+    timestamp_col: str,
+    resource_col: Optional[str] = None,
+    timestamp_format: Optional[str] = None,
+    timestamp_dayfirst: bool = False,
+    timestamp_utc: Optional[bool] = None,
+    timestamp_timezone: Optional[str] = None,
+    cache_dir: Optional[str] = None,
+    xes_engine: str = "stream",
+) -> pd.DataFrame:
+    """Load an event log from XES or CSV as a case-ordered event DataFrame.
+
+    Steps in this module take the DataFrame directly; only pm4py algorithms that need
+    trace objects convert it (see ensure_event_log).
+    """
+    require_pm4py()
+    df = load_event_dataframe(
         file_path,
+        log_format,
         case_col,
         activity_col,
         timestamp_col,
@@ -177,34 +767,646 @@ def load_event_log(
         timestamp_dayfirst=timestamp_dayfirst,
         timestamp_utc=timestamp_utc,
         timestamp_timezone=timestamp_timezone,
+        cache_dir=cache_dir,
+        xes_engine=xes_engine,
     )
-    df = df.dropna(subset=["case:concept:name", "concept:name", "time:timestamp"])
-    df = df.drop_duplicates()
-    df = sort_log_dataframe(df)
-    return convert_dataframe_to_event_log(df)
+    return as_event_dataframe(df)
+
+
+REQUIRED_EVENT_COLUMNS = ["case:concept:name", "concept:name", "time:timestamp"]
+
 
+def csv_column_plan(
+    case_col: str,
+    activity_col: str,
+    timestamp_col: str,
+    resource_col: Optional[str] = None,
+    keep_columns: Optional[List[str]] = None,
+) -> Tuple[Optional[List[str]], Dict[str, str]]:
+    """Columns to read (None keeps all) and explicit dtypes for chunked CSV parsing."""
+    usecols = None
+    if keep_columns is not None:
+        mapped = [col for col in (case_col, activity_col, timestamp_col, resource_col) if col]
+        usecols = list(dict.fromkeys(mapped + list(keep_columns)))
+    dtypes = {case_col: "str", activity_col: "category"}
+    if resource_col:
+        dtypes[resource_col] = "category"
+    return usecols, dtypes
 
+
+def iter_csv_chunks(
+    file_path: str,
+    case_col: str,
+    activity_col: str,
+    timestamp_col: str,
+    resource_col: Optional[str] = None,
+    timestamp_format: Optional[str] = None,
+    timestamp_dayfirst: bool = False,
+    timestamp_utc: Optional[bool] = None,
+    timestamp_timezone: Optional[str] = None,
+    keep_columns: Optional[List[str]] = None,
+    chunk_rows: int = 500_000,
+    max_memory_mb: Optional[float] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield renamed, timestamp-normalised CSV chunks, halving the chunk size when RSS exceeds the ceiling."""
+    usecols, dtypes = csv_column_plan(case_col, activity_col, timestamp_col, resource_col, keep_columns)
+    rename_map = {case_col: "case:concept:name", activity_col: "concept:name", timestamp_col: "time:timestamp"}
+    if resource_col:
+        rename_map[resource_col] = "org:resource"
+    rows = max(int(chunk_rows), 1)
+    reader = pd.read_csv(file_path, usecols=usecols, dtype=dtypes, iterator=True)
+    try:
+        while True:
+            try:
+                chunk = reader.get_chunk(rows)
+            except StopIteration:
+                break
+            chunk = chunk.rename(columns=rename_map)
+            if "time:timestamp" in chunk.columns:
+                raw_present = chunk["time:timestamp"].notna()
+                if not timestamp_format and pd.api.types.is_string_dtype(chunk["time:timestamp"].dtype):
+                    # Infer once from the first chunk so every chunk is parsed the same way.
+                    timestamp_format = infer_timestamp_format(chunk["time:timestamp"], dayfirst=timestamp_dayfirst)
+                chunk["time:timestamp"] = normalize_timestamps(
+                    chunk["time:timestamp"],
+                    timestamp_format=timestamp_format,
+                    dayfirst=timestamp_dayfirst,
+                    utc=timestamp_utc,
+                    timezone=timestamp_timezone,
+                )
+                if stats is not None:
+                    stats["timestamp_parse_failures"] = stats.get("timestamp_parse_failures", 0) + int(
+                        (raw_present & chunk["time:timestamp"].isna()).sum()
+                    )
+            if stats is not None:
+                stats["rows_read"] = stats.get("rows_read", 0) + int(len(chunk))
+            yield chunk
+            rss = current_rss_mb() if max_memory_mb else None
+            if rss is not None:
+                if stats is not None:
+                    stats["peak_rss_mb"] = max(stats.get("peak_rss_mb", 0.0), rss)
+                if rss > max_memory_mb and rows > 1000:
+                    rows = max(1000, rows // 2)
+                    logging.warning("RSS %.0f MB exceeds %.0f MB ceiling; reducing chunk size to %d rows", rss, max_memory_mb, rows)
+    finally:
+        reader.close()
+
+
+def estimate_stream_plan(file_path: str, max_memory_mb: float, sample_rows: int = 10_000) -> Dict[str, int]:
+    """Size chunks and case partitions so one chunk plus one merged partition fit the memory ceiling."""
+    sample = pd.read_csv(file_path, nrows=sample_rows)
+    if sample.empty:
+        return {"chunk_rows": sample_rows, "partitions": 1, "estimated_rows": 0}
+    memory_per_row = max(float(sample.memory_usage(deep=True).sum()) / len(sample), 1.0)
+    with open(file_path, "rb") as handle:
+        handle.readline()
+        disk_bytes = sum(len(handle.readline()) for _ in range(len(sample)))
+    disk_per_row = max(disk_bytes / len(sample), 1.0)
+    estimated_rows = os.path.getsize(file_path) / disk_per_row
+    budget = max_memory_mb * 1024 * 1024
+    chunk_rows = int(min(max(budget * 0.2 / memory_per_row, 1000), 5_000_000))
+    # Concatenating, de-duplicating and sorting a partition needs roughly three copies of it.
+    partitions = int(max(1, np.ceil(estimated_rows * memory_per_row * 3 / (budget * 0.5))))
+    return {"chunk_rows": chunk_rows, "partitions": partitions, "estimated_rows": int(estimated_rows)}
+
+
+def spill_case_partitions(chunks: Iterable[pd.DataFrame], spill_dir: str, partitions: int) -> List[List[str]]:
+    """Hash-partition chunks by case id and spill each slice as a sorted run file."""
+    runs: List[List[str]] = [[] for _ in range(partitions)]
+    for chunk_idx, chunk in enumerate(chunks):
+        chunk = chunk.dropna(subset=[col for col in REQUIRED_EVENT_COLUMNS if col in chunk.columns])
+        if chunk.empty:
+            continue
+        part_ids = pd.util.hash_pandas_object(chunk["case:concept:name"], index=False).to_numpy() % partitions
+        for part_id, part in chunk.groupby(part_ids, sort=False):
+            run_path = os.path.join(spill_dir, f"run_{int(part_id):05d}_{chunk_idx:06d}.pkl")
+            part.sort_values(["case:concept:name", "time:timestamp"], kind="stable").to_pickle(run_path)
+            runs[int(part_id)].append(run_path)
+    return runs
+
+
+def merge_case_partitions(runs: List[List[str]]) -> Iterator[pd.DataFrame]:
+    """Merge the sorted runs of each partition into one de-duplicated, case/time ordered frame."""
+    for paths in runs:
+        if not paths:
+            continue
+        df = pd.concat([pd.read_pickle(path) for path in paths], ignore_index=True)
+        for path in paths:
+            os.remove(path)
+        df = df.drop_duplicates()
+        yield df.sort_values(["case:concept:name", "time:timestamp"], kind="stable").reset_index(drop=True)
+
+
+def stream_event_partitions(
+    chunks: Iterable[pd.DataFrame],
+    cache_dir: str,
+    partitions: int,
+    csv_output: Optional[str] = None,
+    sample_rows: int = 50,
+) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any], pd.DataFrame]:
+    """Spill chunks to case partitions and stage each merged partition as a cache part.
+
+    Returns the staging directory (commit it with commit_columnar_cache), the part
+    descriptors, a profile of the merged data, and the first rows as a sample.
+    """
+    spill_dir = tempfile.mkdtemp(prefix="spill-", dir=cache_dir)
+    staging_dir = begin_columnar_cache(cache_dir)
+    parts: List[Dict[str, Any]] = []
+    profile: Dict[str, Any] = {"row_count": 0, "partitions": int(partitions)}
+    missing_counts: Dict[str, int] = {}
+    duplicates = 0
+    sample = pd.DataFrame()
+    try:
+        runs = spill_case_partitions(chunks, spill_dir, partitions)
+        for idx, part in enumerate(merge_case_partitions(runs)):
+            parts.append(append_columnar_part(staging_dir, part, idx))
+            if csv_output:
+                part.to_csv(csv_output, mode="w" if idx == 0 else "a", header=idx == 0, index=False)
+            if idx == 0:
+                sample = part.head(sample_rows)
+                profile["columns"] = list(part.columns)
+                profile["dtypes"] = {col: str(dtype) for col, dtype in part.dtypes.items()}
+            profile["row_count"] += int(len(part))
+            for col, count in part.isna().sum().items():
+                missing_counts[col] = missing_counts.get(col, 0) + int(count)
+            duplicates += int(part.duplicated().sum())
+            rss = current_rss_mb()
+            if rss is not None:
+                profile["peak_rss_mb"] = max(profile.get("peak_rss_mb", 0.0), rss)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+    rows = max(profile["row_count"], 1)
+    profile["column_count"] = len(profile.get("columns", []))
+    profile["missing_rates"] = {col: count / rows for col, count in missing_counts.items()}
+    profile["duplicate_rate"] = duplicates / rows
+    return staging_dir, parts, profile, sample
+
+
+@instrumented
+def stream_csv_to_cache(
+    file_path: str,
+    case_col: str,
+    activity_col: str,
+    timestamp_col: str,
+    cache_dir: str,
+    resource_col: Optional[str] = None,
+    timestamp_format: Optional[str] = None,
+    timestamp_dayfirst: bool = False,
+    timestamp_utc: Optional[bool] = None,
+    timestamp_timezone: Optional[str] = None,
+    keep_columns: Optional[List[str]] = None,
+    chunk_rows: Optional[int] = None,
+    max_memory_mb: Optional[float] = None,
+    csv_output: Optional[str] = None,
+) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """Ingest a CSV into the columnar cache without holding the raw file in memory."""
+    if max_memory_mb:
+        plan = estimate_stream_plan(file_path, max_memory_mb)
+    else:
+        plan = {"chunk_rows": 500_000, "partitions": int(max(1, np.ceil(os.path.getsize(file_path) / (512 * 1024 * 1024))))}
+    if chunk_rows:
+        plan["chunk_rows"] = int(chunk_rows)
+    options = event_log_cache_options(
+        "csv",
+        case_col,
+        activity_col,
+        timestamp_col,
+        resource_col=resource_col,
+        timestamp_format=timestamp_format,
+        timestamp_dayfirst=timestamp_dayfirst,
+        timestamp_utc=timestamp_utc,
+        timestamp_timezone=timestamp_timezone,
+        keep_columns=keep_columns,
+    )
+    key = event_log_cache_key(file_path, options, cache_dir)
+    read_stats: Dict[str, Any] = {}
+    chunks = iter_csv_chunks(
+        file_path,
+        case_col,
+        activity_col,
+        timestamp_col,
+        resource_col=resource_col,
+        timestamp_format=timestamp_format,
+        timestamp_dayfirst=timestamp_dayfirst,
+        timestamp_utc=timestamp_utc,
+        timestamp_timezone=timestamp_timezone,
+        keep_columns=keep_columns,
+        chunk_rows=plan["chunk_rows"],
+        max_memory_mb=max_memory_mb,
+        stats=read_stats,
+    )
+    staging_dir, parts, profile, sample = stream_event_partitions(chunks, cache_dir, plan["partitions"], csv_output=csv_output)
+    entry_dir = commit_columnar_cache(
+        staging_dir, cache_dir, key, parts, {"source_path": os.path.abspath(file_path), "options": options}
+    )
+    rows_read = max(read_stats.get("rows_read", 0), 1)
+    profile.update({
+        "rows_read": read_stats.get("rows_read", 0),
+        "timestamp_parse_failure_rate": read_stats.get("timestamp_parse_failures", 0) / rows_read,
+        "chunk_rows": plan["chunk_rows"],
+        "max_memory_mb": max_memory_mb,
+        "cache_key": key,
+        "cache_entry": entry_dir,
+    })
+    if read_stats.get("peak_rss_mb"):
+        profile["peak_rss_mb"] = max(profile.get("peak_rss_mb", 0.0), read_stats["peak_rss_mb"])
+    return profile, sample
+
+
+STREAM_STATE_VERSION = 1
+STREAM_MODES = ("offset", "watermark")
+
+
+class _CsvSlice(io.RawIOBase):
+    """Read-only view of a CSV header followed by the bytes [start, end) of the same file."""
+
+    def __init__(self, file_path: str, header: bytes, start: int, end: int):
+        super().__init__()
+        self._handle = open(file_path, "rb")
+        self._handle.seek(start)
+        self._pending = header
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if self._pending:
+            size = min(len(buffer), len(self._pending))
+            buffer[:size] = self._pending[:size]
+            self._pending = self._pending[size:]
+            return size
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._handle.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._handle.close()
+        super().close()
+
+
+def _complete_lines_end(file_path: str, size: int) -> int:
+    """Offset just past the last newline before `size`, so a partially written row is left for the next run."""
+    with open(file_path, "rb") as handle:
+        position = size
+        while position > 0:
+            start = max(0, position - 65536)
+            handle.seek(start)
+            found = handle.read(position - start).rfind(b"\n")
+            if found >= 0:
+                return start + found + 1
+            position = start
+    return 0
+
+
+def _head_digest(file_path: str, length: int) -> str:
+    with open(file_path, "rb") as handle:
+        return hashlib.sha256(handle.read(length)).hexdigest()
+
+
+def empty_stream_state() -> Dict[str, Any]:
+    return {
+        "version": STREAM_STATE_VERSION,
+        "source": {},
+        "events": 0,
+        "watermark": None,
+        "activity_counts": {},
+        "directly_follows": {},
+        "handovers": {},
+        "start_activities": {},
+        "end_activities": {},
+        "variants": {},
+        "open_cases": {},
+        "case_starts": np.array([], dtype=float),
+        "closed_durations": np.array([], dtype=float),
+    }
+
+
+def load_stream_state(state_dir: str) -> Dict[str, Any]:
+    """Load persisted sliding-window aggregates, or an empty state when none exist yet."""
+    meta = load_json(os.path.join(state_dir, "aggregates.json"))
+    if meta.get("version") != STREAM_STATE_VERSION:
+        return empty_stream_state()
+    state = dict(meta)
+    for key in ("directly_follows", "handovers"):
+        state[key] = {(src, dst): count for src, dst, count in meta[key]}
+    state["variants"] = {tuple(activities): count for activities, count in meta["variants"]}
+    with np.load(os.path.join(state_dir, "aggregates.npz"), allow_pickle=False) as arrays:
+        state["case_starts"] = arrays["case_starts"]
+        state["closed_durations"] = arrays["closed_durations"]
+    return state
+
+
+def save_stream_state(state: Dict[str, Any], state_dir: str) -> None:
+    """Persist aggregates; the JSON is replaced last, so an interrupted save keeps the previous state."""
+    os.makedirs(state_dir, exist_ok=True)
+    meta = dict(state)
+    for key in ("directly_follows", "handovers"):
+        meta[key] = [[src, dst, count] for (src, dst), count in state[key].items()]
+    meta["variants"] = [[list(activities), count] for activities, count in state["variants"].items()]
+    arrays_path = os.path.join(state_dir, "aggregates.npz")
+    with open(arrays_path + ".tmp", "wb") as handle:
+        np.savez(handle, case_starts=meta.pop("case_starts"), closed_durations=meta.pop("closed_durations"))
+    os.replace(arrays_path + ".tmp", arrays_path)
+    save_json(meta, os.path.join(state_dir, "aggregates.json.tmp"))
+    os.replace(os.path.join(state_dir, "aggregates.json.tmp"), os.path.join(state_dir, "aggregates.json"))
+
+
+def read_appended_chunks(
+    file_path: str,
+    state: Dict[str, Any],
+    case_col: str,
+    activity_col: str,
+    timestamp_col: str,
+    mode: str = "offset",
+    resource_col: Optional[str] = None,
+    timestamp_format: Optional[str] = None,
+    timestamp_dayfirst: bool = False,
+    timestamp_utc: Optional[bool] = None,
+    timestamp_timezone: Optional[str] = None,
+    chunk_rows: int = 500_000,
+) -> Tuple[Iterator[pd.DataFrame], Dict[str, Any]]:
+    """Chunks of events added since the last refresh, plus the source position to store once they are applied.
+
+    "offset" parses only the bytes appended after the stored file offset and fails when the
+    already-read prefix changed. "watermark" re-reads the file but keeps only events newer
+    than the stored timestamp watermark (events at exactly the watermark are not re-read).
+    """
+    if mode not in STREAM_MODES:
+        raise ValueError(f"Unknown stream mode: {mode}")
+    source = dict(state.get("source", {}))
+    kwargs = dict(
+        resource_col=resource_col,
+        timestamp_format=timestamp_format,
+        timestamp_dayfirst=timestamp_dayfirst,
+        timestamp_utc=timestamp_utc,
+        timestamp_timezone=timestamp_timezone,
+        chunk_rows=chunk_rows,
+    )
+    if mode == "watermark":
+        watermark = state.get("watermark")
+
+        def newer_chunks() -> Iterator[pd.DataFrame]:
+            for chunk in iter_csv_chunks(file_path, case_col, activity_col, timestamp_col, **kwargs):
+                if watermark is not None:
+                    epochs = _epoch_seconds(chunk["time:timestamp"])
+                    chunk = chunk[epochs > watermark]
+                yield chunk
+
+        source.update({"path": os.path.abspath(file_path), "mode": mode})
+        return newer_chunks(), source
+
+    offset = int(source.get("offset", 0))
+    if offset:
+        if os.path.getsize(file_path) < offset or _head_digest(file_path, offset) != source.get("head_sha256"):
+            raise ValueError(
+                f"{file_path} no longer starts with the previously ingested data; "
+                "remove the stream state directory to rebuild the aggregates from scratch."
+            )
+    end = _complete_lines_end(file_path, os.path.getsize(file_path))
+    source.update({"path": os.path.abspath(file_path), "mode": mode, "offset": max(end, offset)})
+    source["head_sha256"] = _head_digest(file_path, source["offset"])
+    if end <= offset:
+        return iter(()), source
+    header = b""
+    if offset:
+        with open(file_path, "rb") as handle:
+            header = handle.readline()
+
+    def appended_chunks() -> Iterator[pd.DataFrame]:
+        with io.BufferedReader(_CsvSlice(file_path, header, offset, end)) as handle:
+            yield from iter_csv_chunks(handle, case_col, activity_col, timestamp_col, **kwargs)
+
+    return appended_chunks(), source
+
+
+def _epoch_seconds(series: pd.Series) -> np.ndarray:
+    """Float seconds since the epoch (NaN for NaT); tz-aware values are taken in UTC."""
+    series = pd.to_datetime(series)
+    if series.dt.tz is not None:
+        series = series.dt.tz_convert(None)
+    return ((series - pd.Timestamp(0)) / pd.Timedelta(seconds=1)).to_numpy(dtype=float, na_value=np.nan)
+
+
+def _add_counts(target: Dict[Any, int], counts: pd.Series) -> None:
+    for key, count in counts.items():
+        target[key] = target.get(key, 0) + int(count)
+
+
+@instrumented
+def update_stream_aggregates(state: Dict[str, Any], chunk: pd.DataFrame) -> Dict[str, Any]:
+    """Fold a chunk of new events into the running aggregates (cases stay open until closed)."""
+    chunk = chunk.dropna(subset=REQUIRED_EVENT_COLUMNS)
+    if chunk.empty:
+        return state
+    epochs = _epoch_seconds(chunk["time:timestamp"])
+    frame = pd.DataFrame({
+        "case": chunk["case:concept:name"].astype(str).to_numpy(),
+        "activity": chunk["concept:name"].astype(str).to_numpy(),
+        "time": epochs,
+    })
+    has_resource = "org:resource" in chunk.columns
+    if has_resource:
+        frame["resource"] = chunk["org:resource"].astype(str).where(chunk["org:resource"].notna(), None).to_numpy()
+    frame = frame.sort_values(["case", "time"], kind="stable").reset_index(drop=True)
+    open_cases = state["open_cases"]
+    state["events"] += int(len(frame))
+    _add_counts(state["activity_counts"], frame["activity"].value_counts())
+
+    # Directly-follows and handover pairs: within the chunk via shift, across refreshes via the open case's last event.
+    grouped = frame.groupby("case", sort=False)
+    first_rows = ~frame["case"].duplicated()
+    known = frame["case"].map(lambda case: case in open_cases)
+    prev_activity = grouped["activity"].shift(1)
+    prev_activity[first_rows & known] = frame.loc[first_rows & known, "case"].map(lambda case: open_cases[case]["trace"][-1])
+    pairs = pd.DataFrame({"src": prev_activity, "dst": frame["activity"]}).dropna()
+    _add_counts(state["directly_follows"], pairs.groupby(["src", "dst"]).size())
+    if has_resource:
+        prev_resource = grouped["resource"].shift(1)
+        prev_resource[first_rows & known] = frame.loc[first_rows & known, "case"].map(
+            lambda case: open_cases[case].get("last_resource")
+        )
+        handovers = pd.DataFrame({"src": prev_resource, "dst": frame["resource"]}).dropna()
+        handovers = handovers[handovers["src"] != handovers["dst"]]
+        _add_counts(state["handovers"], handovers.groupby(["src", "dst"]).size())
+
+    summary = grouped.agg(start=("time", "first"), last=("time", "last"), trace=("activity", list))
+    if has_resource:
+        summary["last_resource"] = grouped["resource"].last()
+    new_starts = []
+    for case, row in summary.iterrows():
+        entry = open_cases.get(case)
+        if entry is None:
+            open_cases[case] = {"start": row["start"], "last": row["last"], "trace": row["trace"]}
+            new_starts.append(row["start"])
+            activity = row["trace"][0]
+            state["start_activities"][activity] = state["start_activities"].get(activity, 0) + 1
+        else:
+            entry["last"] = max(entry["last"], row["last"])
+            entry["trace"].extend(row["trace"])
+        if has_resource:
+            open_cases[case]["last_resource"] = row["last_resource"]
+    state["case_starts"] = np.concatenate([state["case_starts"], np.asarray(new_starts, dtype=float)])
+    latest = float(np.nanmax(epochs))
+    state["watermark"] = latest if state["watermark"] is None else max(state["watermark"], latest)
+    return state
+
+
+@instrumented
+def close_stream_cases(state: Dict[str, Any], closing_activities: Optional[List[str]] = None,
+                       case_timeout_hours: Optional[float] = None) -> int:
+    """Close cases that ended on a closing activity or went quiet for case_timeout_hours before the watermark.
+
+    Closed cases contribute to variants, end activities and case durations and are dropped
+    from the open set; later events with the same case id start a new case.
+    """
+    closing = set(closing_activities or [])
+    cutoff = None
+    if case_timeout_hours is not None and state["watermark"] is not None:
+        cutoff = state["watermark"] - case_timeout_hours * 3600.0
+    closed = [
+        case for case, entry in state["open_cases"].items()
+        if entry["trace"][-1] in closing or (cutoff is not None and entry["last"] <= cutoff)
+    ]
+    durations = []
+    for case in closed:
+        entry = state["open_cases"].pop(case)
+        variant = tuple(entry["trace"])
+        state["variants"][variant] = state["variants"].get(variant, 0) + 1
+        state["end_activities"][variant[-1]] = state["end_activities"].get(variant[-1], 0) + 1
+        durations.append((entry["last"] - entry["start"]) / 3600.0)
+    state["closed_durations"] = np.concatenate([state["closed_durations"], np.asarray(durations, dtype=float)])
+    return len(closed)
+
+
+def stream_summary(state: Dict[str, Any]) -> Dict[str, Any]:
+    """summary_stats.json payload computed from the aggregates alone."""
+    starts = np.sort(state["case_starts"])
+    inter_arrivals = np.diff(starts) / 3600.0
+    arrival_metrics: Dict[str, float] = {"mean_interarrival_hours": float("nan")}
+    if len(inter_arrivals):
+        arrival_metrics = {
+            "mean_interarrival_hours": float(inter_arrivals.mean()),
+            "median_interarrival_hours": float(np.median(inter_arrivals)),
+        }
+    durations = state["closed_durations"]
+    duration_stats: Dict[str, float] = {}
+    if len(durations):
+        duration_stats = {
+            "mean_hours": float(durations.mean()),
+            "median_hours": float(np.median(durations)),
+            "p95_hours": float(np.quantile(durations, 0.95)),
+            "max_hours": float(durations.max()),
+        }
+    return {
+        "stats": {
+            "num_events": int(state["events"]),
+            "num_cases": int(len(starts)),
+            "num_variants": int(len(state["variants"])),
+        },
+        "arrival_metrics": arrival_metrics,
+        "start_end": {
+            "start_activities": dict(state["start_activities"]),
+            "end_activities": dict(state["end_activities"]),
+        },
+        "open_cases": int(len(state["open_cases"])),
+        "closed_cases": int(len(durations)),
+        "duration_stats": duration_stats,
+        "watermark": (
+            pd.Timestamp(state["watermark"], unit="s", tz="UTC").isoformat() if state["watermark"] is not None else None
+        ),
+    }
+
+
+def write_stream_outputs(state: Dict[str, Any], output_dir: str) -> Dict[str, str]:
+    """Write the aggregate tables that the full pipeline would otherwise derive from the raw log."""
+    artifacts = {
+        "activity_frequency": os.path.join(output_dir, "activity_frequency.csv"),
+        "directly_follows": os.path.join(output_dir, "directly_follows.csv"),
+        "variant_counts": os.path.join(output_dir, "variant_counts.csv"),
+        "org_handover": os.path.join(output_dir, "handover_of_work.csv"),
+    }
+    activity = pd.Series(state["activity_counts"], dtype="int64").sort_values(ascending=False)
+    activity.rename_axis("concept:name").to_csv(artifacts["activity_frequency"], header=["count"])
+    pd.DataFrame(
+        [(src, dst, count) for (src, dst), count in state["directly_follows"].items()], columns=["from", "to", "count"]
+    ).sort_values("count", ascending=False).to_csv(artifacts["directly_follows"], index=False)
+    variants = pd.DataFrame(
+        sorted(((count, activities) for activities, count in state["variants"].items()), reverse=True),
+        columns=["count", "activities"],
+    )
+    variants = pd.DataFrame({"variant": variants["activities"].map(str), "count": variants["count"]})
+    variants["percent"] = variants["count"] / max(variants["count"].sum(), 1) * 100
+    variants["cum_percent"] = variants["percent"].cumsum()
+    variants.to_csv(artifacts["variant_counts"], index=False)
+    pd.DataFrame(
+        [(src, dst, count) for (src, dst), count in state["handovers"].items()], columns=["from", "to", "count"]
+    ).sort_values("count", ascending=False).to_csv(artifacts["org_handover"], index=False)
+    return artifacts
+
+
+@instrumented
 def clean_event_log(event_log: object) -> object:
     """Placeholder for log cleaning; currently returns log unchanged."""
     return event_log
 
 
 def check_case_order(df: pd.DataFrame) -> Tuple[float, int]:
+    """Share of cases whose timestamps decrease in row order; cases with missing timestamps are skipped."""
     if df.empty:
         return 0.0, 0
-    unsorted_cases = 0
-    total_cases = 0
-    for _, group in df.groupby("case:concept:name"):
-        total_cases += 1
-        if group["time:timestamp"].isna().any():
-            continue
-        if not group["time:timestamp"].is_monotonic_increasing:
-            unsorted_cases += 1
+    codes, uniques = pd.factorize(df["case:concept:name"])
+    total_cases = len(uniques)
     if total_cases == 0:
         return 0.0, 0
+    valid = codes >= 0
+    case_codes = codes[valid]
+    timestamps = df["time:timestamp"][valid].reset_index(drop=True)
+    previous = timestamps.groupby(case_codes, sort=False).shift()
+    decreasing = (timestamps < previous).to_numpy(dtype=bool)
+    unsorted = np.zeros(total_cases, dtype=bool)
+    unsorted[case_codes[decreasing]] = True
+    skipped = np.zeros(total_cases, dtype=bool)
+    skipped[case_codes[timestamps.isna().to_numpy()]] = True
+    unsorted_cases = int((unsorted & ~skipped).sum())
     return unsorted_cases / total_cases, unsorted_cases
 
 
+def impute_timestamps(df: pd.DataFrame, strategy: str) -> pd.Series:
+    """Fill missing timestamps with the per-activity median/mean, then the overall one."""
+    if strategy not in ("median", "mean"):
+        raise ValueError(f"Unsupported timestamp_impute_strategy: {strategy}")
+    activity_fill = df.groupby("concept:name")["time:timestamp"].transform(strategy)
+    filled = df["time:timestamp"].fillna(activity_fill)
+    return filled.fillna(getattr(filled, strategy)())
+
+
+def mask_column_values(series: pd.Series, column: str, strategy: str, salt: str = "") -> pd.Series:
+    """Mask a column by transforming its distinct values once and broadcasting back through codes."""
+    if strategy == "redact":
+        return pd.Series("***", index=series.index)
+    values = series.astype(str)
+    if strategy == "tokenize":
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        masked = np.array([f"{column}_{idx}" for idx in range(len(uniques))], dtype=object)
+        return pd.Series(masked.take(codes), index=series.index, dtype=object)
+    codes, uniques = pd.factorize(values)
+    masked = np.array(
+        [hashlib.sha256((salt + value).encode("utf-8")).hexdigest() for value in uniques] + [np.nan],
+        dtype=object,
+    )
+    return pd.Series(masked.take(codes), index=series.index, dtype=object)
+
+
+@instrumented
 def run_data_quality_checks(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[pd.DataFrame, Dict[str, Any], Dict[str, Any]]:
     required = ["case:concept:name", "concept:name", "time:timestamp"]
     missing_columns = [col for col in required if col not in df.columns]
@@ -254,24 +1456,7 @@ def run_data_quality_checks(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[p
         else:
             if not impute_missing_timestamps:
                 raise ValueError("Missing timestamps exceed threshold; enable imputation or clean upstream data.")
-            if impute_strategy == "median":
-                medians = df.groupby("concept:name")["time:timestamp"].median()
-                df["time:timestamp"] = df.apply(
-                    lambda row: medians.get(row["concept:name"], pd.NaT) if pd.isna(row["time:timestamp"]) else row["time:timestamp"],
-                    axis=1,
-                )
-                overall_median = df["time:timestamp"].median()
-                df["time:timestamp"] = df["time:timestamp"].fillna(overall_median)
-            elif impute_strategy == "mean":
-                means = df.groupby("concept:name")["time:timestamp"].mean()
-                df["time:timestamp"] = df.apply(
-                    lambda row: means.get(row["concept:name"], pd.NaT) if pd.isna(row["time:timestamp"]) else row["time:timestamp"],
-                    axis=1,
-                )
-                overall_mean = df["time:timestamp"].mean()
-                df["time:timestamp"] = df["time:timestamp"].fillna(overall_mean)
-            else:
-                raise ValueError(f"Unsupported timestamp_impute_strategy: {impute_strategy}")
+            df["time:timestamp"] = impute_timestamps(df, impute_strategy)
             recommendations["timestamp_imputation"] = impute_strategy
 
     dedupe_keys = config.get("dedupe_keys") or ["case:concept:name", "concept:name", "time:timestamp"]
@@ -296,15 +1481,7 @@ def run_data_quality_checks(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[p
         ]
         if sensitive_cols:
             for col in sensitive_cols:
-                if mask_strategy == "redact":
-                    df[col] = "***"
-                elif mask_strategy == "tokenize":
-                    tokens = {value: f"{col}_{idx}" for idx, value in enumerate(df[col].astype(str).unique())}
-                    df[col] = df[col].astype(str).map(tokens)
-                else:
-                    df[col] = df[col].astype(str).apply(
-                        lambda value: hashlib.sha256((mask_salt + value).encode("utf-8")).hexdigest()
-                    )
+                df[col] = mask_column_values(df[col], col, mask_strategy, mask_salt)
             recommendations["masked_sensitive_columns"] = sensitive_cols
             recommendations["mask_strategy"] = mask_strategy
 
@@ -357,6 +1534,7 @@ def run_data_quality_checks(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[p
     return df, quality, recommendations
 
 
+@instrumented
 def apply_filters(event_log: object,
                   start_activities: Optional[List[str]] = None,
                   end_activities: Optional[List[str]] = None) -> object:
@@ -369,166 +1547,880 @@ def apply_filters(event_log: object,
     return event_log
 
 
-def compute_statistics(event_log: object) -> Dict[str, int]:
+VARIANT_INDEX_VERSION = 1
+
+
+@instrumented
+def build_variant_index(event_log: object) -> Dict[str, Any]:
+    """Integer-coded variant index: variant id per case, case count and activity sequence per variant."""
+    df = as_event_dataframe(event_log)
+    if df.empty:
+        return _empty_variant_index()
+    activity_codes, activities = pd.factorize(df["concept:name"])
+    case_codes, case_ids = pd.factorize(df["case:concept:name"])
+    return _variant_index_from_codes(case_codes, case_ids, activity_codes, activities)
+
+
+def _empty_variant_index() -> Dict[str, Any]:
+    return {
+        "case_ids": np.array([], dtype=str),
+        "case_variant": np.array([], dtype=np.int32),
+        "counts": np.array([], dtype=np.int64),
+        "activities": np.array([], dtype=str),
+        "sequence_offsets": np.zeros(1, dtype=np.int64),
+        "sequence_codes": np.array([], dtype=np.int32),
+    }
+
+
+def _variant_index_from_codes(case_codes: np.ndarray, case_ids: pd.Index,
+                              activity_codes: np.ndarray, activities: pd.Index) -> Dict[str, Any]:
+    """Variant index over contiguous, time-ordered case codes; codes may skip cases that were filtered out."""
+    if len(case_codes) == 0:
+        return _empty_variant_index()
+    # as_event_dataframe keeps each case contiguous, so cases split at code changes.
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(case_codes)) + 1])
+    case_ids = case_ids[case_codes[starts]]
+    # Renumber activities by first appearance among the remaining events, as factorize would on the filtered log.
+    activity_codes, used = pd.factorize(activity_codes)
+    activities = activities[used]
+    codes = activity_codes.astype(np.int32)
+    case_lengths = np.diff(np.append(starts, len(codes)))
+    # Cases of equal length stack into a matrix whose distinct rows are the variants of that length.
+    trace_keys = np.empty(len(starts), dtype=np.int64)
+    next_key = 0
+    for length in np.unique(case_lengths):
+        members = np.flatnonzero(case_lengths == length)
+        rows = codes[starts[members, None] + np.arange(length)]
+        # Equal-length rows viewed as fixed-width bytes hash in one factorize call.
+        local, _ = pd.factorize(rows.view(f"S{rows.shape[1] * rows.itemsize}").ravel())
+        trace_keys[members] = local + next_key
+        next_key += int(local.max()) + 1
+    case_variant, _ = pd.factorize(trace_keys)
+    _, first_cases, counts = np.unique(case_variant, return_index=True, return_counts=True)
+    lengths = case_lengths[first_cases].astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    gather = np.repeat(starts[first_cases] - offsets[:-1], lengths) + np.arange(offsets[-1])
+    return {
+        "case_ids": np.asarray(case_ids.to_numpy(dtype=str) if case_ids.dtype.kind in "OSUT" else case_ids.to_numpy()),
+        "case_variant": case_variant.astype(np.int32),
+        "counts": counts.astype(np.int64),
+        "activities": np.asarray(activities.astype(str), dtype=str),
+        "sequence_offsets": offsets,
+        "sequence_codes": codes[gather],
+    }
+
+
+def variant_activities(variant_index: Dict[str, Any], variant_id: int) -> Tuple[str, ...]:
+    offsets = variant_index["sequence_offsets"]
+    codes = variant_index["sequence_codes"][offsets[variant_id]:offsets[variant_id + 1]]
+    return tuple(str(activity) for activity in variant_index["activities"][codes])
+
+
+def variant_frequency_table(variant_index: Dict[str, Any]) -> pd.DataFrame:
+    """Variants ordered like PM4Py: by case count, then by activity sequence, both descending."""
+    variants = [variant_activities(variant_index, idx) for idx in range(len(variant_index["counts"]))]
+    order = sorted(range(len(variants)), key=lambda idx: (int(variant_index["counts"][idx]), variants[idx]), reverse=True)
+    return pd.DataFrame({
+        "variant_id": order,
+        "activities": [variants[idx] for idx in order],
+        "count": [int(variant_index["counts"][idx]) for idx in order],
+    })
+
+
+def top_variant_cases(variant_index: Dict[str, Any], k: int) -> np.ndarray:
+    """Case ids belonging to the k most frequent variants."""
+    keep = variant_frequency_table(variant_index)["variant_id"].head(k).to_numpy()
+    return variant_index["case_ids"][np.isin(variant_index["case_variant"], keep)]
+
+
+@instrumented
+def filter_event_log(event_log: object,
+                     start_activities: Optional[List[str]] = None,
+                     end_activities: Optional[List[str]] = None,
+                     min_activity_frequency: Optional[float] = None,
+                     top_variants: Optional[int] = None) -> Tuple[pd.DataFrame, Dict[str, Any], Dict[str, Any]]:
+    """Rare-activity, start/end activity and top-k variant filters applied as masks over case and activity codes.
+
+    Filters run in that order, each on what the previous ones kept. Activities below
+    min_activity_frequency (share of events) are dropped unless that would drop all of them;
+    cases left without events disappear, and start/end activities are then judged on the
+    remaining events. Returns the filtered events plus variant indexes before and after.
+    """
+    df = as_event_dataframe(event_log)
+    if df.empty:
+        return df, _empty_variant_index(), _empty_variant_index()
+    case_codes, case_ids = pd.factorize(df["case:concept:name"])
+    activity_codes, activities = pd.factorize(df["concept:name"])
+    before = _variant_index_from_codes(case_codes, case_ids, activity_codes, activities)
+
+    events = np.ones(len(df), dtype=bool)
+    if min_activity_frequency is not None:
+        named = activity_codes >= 0
+        share = np.bincount(activity_codes[named], minlength=len(activities)) / max(int(named.sum()), 1)
+        frequent = share >= min_activity_frequency
+        if frequent.any():
+            events = named & frequent[np.where(named, activity_codes, 0)]
+    event_filtered = not events.all()
+
+    cases = np.zeros(len(case_ids), dtype=bool)
+    positions = np.flatnonzero(events)
+    kept_codes = case_codes[positions]
+    new_case = np.flatnonzero(np.diff(kept_codes)) + 1
+    firsts = positions[np.concatenate([[0], new_case])] if len(positions) else positions
+    lasts = positions[np.concatenate([new_case - 1, [len(positions) - 1]])] if len(positions) else positions
+    cases[case_codes[firsts]] = True
+    for wanted, boundary in ((start_activities, firsts), (end_activities, lasts)):
+        if wanted:
+            allowed = np.isin(np.asarray(activities, dtype=object), list(wanted))
+            codes = activity_codes[boundary]
+            cases[case_codes[boundary]] &= (codes >= 0) & allowed[np.where(codes >= 0, codes, 0)]
+
+    if event_filtered:
+        mask = events & cases[case_codes]
+        after = _variant_index_from_codes(case_codes[mask], case_ids, activity_codes[mask], activities)
+    else:
+        after = subset_variant_index(before, np.flatnonzero(cases))
+    if top_variants:
+        survivors = np.flatnonzero(cases)
+        keep = variant_frequency_table(after)["variant_id"].head(top_variants).to_numpy()
+        in_top = np.isin(after["case_variant"], keep)
+        cases[survivors[~in_top]] = False
+        after = subset_variant_index(after, np.flatnonzero(in_top))
+    mask = events & cases[case_codes]
+    return df[mask].reset_index(drop=True), before, after
+
+
+def variant_index_path(log_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(log_path)), "variant_index.npz")
+
+
+def _source_digest(source_path: str, cache_dir: Optional[str] = None) -> str:
+    """Content hash of source_path, reusing the cache's hash index when a cache directory is given."""
+    if cache_dir:
+        return cached_file_hash(source_path, os.path.join(cache_dir, "hash_index.json"))
+    return file_hash(source_path)
+
+
+def save_variant_index(variant_index: Dict[str, Any], path: str, source_path: Optional[str] = None,
+                       columns: Optional[Dict[str, str]] = None, cache_dir: Optional[str] = None) -> str:
+    """Persist the index; source_path and columns record the log and column mapping it describes.
+
+    columns maps "case" and "activity" to the source columns the index was built from, so
+    readers mapping the same file differently detect that the index does not apply.
+    """
+    meta = {
+        "version": VARIANT_INDEX_VERSION,
+        "source_sha256": _source_digest(source_path, cache_dir) if source_path else None,
+        "columns": columns,
+    }
+    with open(path, "wb") as handle:
+        np.savez(handle, meta=np.array(json.dumps(meta)), **variant_index)
+    return path
+
+
+def load_variant_index(path: str, source_path: Optional[str] = None, columns: Optional[Dict[str, str]] = None,
+                       cache_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Load a persisted index, or None when it is missing, outdated or describes another log or column mapping."""
+    if not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            index = {name: data[name] for name in data.files if name != "meta"}
+    except (OSError, ValueError, KeyError) as exc:
+        logging.warning("Ignoring unreadable variant index %s: %s", path, exc)
+        return None
+    if meta.get("version") != VARIANT_INDEX_VERSION:
+        return None
+    if source_path and meta.get("columns") != columns:
+        return None
+    if source_path and meta.get("source_sha256") != _source_digest(source_path, cache_dir):
+        return None
+    return index
+
+
+@instrumented
+def load_or_build_variant_index(event_log: object, source_path: Optional[str] = None,
+                                columns: Optional[Dict[str, str]] = None,
+                                cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Reuse the index stored next to source_path when it matches the file and columns, otherwise build it."""
+    if source_path and os.path.isfile(source_path):
+        index = load_variant_index(variant_index_path(source_path), source_path, columns, cache_dir)
+        if index is not None:
+            return index
+    return build_variant_index(event_log)
+
+
+def _z_value(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2.0)
+
+
+def required_sample_size(population: int, margin: float, confidence: float = 0.95) -> int:
+    """Cases needed to estimate a mean in [0, 1] within +/- margin (worst-case variance, finite population)."""
+    if population <= 0:
+        return 0
+    n0 = _z_value(confidence) ** 2 * 0.25 / margin ** 2
+    return int(min(population, math.ceil(n0 / (1 + (n0 - 1) / population))))
+
+
+@instrumented
+def sample_variant_cases(variant_index: Dict[str, Any], sample_size: Optional[int] = None,
+                         margin: Optional[float] = None, confidence: float = 0.95, seed: int = 0,
+                         exclude: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Variant-stratified case sample of a fixed size or sized for a fitness margin at the given confidence.
+
+    Cases are ordered by variant (most frequent first, shuffled within a variant) and drawn
+    systematically, so each variant gets a share proportional to its frequency and every
+    variant with at least population/sample_size cases is represented. Case positions in
+    exclude (for example the cases models were mined from) are left out of the population.
+    """
+    if exclude is not None and len(exclude):
+        remaining = np.setdiff1d(np.arange(len(variant_index["case_variant"])), exclude)
+        sample = sample_variant_cases(subset_variant_index(variant_index, remaining), sample_size, margin, confidence, seed)
+        sample["case_positions"] = remaining[sample["case_positions"]]
+        sample["excluded_cases"] = int(len(variant_index["case_variant"]) - len(remaining))
+        return sample
+    case_variant = variant_index["case_variant"]
+    population = len(case_variant)
+    if sample_size is None:
+        if margin is None:
+            raise ValueError("Set a sample size or a margin for sampling.")
+        sample_size = required_sample_size(population, margin, confidence)
+    size = min(max(int(sample_size), 1), population)
+    rng = np.random.default_rng(seed)
+    rank = np.empty(len(variant_index["counts"]), dtype=np.int64)
+    rank[np.argsort(-variant_index["counts"], kind="stable")] = np.arange(len(rank))
+    ordered = np.lexsort((rng.random(population), rank[case_variant]))
+    step = population / max(size, 1)
+    picks = np.floor(rng.uniform(0, step) + step * np.arange(size)).astype(np.int64)
+    positions = np.sort(ordered[np.minimum(picks, population - 1)])
+    sampled_variants = np.unique(case_variant[positions])
+    return {
+        "case_positions": positions,
+        "case_ids": variant_index["case_ids"][positions],
+        "population_cases": int(population),
+        "sample_cases": int(len(positions)),
+        "population_variants": int(len(variant_index["counts"])),
+        "sample_variants": int(len(sampled_variants)),
+        "case_coverage": float(variant_index["counts"][sampled_variants].sum() / max(population, 1)),
+        "confidence": confidence,
+        "margin": margin,
+        "seed": seed,
+    }
+
+
+def holdout_variant_cases(variant_index: Dict[str, Any], sample: Dict[str, Any],
+                          seed: Optional[int] = None) -> Dict[str, Any]:
+    """Variant-stratified sample of the cases not in sample, of the same size, for out-of-sample estimates.
+
+    The seed defaults to the mining sample's seed plus one. When no cases are left the
+    holdout is empty and callers should skip the estimate.
+    """
+    seed = sample["seed"] + 1 if seed is None else seed
+    holdout = sample_variant_cases(variant_index, sample["sample_cases"], seed=seed, exclude=sample["case_positions"])
+    return {
+        "case_positions": holdout["case_positions"],
+        "case_ids": holdout["case_ids"],
+        "population_cases": holdout["population_cases"],
+        "holdout_cases": holdout["sample_cases"],
+        "seed": seed,
+    }
+
+
+def subset_variant_index(variant_index: Dict[str, Any], case_positions: np.ndarray) -> Dict[str, Any]:
+    """Variant index restricted to the given cases, with unused variants and activities dropped."""
+    # Number variants and activities by first appearance, as build_variant_index does on the subset log.
+    case_variant, kept = pd.factorize(variant_index["case_variant"][case_positions])
+    offsets = variant_index["sequence_offsets"]
+    sequences = [variant_index["sequence_codes"][offsets[variant]:offsets[variant + 1]] for variant in kept]
+    codes = np.concatenate(sequences) if sequences else np.array([], dtype=np.int32)
+    codes, used = pd.factorize(codes)
+    lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    return {
+        "case_ids": variant_index["case_ids"][case_positions],
+        "case_variant": case_variant.astype(np.int32),
+        "counts": np.bincount(case_variant, minlength=len(kept)).astype(np.int64),
+        "activities": variant_index["activities"][used],
+        "sequence_offsets": np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+        "sequence_codes": codes.astype(np.int32),
+    }
+
+
+@instrumented
+def sample_event_log(event_log: object, sample: Dict[str, Any]) -> object:
+    """The sampled cases of event_log, as the same type (DataFrame or pm4py EventLog)."""
+    case_ids = set(sample["case_ids"].astype(str))
+    if isinstance(event_log, pd.DataFrame):
+        return event_log[event_log["case:concept:name"].astype(str).isin(case_ids)]
+    traces = [trace for trace in event_log if str(trace.attributes.get("concept:name")) in case_ids]
+    return EventLog(
+        traces,
+        attributes=event_log.attributes,
+        extensions=event_log.extensions,
+        omni_present=event_log.omni_present,
+        classifiers=event_log.classifiers,
+        properties=event_log.properties,
+    )
+
+
+def mean_confidence_interval(values: Iterable[float], population_size: int, confidence: float = 0.95) -> Dict[str, float]:
+    """Sample mean with a normal-approximation interval and finite population correction."""
+    values = np.asarray(list(values), dtype=float)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n == 0:
+        return {"estimate": float("nan"), "ci_low": float("nan"), "ci_high": float("nan"), "stderr": float("nan"), "n": 0}
+    mean = float(values.mean())
+    stderr = 0.0
+    if n > 1:
+        fpc = max(0.0, 1.0 - n / max(population_size, n))
+        stderr = float(values.std(ddof=1) / math.sqrt(n) * math.sqrt(fpc))
+    half_width = _z_value(confidence) * stderr
+    return {"estimate": mean, "ci_low": mean - half_width, "ci_high": mean + half_width, "stderr": stderr, "n": n}
+
+
+def sampled_fitness_estimates(sample_log: object, models: Dict[str, Tuple], population_cases: int,
+                              confidence: float = 0.95) -> Dict[str, Dict[str, float]]:
+    """Per-model case fitness (token replay) on the sample, with its confidence interval for the population.
+
+    Pass a holdout log (see holdout_variant_cases), not the cases the models were mined
+    from; replaying the mining sample measures the fit to that sample, which is near 1.
+    """
+    estimates = {}
+    if token_replay is None:
+        return estimates
+    sample_log = ensure_event_log(sample_log) if models else sample_log
+    for name, (net, im, fm) in models.items():
+        try:
+            replay = token_replay.apply(sample_log, net, im, fm)
+        except Exception as exc:
+            logging.warning("Token replay on the sample failed for %s model: %s", name, exc)
+            continue
+        fitness = [item.get("trace_fitness", item.get("fitness", np.nan)) for item in replay if isinstance(item, dict)]
+        estimates[name] = mean_confidence_interval(fitness, population_cases, confidence)
+    return estimates
+
+
+def mining_sample_case_ids(discover_dir: str) -> Optional[List[str]]:
+    """Case ids the discovery stage mined its models from, or None when it used the whole log."""
+    # The manifest lists the summary only for a sampled run, so a summary left by an earlier run is ignored.
+    manifest = load_json(os.path.join(discover_dir, "manifest.json"), default={})
+    if "sampling_summary_json" not in manifest.get("artifacts", {}):
+        return None
+    return load_json(os.path.join(discover_dir, "sampling_summary.json"), default={}).get("case_ids")
+
+
+def write_sampling_summary(output_dir: str, sample: Dict[str, Any], variant_index: Dict[str, Any],
+                           sample_index: Dict[str, Any], elapsed_seconds: float,
+                           estimates: Dict[str, Dict[str, float]], holdout: Optional[Dict[str, Any]] = None) -> str:
+    """sampling_summary.json: sample size and coverage, work reduction versus the full log and metric intervals.
+
+    The sampled case ids are listed so later stages can tell which cases a sample used. holdout,
+    when given, is the sample the estimates were computed on; its seed and case ids are recorded.
+    """
+    population_events = int((variant_index["counts"] * np.diff(variant_index["sequence_offsets"])).sum())
+    sample_events = int((sample_index["counts"] * np.diff(sample_index["sequence_offsets"])).sum())
+    summary = {key: value for key, value in sample.items() if key not in ("case_positions", "case_ids")}
+    summary["case_ids"] = sample["case_ids"].astype(str).tolist()
+    summary.update({
+        "population_events": population_events,
+        "sample_events": sample_events,
+        "event_reduction": population_events / max(sample_events, 1),
+        "variant_reduction": sample["population_variants"] / max(sample["sample_variants"], 1),
+        "elapsed_seconds": elapsed_seconds,
+        "fitness_estimates": estimates,
+    })
+    if holdout is not None:
+        summary["fitness_holdout"] = {
+            "seed": holdout["seed"],
+            "population_cases": holdout["population_cases"],
+            "holdout_cases": holdout["holdout_cases"],
+            "case_ids": holdout["case_ids"].astype(str).tolist(),
+        }
+    path = os.path.join(output_dir, "sampling_summary.json")
+    save_json(summary, path)
+    return path
+
+
+@instrumented
+def compute_statistics(event_log: object, variant_index: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
     """Compute basic log stats."""
-    num_cases = len(event_log)
-    num_events = sum(len(trace) for trace in event_log)
-    variants = variants_get.get_variants(event_log)
-    num_variants = len(variants)
+    if variant_index is None:
+        variant_index = build_variant_index(event_log)
+    counts = variant_index["counts"]
+    lengths = np.diff(variant_index["sequence_offsets"])
     return {
-        "num_events": num_events,
-        "num_cases": num_cases,
-        "num_variants": num_variants,
+        "num_events": int((counts * lengths).sum()),
+        "num_cases": int(len(variant_index["case_ids"])),
+        "num_variants": int(len(counts)),
     }
 
 
+@instrumented
 def log_to_dataframe(event_log: object) -> pd.DataFrame:
+    if isinstance(event_log, pd.DataFrame):
+        return event_log
     require_pm4py()
     return log_converter.apply(event_log, variant=log_converter.Variants.TO_DATA_FRAME)
 
 
+def ensure_event_log(event_log: object) -> object:
+    """pm4py EventLog for algorithms that iterate trace objects; DataFrames are converted once here.
+
+    Everything else in this module works on the DataFrame, so call this as late as possible
+    and reuse the result rather than letting each pm4py call convert on its own.
+    """
+    if isinstance(event_log, pd.DataFrame):
+        return convert_dataframe_to_event_log(event_log.copy())
+    return event_log
+
+
 def sort_log_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     if "case:concept:name" in df.columns and "time:timestamp" in df.columns:
         return df.sort_values(["case:concept:name", "time:timestamp"])
     return df
 
 
-def plot_activity_distributions(df: pd.DataFrame, output_dir: str) -> Dict[str, str]:
+@instrumented
+def as_event_dataframe(event_log: object) -> pd.DataFrame:
+    """Return events as a DataFrame ordered by time within each case, keeping case order of first appearance."""
+    df = event_log if isinstance(event_log, pd.DataFrame) else log_to_dataframe(event_log)
+    if df.empty or "case:concept:name" not in df.columns or "time:timestamp" not in df.columns:
+        return df
+    if not pd.api.types.is_datetime64_any_dtype(df["time:timestamp"].dtype):
+        df = df.assign(**{"time:timestamp": pd.to_datetime(df["time:timestamp"], errors="coerce")})
+    case_order = pd.factorize(df["case:concept:name"])[0]
+    times = df["time:timestamp"].array
+    if not times.isna().any() and (np.diff(case_order) >= 0).all():
+        same_case = case_order[1:] == case_order[:-1]
+        if not (same_case & np.asarray(times[1:] < times[:-1])).any():
+            # Already in this order (e.g. a frame returned by an earlier call): skip the sort and copy.
+            ordered = df.copy(deep=False)
+            ordered.index = pd.RangeIndex(len(ordered))
+            return ordered
+    order = df.assign(_case_order=case_order).sort_values(["_case_order", "time:timestamp"], kind="stable").index
+    return df.loc[order].reset_index(drop=True)
+
+
+def case_duration_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-case start, end and duration (hours) from a time-ordered event DataFrame."""
+    grouped = df.groupby("case:concept:name", sort=False)["time:timestamp"]
+    frame = pd.DataFrame({"start": grouped.first(), "end": grouped.last()})
+    frame["duration_hours"] = (frame["end"] - frame["start"]).dt.total_seconds() / 3600.0
+    return frame
+
+
+def activity_sojourn_stats(df: pd.DataFrame, dfg: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """Sojourn time (until the next event in the case) per activity: mean, median, p95 and count."""
+    if dfg is None:
+        dfg = directly_follows_graph(df)
+    present = dfg["sojourn_count"] > 0
+    order = np.argsort(dfg["sojourn_first"][present], kind="stable")
+    stats = pd.DataFrame({
+        "activity": dfg["labels"][present][order],
+        "avg_sojourn_hours": dfg["sojourn_mean_hours"][present][order],
+        "median_sojourn_hours": dfg["sojourn_median_hours"][present][order],
+        "p95_sojourn_hours": dfg["sojourn_p95_hours"][present][order],
+        "count": dfg["sojourn_count"][present][order],
+    })
+    return stats
+
+
+def detect_resource_column(df: pd.DataFrame, candidate_keys: List[str]) -> Optional[str]:
+    """Pick the candidate column holding the earliest non-empty value, ties broken by candidate order."""
+    best_key = None
+    best_row = None
+    for key in candidate_keys:
+        if key not in df.columns:
+            continue
+        present = _truthy_mask(df[key])
+        if not present.any():
+            continue
+        first_row = int(np.argmax(present))
+        if best_row is None or first_row < best_row:
+            best_key, best_row = key, first_row
+    return best_key
+
+
+def _truthy_mask(series: pd.Series) -> np.ndarray:
+    present = series.notna().to_numpy()
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        present = present & (series.astype(str) != "").to_numpy()
+    elif pd.api.types.is_numeric_dtype(series.dtype):
+        present = present & (series != 0).to_numpy()
+    return present
+
+
+def handover_counts(df: pd.DataFrame, resource_key: str) -> pd.DataFrame:
+    """Count consecutive resource changes within each case as (from, to, count) rows."""
+    dfg = directly_follows_graph(df, key=resource_key, durations=False)
+    edges = dfg_edges_frame(dfg)
+    return edges[edges["from"] != edges["to"]].reset_index(drop=True)[["from", "to", "count"]]
+
+
+DFG_EDGE_KEYS = ("src", "dst", "frequency", "mean_hours", "median_hours", "p95_hours")
+
+
+def _grouped_quantile(groups: np.ndarray, values: np.ndarray, n_groups: int, q: float) -> np.ndarray:
+    """Linearly interpolated q-quantile of values per integer group, NaN for empty groups (matches pandas)."""
+    sorted_values = values[np.lexsort((values, groups))]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    position = starts + q * np.maximum(counts - 1, 0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    result = np.full(n_groups, np.nan)
+    present = counts > 0
+    low = sorted_values[lower[present]]
+    result[present] = low + (sorted_values[upper[present]] - low) * (position[present] - lower[present])
+    return result
+
+
+def _grouped_mean(groups: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    counts = np.bincount(groups, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.bincount(groups, weights=values, minlength=n_groups) / counts
+
+
+def _follow_pairs(case_codes: np.ndarray, label_codes: np.ndarray, lag: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions (i - lag, i) of events lag steps apart in the same contiguous case, both with a label."""
+    later = np.arange(lag, len(case_codes))
+    earlier = later - lag
+    keep = (case_codes[earlier] == case_codes[later]) & (label_codes[earlier] >= 0) & (label_codes[later] >= 0)
+    return earlier[keep], later[keep]
+
+
+def _edge_codes(src: np.ndarray, dst: np.ndarray, n_labels: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Unique (src, dst) edges plus the edge number of every pair."""
+    edges, inverse = np.unique(src.astype(np.int64) * n_labels + dst, return_inverse=True)
+    return (edges // n_labels).astype(np.int32), (edges % n_labels).astype(np.int32), inverse.reshape(-1)
+
+
+def _boundary_counts(case_codes: np.ndarray, label_codes: np.ndarray, n_labels: int,
+                     weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    if len(case_codes) == 0:
+        return np.zeros(n_labels, dtype=np.int64), np.zeros(n_labels, dtype=np.int64)
+    changes = case_codes[1:] != case_codes[:-1]
+    first = np.concatenate([[True], changes]) & (label_codes >= 0)
+    last = np.concatenate([changes, [True]]) & (label_codes >= 0)
+    counts = []
+    for mask in (first, last):
+        counts.append(np.bincount(label_codes[mask], weights=None if weights is None else weights[mask],
+                                  minlength=n_labels).astype(np.int64))
+    return counts[0], counts[1]
+
+
+@instrumented
+def directly_follows_graph(event_log: object, key: str = "concept:name", durations: bool = True) -> Dict[str, Any]:
+    """Integer-coded directly-follows graph over activities or resources, built in one vectorised pass.
+
+    Edges are sparse parallel arrays (src/dst codes into labels, frequency and, with durations,
+    mean/median/p95 hours between the two events). Per-label arrays hold occurrences, start/end
+    counts and the sojourn time until the next event of the case. Events with an empty `key`
+    (e.g. no resource) have no edge into or out of them.
+    """
+    df = as_event_dataframe(event_log)
+    values = df[key] if key in df.columns else pd.Series(np.nan, index=df.index)
+    label_codes, labels = pd.factorize(values.where(_truthy_mask(values)))
+    case_codes = pd.factorize(df["case:concept:name"])[0] if len(df) else np.array([], dtype=np.int64)
+    n_labels = len(labels)
+    earlier, later = _follow_pairs(case_codes, label_codes)
+    src, dst, edge_of_pair = _edge_codes(label_codes[earlier], label_codes[later], n_labels)
+    dfg: Dict[str, Any] = {
+        "key": key,
+        "labels": np.asarray(labels, dtype=object),
+        "src": src,
+        "dst": dst,
+        "frequency": np.bincount(edge_of_pair, minlength=len(src)).astype(np.int64),
+        "occurrences": np.bincount(label_codes[label_codes >= 0], minlength=n_labels).astype(np.int64),
+    }
+    dfg["start"], dfg["end"] = _boundary_counts(case_codes, label_codes, n_labels)
+    if not durations:
+        return dfg
+    seconds = _epoch_seconds(df["time:timestamp"]) if len(df) else np.array([], dtype=float)
+    hours = (seconds[later] - seconds[earlier]) / 3600.0
+    valid = ~np.isnan(hours)
+    dfg["mean_hours"] = _grouped_mean(edge_of_pair[valid], hours[valid], len(src))
+    dfg["median_hours"] = _grouped_quantile(edge_of_pair[valid], hours[valid], len(src), 0.5)
+    dfg["p95_hours"] = _grouped_quantile(edge_of_pair[valid], hours[valid], len(src), 0.95)
+
+    # Sojourn: time from each labelled event to the next event of its case, whatever that event's label.
+    nxt = np.arange(1, len(case_codes))
+    has_next = (case_codes[nxt - 1] == case_codes[nxt]) & (label_codes[nxt - 1] >= 0)
+    sojourn = (seconds[nxt] - seconds[nxt - 1])[has_next] / 3600.0
+    sojourn_labels = label_codes[nxt - 1][has_next]
+    keep = ~np.isnan(sojourn)
+    sojourn, sojourn_labels = sojourn[keep], sojourn_labels[keep]
+    dfg["sojourn_count"] = np.bincount(sojourn_labels, minlength=n_labels).astype(np.int64)
+    dfg["sojourn_mean_hours"] = _grouped_mean(sojourn_labels, sojourn, n_labels)
+    dfg["sojourn_median_hours"] = _grouped_quantile(sojourn_labels, sojourn, n_labels, 0.5)
+    dfg["sojourn_p95_hours"] = _grouped_quantile(sojourn_labels, sojourn, n_labels, 0.95)
+    # First position each label has a successor, so tables can keep order of first appearance.
+    first_seen = np.full(n_labels, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first_seen, sojourn_labels, np.flatnonzero(has_next)[keep])
+    dfg["sojourn_first"] = first_seen
+    return dfg
+
+
+@instrumented
+def variant_directly_follows(variant_index: Dict[str, Any], heuristics: bool = False) -> Dict[str, Any]:
+    """Frequency-only activity DFG from a variant index, each variant weighted by its case count.
+
+    With heuristics=True it also counts window-2 pairs and consecutive triples, the remaining
+    relations the heuristics miner needs.
+    """
+    codes = variant_index["sequence_codes"].astype(np.int64)
+    variant_codes = np.repeat(np.arange(len(variant_index["counts"])), np.diff(variant_index["sequence_offsets"]))
+    weights = variant_index["counts"][variant_codes].astype(float)
+    labels = np.asarray(variant_index["activities"], dtype=object)
+    n_labels = len(labels)
+    earlier, later = _follow_pairs(variant_codes, codes)
+    src, dst, edge_of_pair = _edge_codes(codes[earlier], codes[later], n_labels)
+    dfg: Dict[str, Any] = {
+        "key": "concept:name",
+        "labels": labels,
+        "src": src,
+        "dst": dst,
+        "frequency": np.bincount(edge_of_pair, weights=weights[later], minlength=len(src)).astype(np.int64),
+        "occurrences": np.bincount(codes, weights=weights, minlength=n_labels).astype(np.int64),
+    }
+    dfg["start"], dfg["end"] = _boundary_counts(variant_codes, codes, n_labels, weights)
+    if heuristics:
+        earlier, later = _follow_pairs(variant_codes, codes, lag=2)
+        window2 = pd.Series(weights[later]).groupby([codes[earlier], codes[later]]).sum()
+        triples = pd.Series(weights[later]).groupby([codes[earlier], codes[earlier + 1], codes[later]]).sum()
+        dfg["window2"] = {(labels[a], labels[b]): int(count) for (a, b), count in window2.items()}
+        dfg["triples"] = {(labels[a], labels[b], labels[c]): int(count) for (a, b, c), count in triples.items()}
+    return dfg
+
+
+def filter_dfg(dfg: Dict[str, Any], min_frequency: float) -> Dict[str, Any]:
+    """Keep edges whose frequency is at least min_frequency times that of the most frequent edge."""
+    if min_frequency <= 0 or len(dfg["frequency"]) == 0:
+        return dfg
+    keep = dfg["frequency"] >= min_frequency * dfg["frequency"].max()
+    filtered = dict(dfg)
+    for name in DFG_EDGE_KEYS:
+        if name in dfg:
+            filtered[name] = dfg[name][keep]
+    return filtered
+
+
+def dfg_edges_frame(dfg: Dict[str, Any]) -> pd.DataFrame:
+    """Edges as (from, to, count[, mean/median/p95 hours]) rows, most frequent first."""
+    frame = pd.DataFrame({
+        "from": dfg["labels"][dfg["src"]],
+        "to": dfg["labels"][dfg["dst"]],
+        "count": dfg["frequency"],
+    })
+    for name in ("mean_hours", "median_hours", "p95_hours"):
+        if name in dfg:
+            frame[name] = dfg[name]
+    return frame.sort_values("count", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def dfg_matrix(dfg: Dict[str, Any], value: str = "frequency") -> np.ndarray:
+    """Dense labels x labels matrix of an edge value (0 or NaN where there is no edge)."""
+    n_labels = len(dfg["labels"])
+    matrix = np.zeros((n_labels, n_labels), dtype=dfg[value].dtype)
+    if matrix.dtype.kind == "f":
+        matrix[:] = np.nan
+    matrix[dfg["src"], dfg["dst"]] = dfg[value]
+    return matrix
+
+
+def dfg_to_pm4py(dfg: Dict[str, Any]) -> Dict[Tuple[str, str], int]:
+    """pm4py-style {(from, to): count} mapping."""
+    labels = dfg["labels"]
+    return {(labels[a], labels[b]): int(count) for a, b, count in zip(dfg["src"], dfg["dst"], dfg["frequency"])}
+
+
+CHART_FORMATS = ("png", "data")
+
+
+def chart_spec(name: str, path: str, kind: str, title: str, xlabel: str, ylabel: str,
+               figsize: Tuple[float, float] = (10, 6), **data: Any) -> Dict[str, Any]:
+    """Describe one chart by its already aggregated data; render_charts turns specs into files."""
+    return {"name": name, "path": path, "kind": kind, "title": title, "xlabel": xlabel,
+            "ylabel": ylabel, "figsize": figsize, **data}
+
+
+def _render_chart(spec: Dict[str, Any]) -> str:
+    """Draw one chart spec with the object-oriented Agg API (no pyplot state) and save it."""
+    fig = Figure(figsize=spec["figsize"])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    kind = spec["kind"]
+    if kind in ("bar", "pareto"):
+        positions = np.arange(len(spec["x"]))
+        ax.bar(positions, spec["y"], color=spec.get("color"))
+        ax.set_xticks(positions)
+        ax.set_xticklabels([str(label) for label in spec["x"]], rotation=spec.get("rotation", 90),
+                           ha=spec.get("ha", "center"))
+        if kind == "pareto":
+            ax2 = ax.twinx()
+            ax2.plot(positions, spec["cum_percent"], color="black", marker="o")
+            ax2.set_ylabel("Cumulative %")
+    elif kind == "line":
+        ax.plot(pd.to_datetime(pd.Series(spec["x"], dtype=object)), spec["y"], color=spec.get("color"))
+    elif kind == "hist":
+        edges = np.asarray(spec["edges"], dtype=float)
+        ax.hist(edges[:-1], bins=edges, weights=spec["counts"], color=spec.get("color"), edgecolor="black")
+    elif kind == "box":
+        if spec["stats"]:
+            ax.bxp(spec["stats"], patch_artist=True)
+    elif kind == "spc":
+        ax.plot(spec["y"], marker="o", linestyle="-", color="steelblue")
+        ax.axhline(spec["mean"], color="green", linestyle="--", label="Mean")
+        ax.axhline(spec["ucl"], color="red", linestyle="--", label="UCL")
+        ax.axhline(spec["lcl"], color="red", linestyle="--", label="LCL")
+        ax.legend()
+    else:
+        raise ValueError(f"Unknown chart kind: {kind}")
+    ax.set_title(spec["title"])
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    fig.tight_layout()
+    fig.savefig(spec["path"])
+    return spec["path"]
+
+
+def _chart_json_value(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return [_chart_json_value(item) for item in value.tolist()]
+    if isinstance(value, (list, tuple)):
+        return [_chart_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _chart_json_value(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+@instrumented
+def render_charts(specs: List[Dict[str, Any]], chart_format: str = "png", workers: int = 1) -> Dict[str, str]:
+    """Render chart specs and return artifact name -> path.
+
+    "png" draws every spec (across `workers` processes when > 1); "data" skips raster
+    output and writes each chart's aggregated series next to where the PNG would go.
+    """
+    if chart_format not in CHART_FORMATS:
+        raise ValueError(f"Unknown chart format: {chart_format}")
+    artifacts: Dict[str, str] = {}
+    if chart_format == "data":
+        for spec in specs:
+            path = os.path.splitext(spec["path"])[0] + ".json"
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump(_chart_json_value({key: value for key, value in spec.items() if key != "path"}), handle, indent=2)
+            artifacts[spec["name"]] = path
+        return artifacts
+    tasks = {spec["name"]: (_render_chart, (spec,)) for spec in specs}
+    for name, (status, payload) in run_process_tasks(tasks, workers=workers).items():
+        if status != "ok":
+            logging.warning("Rendering chart %s failed: %s", name, payload)
+            continue
+        artifacts[name] = payload
+    return artifacts
+
+
+def _render_or_collect(specs: List[Dict[str, Any]], charts: Optional[List[Dict[str, Any]]]) -> Dict[str, str]:
+    """Render specs now, or queue them on `charts` for one batched render_charts call by the caller."""
+    if charts is None:
+        return render_charts(specs)
+    charts.extend(specs)
+    return {spec["name"]: spec["path"] for spec in specs}
+
+
+@instrumented
+def plot_activity_distributions(df: pd.DataFrame, output_dir: str,
+                                charts: Optional[List[Dict[str, Any]]] = None) -> Dict[str, str]:
     """Plot activity distributions by hour, weekday, month, and throughput over time."""
-    df = df.copy()
-    df["time:timestamp"] = pd.to_datetime(df["time:timestamp"])
-    df["hour"] = df["time:timestamp"].dt.hour
-    df["weekday"] = df["time:timestamp"].dt.day_name()
-    df["month_num"] = df["time:timestamp"].dt.month
-    df["date"] = df["time:timestamp"].dt.date
+    timestamps = pd.to_datetime(df["time:timestamp"])
+    activity = df["concept:name"]
 
     artifacts = {}
-    activity_counts = df["concept:name"].value_counts()
+    activity_counts = activity.value_counts()
     activity_counts.to_csv(os.path.join(output_dir, "activity_frequency.csv"), header=["count"])
     artifacts["activity_frequency"] = os.path.join(output_dir, "activity_frequency.csv")
-    plt.figure(figsize=(10, 6))
-    df.groupby("hour")["concept:name"].count().plot(kind="bar", color="skyblue")
-    plt.xlabel("Hour of Day")
-    plt.ylabel("Number of Events")
-    plt.title("Activity Distribution by Hour")
-    plt.tight_layout()
-    path = os.path.join(output_dir, "activity_distribution_hour.png")
-    plt.savefig(path)
-    plt.close()
-    artifacts["activity_distribution_hour"] = path
-
-    plt.figure(figsize=(10, 6))
-    df.groupby("weekday")["concept:name"].count().reindex(
+
+    hour_counts = activity.groupby(timestamps.dt.hour).count()
+    weekday_counts = activity.groupby(timestamps.dt.day_name()).count().reindex(
         ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    ).plot(kind="bar", color="teal")
-    plt.xlabel("Day of Week")
-    plt.ylabel("Number of Events")
-    plt.title("Activity Distribution by Weekday")
-    plt.tight_layout()
-    path = os.path.join(output_dir, "activity_distribution_weekday.png")
-    plt.savefig(path)
-    plt.close()
-    artifacts["activity_distribution_weekday"] = path
-
-    plt.figure(figsize=(10, 6))
-    month_counts = df.groupby("month_num")["concept:name"].count()
-    month_counts.plot(kind="bar", color="slateblue")
-    plt.xlabel("Month")
-    plt.ylabel("Number of Events")
-    plt.title("Activity Distribution by Month")
-    plt.tight_layout()
-    path = os.path.join(output_dir, "activity_distribution_month.png")
-    plt.savefig(path)
-    plt.close()
-    artifacts["activity_distribution_month"] = path
-
-    daily_counts = df.groupby("date")["concept:name"].count()
-    plt.figure(figsize=(10, 5))
-    daily_counts.plot(color="darkorange")
-    plt.xlabel("Date")
-    plt.ylabel("Events per Day")
-    plt.title("Event Throughput Over Time")
-    plt.tight_layout()
-    path = os.path.join(output_dir, "event_throughput_timeseries.png")
-    plt.savefig(path)
-    plt.close()
-    artifacts["event_throughput_timeseries"] = path
-
-    case_starts = df.groupby("case:concept:name")["time:timestamp"].min().sort_values()
+    )
+    month_counts = activity.groupby(timestamps.dt.month).count()
+    daily_counts = activity.groupby(timestamps.dt.date).count()
+    case_starts = timestamps.groupby(df["case:concept:name"]).min()
     case_start_counts = case_starts.dt.date.value_counts().sort_index()
-    plt.figure(figsize=(10, 5))
-    case_start_counts.plot(color="seagreen")
-    plt.xlabel("Date")
-    plt.ylabel("Case Arrivals")
-    plt.title("Case Arrivals Over Time")
-    plt.tight_layout()
-    path = os.path.join(output_dir, "case_arrival_timeseries.png")
-    plt.savefig(path)
-    plt.close()
-    artifacts["case_arrival_timeseries"] = path
-
+    specs = [
+        chart_spec("activity_distribution_hour", os.path.join(output_dir, "activity_distribution_hour.png"), "bar",
+                   "Activity Distribution by Hour", "Hour of Day", "Number of Events",
+                   x=hour_counts.index.tolist(), y=hour_counts.to_numpy(), color="skyblue"),
+        chart_spec("activity_distribution_weekday", os.path.join(output_dir, "activity_distribution_weekday.png"), "bar",
+                   "Activity Distribution by Weekday", "Day of Week", "Number of Events",
+                   x=weekday_counts.index.tolist(), y=weekday_counts.to_numpy(dtype=float), color="teal"),
+        chart_spec("activity_distribution_month", os.path.join(output_dir, "activity_distribution_month.png"), "bar",
+                   "Activity Distribution by Month", "Month", "Number of Events",
+                   x=month_counts.index.tolist(), y=month_counts.to_numpy(), color="slateblue"),
+        chart_spec("event_throughput_timeseries", os.path.join(output_dir, "event_throughput_timeseries.png"), "line",
+                   "Event Throughput Over Time", "Date", "Events per Day", figsize=(10, 5),
+                   x=[str(day) for day in daily_counts.index], y=daily_counts.to_numpy(), color="darkorange"),
+        chart_spec("case_arrival_timeseries", os.path.join(output_dir, "case_arrival_timeseries.png"), "line",
+                   "Case Arrivals Over Time", "Date", "Case Arrivals", figsize=(10, 5),
+                   x=[str(day) for day in case_start_counts.index], y=case_start_counts.to_numpy(), color="seagreen"),
+    ]
+    artifacts.update(_render_or_collect(specs, charts))
     return artifacts
 
 
-def compute_variant_stats(event_log: object, output_dir: str, top_n: int = 10) -> Dict[str, str]:
-    variants = variants_get.get_variants(event_log)
-    counts = {variant: len(traces) for variant, traces in variants.items()}
-    df = pd.DataFrame(list(counts.items()), columns=["variant", "count"]).sort_values(
-        "count", ascending=False
-    )
+@instrumented
+def compute_variant_stats(event_log: object, output_dir: str, top_n: int = 10,
+                          variant_index: Optional[Dict[str, Any]] = None,
+                          charts: Optional[List[Dict[str, Any]]] = None) -> Dict[str, str]:
+    if variant_index is None:
+        variant_index = build_variant_index(event_log)
+    df = variant_frequency_table(variant_index)
+    df = pd.DataFrame({"variant": df["activities"].map(str), "count": df["count"]})
     df["percent"] = df["count"] / df["count"].sum() * 100
     df["cum_percent"] = df["percent"].cumsum()
     df.to_csv(os.path.join(output_dir, "variant_counts.csv"), index=False)
 
-    # Pareto chart
-    plt.figure(figsize=(10, 6))
     top_df = df.head(top_n)
-    ax = top_df.plot(kind="bar", x="variant", y="count", legend=False, color="coral")
-    ax2 = ax.twinx()
-    ax2.plot(top_df["cum_percent"].values, color="black", marker="o")
-    ax2.set_ylabel("Cumulative %")
-    ax.set_xlabel("Variant")
-    ax.set_ylabel("Case Count")
-    plt.title("Top Variants Pareto")
-    plt.tight_layout()
-    pareto_path = os.path.join(output_dir, "variant_pareto.png")
-    plt.savefig(pareto_path)
-    plt.close()
-
-    return {
-        "variant_counts": os.path.join(output_dir, "variant_counts.csv"),
-        "variant_pareto": pareto_path,
-    }
+    pareto = chart_spec(
+        "variant_pareto", os.path.join(output_dir, "variant_pareto.png"), "pareto",
+        "Top Variants Pareto", "Variant", "Case Count",
+        x=top_df["variant"].tolist(), y=top_df["count"].to_numpy(),
+        cum_percent=top_df["cum_percent"].to_numpy(), color="coral",
+    )
+    artifacts = {"variant_counts": os.path.join(output_dir, "variant_counts.csv")}
+    artifacts.update(_render_or_collect([pareto], charts))
+    return artifacts
 
 
+@instrumented
 def compute_arrival_metrics(event_log: object) -> Dict[str, float]:
-    start_times = []
-    for trace in event_log:
-        if trace:
-            start_times.append(trace[0]["time:timestamp"])
+    df = as_event_dataframe(event_log)
+    if df.empty:
+        return {"mean_interarrival_hours": float("nan")}
+    start_times = df.groupby("case:concept:name", sort=False)["time:timestamp"].first().dropna()
     if len(start_times) < 2:
         return {"mean_interarrival_hours": float("nan")}
-    start_times = sorted(start_times)
-    inter_arrivals = [
-        (start_times[i] - start_times[i - 1]).total_seconds() / 3600.0
-        for i in range(1, len(start_times))
-    ]
+    inter_arrivals = start_times.sort_values().diff().dropna().dt.total_seconds() / 3600.0
     return {
-        "mean_interarrival_hours": float(np.mean(inter_arrivals)),
-        "median_interarrival_hours": float(np.median(inter_arrivals)),
+        "mean_interarrival_hours": float(inter_arrivals.mean()),
+        "median_interarrival_hours": float(inter_arrivals.median()),
     }
 
 
+@instrumented
 def compute_case_duration_stats(event_log: object) -> Dict[str, float]:
-    durations = []
-    for trace in event_log:
-        if not trace:
-            continue
-        duration = (trace[-1]["time:timestamp"] - trace[0]["time:timestamp"]).total_seconds() / 3600.0
-        durations.append(duration)
-    if not durations:
+    df = as_event_dataframe(event_log)
+    if df.empty:
         return {}
-    series = pd.Series(durations)
+    series = case_duration_frame(df)["duration_hours"]
     return {
         "mean_hours": float(series.mean()),
         "median_hours": float(series.median()),
@@ -537,72 +2429,153 @@ def compute_case_duration_stats(event_log: object) -> Dict[str, float]:
     }
 
 
+@instrumented
 def discover_models(event_log: object, output_dir: str, noise_threshold: float,
                     dependency_threshold: float, frequency_threshold: float,
-                    miner_selection: str = "auto", variant_noise_threshold: float = 0.01) -> Dict[str, object]:
+                    miner_selection: str = "auto", variant_noise_threshold: float = 0.01,
+                    variant_index: Optional[Dict[str, Any]] = None, workers: int = 1,
+                    task_timeout: Optional[float] = None) -> Dict[str, object]:
     require_pm4py()
-    if variants_get is None or pn_vis is None:
+    if pn_vis is None:
         raise RuntimeError("PM4Py discovery helpers are unavailable in this environment.")
     models = {}
     selection = miner_selection.lower()
     if selection == "auto":
-        variants = variants_get.get_variants(event_log)
-        num_cases = max(len(event_log), 1)
-        variant_count = len(variants)
-        low_freq_variants = sum(
-            1 for traces in variants.values()
-            if len(traces) / num_cases < variant_noise_threshold
-        )
+        if variant_index is None:
+            variant_index = build_variant_index(event_log)
+        counts = variant_index["counts"]
+        num_cases = max(len(variant_index["case_ids"]), 1)
+        variant_count = len(counts)
+        low_freq_variants = int((counts / num_cases < variant_noise_threshold).sum())
         noisy = variant_count / num_cases > 0.5 or (variant_count > 0 and low_freq_variants / variant_count > 0.5)
         selection = "heuristic" if noisy else "inductive"
         if selection == "heuristic" and frequency_threshold < 0.02:
             frequency_threshold = max(frequency_threshold, 0.02)
 
+    tasks: Dict[str, Tuple[Callable[..., Any], tuple]] = {}
     if selection in ("inductive", "both"):
-        try:
-            if hasattr(pm4py, "discover_petri_net_inductive"):
-                net_ind, im_ind, fm_ind = pm4py.discover_petri_net_inductive(
-                    event_log,
-                    noise_threshold=noise_threshold,
-                )
-            else:
-                net_ind, im_ind, fm_ind = inductive_miner.apply(
-                    event_log,
-                    parameters={"noise_threshold": noise_threshold},
-                )
-            models["inductive"] = (net_ind, im_ind, fm_ind)
-            try:
-                gviz_ind = pn_vis.apply(net_ind, im_ind, fm_ind)
-                pn_vis.save(gviz_ind, os.path.join(output_dir, "inductive_miner_petri_net.png"))
-            except Exception as exc:
-                logging.warning("Inductive miner visualization failed: %s", exc)
-        except Exception as exc:
-            logging.warning("Inductive miner failed: %s", exc)
-
+        tasks["inductive"] = (discover_inductive_net, (event_log, noise_threshold))
     if selection in ("heuristic", "both"):
+        dfg = None
+        if heuristics_classic is not None and heuristics_net_converter is not None:
+            if variant_index is None:
+                variant_index = build_variant_index(event_log)
+            dfg = variant_directly_follows(variant_index, heuristics=True)
+        tasks["heuristic"] = (discover_heuristic_net, (event_log, dependency_threshold, frequency_threshold, dfg))
+    for name, (status, payload) in run_process_tasks(tasks, workers=workers, timeout=task_timeout).items():
+        if status != "ok":
+            logging.warning("%s miner failed: %s", name.capitalize(), payload)
+            continue
+        models[name] = payload
+        net, im, fm = payload
         try:
-            if hasattr(pm4py, "discover_petri_net_heuristics"):
-                net_heu, im_heu, fm_heu = pm4py.discover_petri_net_heuristics(
-                    event_log,
-                    dependency_threshold=dependency_threshold,
-                )
-            else:
-                net_heu, im_heu, fm_heu = heuristic_miner.apply_heu(
-                    event_log,
-                    dependency_threshold=dependency_threshold,
-                    frequency_threshold=frequency_threshold,
-                )
-            models["heuristic"] = (net_heu, im_heu, fm_heu)
-            try:
-                gviz_heu = pn_vis.apply(net_heu, im_heu, fm_heu)
-                pn_vis.save(gviz_heu, os.path.join(output_dir, "heuristic_miner_petri_net.png"))
-            except Exception as exc:
-                logging.warning("Heuristic miner visualization failed: %s", exc)
+            gviz = pn_vis.apply(net, im, fm)
+            pn_vis.save(gviz, os.path.join(output_dir, f"{name}_miner_petri_net.png"))
         except Exception as exc:
-            logging.warning("Heuristic miner failed: %s", exc)
+            logging.warning("%s miner visualization failed: %s", name.capitalize(), exc)
     return models
 
 
+def discover_inductive_net(event_log: object, noise_threshold: float) -> Tuple:
+    if hasattr(pm4py, "discover_petri_net_inductive"):
+        return pm4py.discover_petri_net_inductive(event_log, noise_threshold=noise_threshold)
+    return inductive_miner.apply(event_log, parameters={"noise_threshold": noise_threshold})
+
+
+def discover_heuristic_net(event_log: object, dependency_threshold: float, frequency_threshold: float,
+                           dfg: Optional[Dict[str, Any]] = None) -> Tuple:
+    """Heuristics miner; with a precomputed DFG it skips pm4py's own passes over the log.
+
+    Edges below frequency_threshold (a fraction of the most frequent edge) are dropped first.
+    """
+    if dfg is not None:
+        filtered = filter_dfg(dfg, frequency_threshold)
+        labels = dfg["labels"]
+        heu_net = heuristics_classic.apply_heu_dfg(
+            dfg_to_pm4py(filtered),
+            activities=[str(label) for label in labels],
+            activities_occurrences={labels[code]: int(count) for code, count in enumerate(dfg["occurrences"])},
+            start_activities={labels[code]: int(count) for code, count in enumerate(dfg["start"]) if count},
+            end_activities={labels[code]: int(count) for code, count in enumerate(dfg["end"]) if count},
+            dfg_window_2=dfg["window2"],
+            freq_triples=dfg["triples"],
+            parameters={heuristics_classic.Parameters.DEPENDENCY_THRESH: dependency_threshold},
+        )
+        return heuristics_net_converter.apply(heu_net)
+    if hasattr(pm4py, "discover_petri_net_heuristics"):
+        return pm4py.discover_petri_net_heuristics(event_log, dependency_threshold=dependency_threshold)
+    return heuristic_miner.apply_heu(
+        event_log,
+        dependency_threshold=dependency_threshold,
+        frequency_threshold=frequency_threshold,
+    )
+
+
+def _run_task_in_child(conn: Any, func: Callable[..., Any], args: tuple) -> None:
+    try:
+        conn.send((True, func(*args)))
+    except BaseException as exc:
+        conn.send((False, f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+def run_process_tasks(tasks: Dict[str, Tuple[Callable[..., Any], tuple]], workers: int = 1,
+                      timeout: Optional[float] = None) -> Dict[str, Tuple[str, Any]]:
+    """Run named (func, args) tasks and return name -> ("ok", result) or ("error"/"timeout", message).
+
+    With workers > 1 each task runs in its own forked process, at most `workers` at a time,
+    and is terminated once it exceeds `timeout` seconds. Otherwise tasks run in-process.
+    """
+    results: Dict[str, Tuple[str, Any]] = {}
+    if workers <= 1 or len(tasks) == 0:
+        for name, (func, args) in tasks.items():
+            try:
+                results[name] = ("ok", func(*args))
+            except Exception as exc:
+                results[name] = ("error", f"{type(exc).__name__}: {exc}")
+        return results
+    methods = multiprocessing.get_all_start_methods()
+    # Forked children inherit the event log instead of receiving a pickled copy.
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    pending = list(tasks.items())
+    running: Dict[str, Tuple[Any, Any, float]] = {}
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                name, (func, args) = pending.pop(0)
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=_run_task_in_child, args=(sender, func, args))
+                process.start()
+                sender.close()
+                running[name] = (process, receiver, time.monotonic())
+            ready = mp_connection.wait([receiver for _, receiver, _ in running.values()], timeout=0.5)
+            now = time.monotonic()
+            for name, (process, receiver, started) in list(running.items()):
+                if receiver in ready:
+                    try:
+                        ok, payload = receiver.recv()
+                        results[name] = ("ok", payload) if ok else ("error", payload)
+                    except EOFError:
+                        process.join()
+                        results[name] = ("error", f"worker exited with code {process.exitcode}")
+                elif timeout and now - started > timeout:
+                    process.terminate()
+                    results[name] = ("timeout", f"timed out after {timeout:g}s")
+                else:
+                    continue
+                process.join()
+                receiver.close()
+                del running[name]
+    finally:
+        for process, receiver, _ in running.values():
+            process.terminate()
+            process.join()
+            receiver.close()
+    return {name: results[name] for name in tasks}
+
+
+@instrumented
 def save_models(models: Dict[str, Tuple], output_dir: str) -> Dict[str, str]:
     require_pm4py()
     saved = {}
@@ -623,6 +2596,7 @@ def save_models(models: Dict[str, Tuple], output_dir: str) -> Dict[str, str]:
     return saved
 
 
+@instrumented
 def load_models(models_manifest: str) -> Dict[str, Tuple]:
     require_pm4py()
     if not os.path.isfile(models_manifest):
@@ -645,25 +2619,153 @@ def load_models(models_manifest: str) -> Dict[str, Tuple]:
     return models
 
 
+ALIGNMENT_CHECKPOINT_VERSION = 1
+
+
+def count_alignment_moves(alignment: Iterable[Any]) -> Tuple[int, int]:
+    """Return (log moves, model moves) of an alignment; silent model moves are not counted."""
+    log_moves = 0
+    model_moves = 0
+    for move in alignment:
+        if not isinstance(move, (list, tuple)) or len(move) < 2:
+            continue
+        log_move, model_move = move[0], move[1]
+        if log_move == ">>" and model_move != ">>":
+            model_moves += 1
+        elif model_move == ">>" and log_move != ">>":
+            log_moves += 1
+    return log_moves, model_moves
+
+
+def variant_event_log(sequences: List[Tuple[str, ...]]) -> object:
+    """Build an EventLog with one single-attribute trace per activity sequence."""
+    if EventLog is None:
+        raise RuntimeError("PM4Py log objects are unavailable in this environment.")
+    log = EventLog()
+    for idx, sequence in enumerate(sequences):
+        trace = Trace()
+        trace.attributes["concept:name"] = str(idx)
+        for activity in sequence:
+            trace.append(Event({"concept:name": activity}))
+        log.append(trace)
+    return log
+
+
+def align_variant_batch(sequences: List[Tuple[str, ...]], net: object, im: object, fm: object) -> List[Dict[str, Any]]:
+    """Align one representative trace per variant and keep only the per-variant figures."""
+    alignments = pm4py_conformance.conformance_diagnostics_alignments(variant_event_log(sequences), net, im, fm)
+    results = []
+    for item in alignments:
+        if not isinstance(item, dict):
+            results.append({"cost": None, "fitness": None, "log_moves": 0, "model_moves": 0})
+            continue
+        log_moves, model_moves = count_alignment_moves(item.get("alignment") or [])
+        cost, fitness = item.get("cost"), item.get("fitness")
+        results.append({
+            "cost": float(cost) if cost is not None else None,
+            "fitness": float(fitness) if fitness is not None else None,
+            "log_moves": log_moves,
+            "model_moves": model_moves,
+        })
+    return results
+
+
+def petri_net_fingerprint(net: object, im: object, fm: object) -> str:
+    """Order-independent hash of a Petri net and its markings."""
+    parts = [sorted(str(item) for item in getattr(net, attr, [])) for attr in ("places", "transitions", "arcs")]
+    parts.append(sorted(f"{place}:{count}" for place, count in dict(im).items()))
+    parts.append(sorted(f"{place}:{count}" for place, count in dict(fm).items()))
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+def variant_index_fingerprint(variant_index: Dict[str, Any]) -> str:
+    digest = hashlib.sha256()
+    for name in ("activities", "sequence_offsets", "sequence_codes"):
+        digest.update(np.ascontiguousarray(variant_index[name]).tobytes())
+    return digest.hexdigest()
+
+
+def align_variants(variant_index: Dict[str, Any], net: object, im: object, fm: object,
+                   checkpoint_dir: Optional[str] = None, workers: int = 1, batch_size: int = 200,
+                   label: str = "model") -> pd.DataFrame:
+    """Align every variant once, fanning batches out to worker processes.
+
+    Finished batches are written to checkpoint_dir, so a killed run re-aligns only
+    the batches that were not yet saved. Returns one row per variant id.
+    """
+    variant_count = len(variant_index["counts"])
+    batch_size = max(1, int(batch_size))
+    batches = [(start, min(start + batch_size, variant_count)) for start in range(0, variant_count, batch_size)]
+    results: Dict[int, List[Dict[str, Any]]] = {}
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        for batch_no in range(len(batches)):
+            path = os.path.join(checkpoint_dir, f"batch_{batch_no:06d}.json")
+            if os.path.isfile(path):
+                payload = load_json(path)
+                if len(payload.get("results", [])) == batches[batch_no][1] - batches[batch_no][0]:
+                    results[batch_no] = payload["results"]
+        if results:
+            logging.info("Resuming %s alignments: %d of %d batches already checkpointed", label, len(results), len(batches))
+    todo = [batch_no for batch_no in range(len(batches)) if batch_no not in results]
+    started = time.monotonic()
+    done_variants = 0
+    # Submit in waves so progress and checkpoints advance while the pool stays busy.
+    wave = max(1, int(workers)) * 4
+    for offset in range(0, len(todo), wave):
+        tasks = {}
+        for batch_no in todo[offset:offset + wave]:
+            start, end = batches[batch_no]
+            sequences = [variant_activities(variant_index, idx) for idx in range(start, end)]
+            tasks[batch_no] = (align_variant_batch, (sequences, net, im, fm))
+        for batch_no, (status, payload) in run_process_tasks(tasks, workers=workers).items():
+            if status != "ok":
+                raise RuntimeError(f"Alignment batch {batch_no} for {label} failed: {payload}")
+            results[batch_no] = payload
+            if checkpoint_dir:
+                save_json({"results": payload}, os.path.join(checkpoint_dir, f"batch_{batch_no:06d}.json"))
+            done_variants += batches[batch_no][1] - batches[batch_no][0]
+        elapsed = max(time.monotonic() - started, 1e-9)
+        logging.info(
+            "Aligned %d/%d new variants for %s (%.1f variants/s)",
+            done_variants,
+            sum(batches[batch_no][1] - batches[batch_no][0] for batch_no in todo),
+            label,
+            done_variants / elapsed,
+        )
+    rows = [item for batch_no in range(len(batches)) for item in results[batch_no]]
+    frame = pd.DataFrame(rows, columns=["cost", "fitness", "log_moves", "model_moves"])
+    frame.index.name = "variant_id"
+    return frame
+
+
+@instrumented
 def conformance_diagnostics(event_log: object, models: Dict[str, Tuple], output_dir: str,
-                            method: str = "alignments") -> Optional[str]:
+                            method: str = "alignments", variant_index: Optional[Dict[str, Any]] = None,
+                            workers: int = 1, batch_size: int = 200,
+                            checkpoint: bool = True, population_cases: Optional[int] = None,
+                            confidence: float = 0.95) -> Optional[str]:
+    """Write conformance metrics per model and, for alignments, per-case deviations.
+
+    Alignments depend only on the activity sequence, so they are computed once per
+    variant (see align_variants) and expanded back to cases through the variant index.
+    When event_log is a sample of population_cases cases, each row also carries the
+    estimated mean case fitness with its confidence interval.
+    """
     if not models:
         return None
-    case_ids = []
-    try:
-        for idx, trace in enumerate(event_log):
-            case_id = None
-            if hasattr(trace, "attributes"):
-                case_id = trace.attributes.get("concept:name") or trace.attributes.get("case:concept:name")
-            case_ids.append(str(case_id) if case_id is not None else str(idx))
-    except Exception:
-        case_ids = [str(idx) for idx, _ in enumerate(event_log)]
+    method_key = method.lower()
+    if method_key != "token" or token_replay is None:
+        if variant_index is None:
+            variant_index = build_variant_index(event_log)
+        log_fingerprint = variant_index_fingerprint(variant_index)
     rows = []
-    per_case_rows = []
+    per_case_frames = []
     for name, (net, im, fm) in models.items():
         try:
-            method_key = method.lower()
             if method_key == "token" and token_replay is not None:
+                if isinstance(event_log, pd.DataFrame):
+                    event_log = ensure_event_log(event_log)
                 replay = token_replay.apply(event_log, net, im, fm)
                 fitness = [item.get("fitness", 0) for item in replay if isinstance(item, dict)]
                 row = {
@@ -673,209 +2775,188 @@ def conformance_diagnostics(event_log: object, models: Dict[str, Tuple], output_
                     "avg_fitness": float(np.mean(fitness)) if fitness else 0.0,
                     "min_fitness": float(np.min(fitness)) if fitness else 0.0,
                 }
+                case_fitness = [item.get("trace_fitness", np.nan) for item in replay if isinstance(item, dict)]
                 rows.append(row)
             else:
                 if pm4py_conformance is None:
                     continue
-                alignments = pm4py_conformance.conformance_diagnostics_alignments(event_log, net, im, fm)
-                costs = [item.get("cost", 0) for item in alignments if isinstance(item, dict)]
+                checkpoint_dir = None
+                if checkpoint:
+                    key = hashlib.sha256(
+                        f"{ALIGNMENT_CHECKPOINT_VERSION}:{log_fingerprint}:{petri_net_fingerprint(net, im, fm)}:{batch_size}".encode("utf-8")
+                    ).hexdigest()
+                    checkpoint_dir = os.path.join(output_dir, "conformance_checkpoint", name, key[:16])
+                per_variant = align_variants(
+                    variant_index, net, im, fm,
+                    checkpoint_dir=checkpoint_dir, workers=workers, batch_size=batch_size, label=name,
+                )
+                case_variant = variant_index["case_variant"]
+                per_case = per_variant.iloc[case_variant].reset_index(drop=True)
+                costs = per_case["cost"].dropna().astype(float)
                 row = {
                     "model": name,
                     "method": "alignments",
-                    "cases": len(alignments),
-                    "avg_cost": float(np.mean(costs)) if costs else 0.0,
-                    "max_cost": float(np.max(costs)) if costs else 0.0,
+                    "cases": int(len(per_case)),
+                    "avg_cost": float(costs.mean()) if len(costs) else 0.0,
+                    "max_cost": float(costs.max()) if len(costs) else 0.0,
                 }
+                case_fitness = per_case["fitness"].to_numpy(dtype=float)
                 rows.append(row)
-                for idx, item in enumerate(alignments):
-                    if not isinstance(item, dict):
-                        continue
-                    alignment = item.get("alignment") or []
-                    log_moves = 0
-                    model_moves = 0
-                    for move in alignment:
-                        if not isinstance(move, (list, tuple)) or len(move) < 2:
-                            continue
-                        log_move, model_move = move[0], move[1]
-                        if log_move == ">>" and model_move != ">>":
-                            model_moves += 1
-                        elif model_move == ">>" and log_move != ">>":
-                            log_moves += 1
-                    per_case_rows.append({
-                        "model": name,
-                        "case_id": case_ids[idx] if idx < len(case_ids) else str(idx),
-                        "alignment_cost": item.get("cost"),
-                        "fitness": item.get("fitness"),
-                        "deviation_count": log_moves + model_moves,
-                        "log_move_count": log_moves,
-                        "model_move_count": model_moves,
-                    })
-        except Exception:
+                per_case_frames.append(pd.DataFrame({
+                    "model": name,
+                    "case_id": variant_index["case_ids"].astype(str),
+                    "alignment_cost": per_case["cost"].to_numpy(),
+                    "fitness": per_case["fitness"].to_numpy(),
+                    "deviation_count": (per_case["log_moves"] + per_case["model_moves"]).to_numpy(),
+                    "log_move_count": per_case["log_moves"].to_numpy(),
+                    "model_move_count": per_case["model_moves"].to_numpy(),
+                }))
+                if checkpoint_dir:
+                    shutil.rmtree(os.path.join(output_dir, "conformance_checkpoint", name), ignore_errors=True)
+            if population_cases is not None:
+                interval = mean_confidence_interval(case_fitness, population_cases, confidence)
+                row.update({
+                    "fitness_estimate": interval["estimate"],
+                    "fitness_ci_low": interval["ci_low"],
+                    "fitness_ci_high": interval["ci_high"],
+                })
+        except Exception as exc:
+            logging.warning("Conformance checking for %s model failed: %s", name, exc)
             continue
+    checkpoint_root = os.path.join(output_dir, "conformance_checkpoint")
+    if os.path.isdir(checkpoint_root) and not os.listdir(checkpoint_root):
+        os.rmdir(checkpoint_root)
     if not rows:
         return None
     df = pd.DataFrame(rows)
     path = os.path.join(output_dir, "conformance_metrics.csv")
     df.to_csv(path, index=False)
-    if per_case_rows:
-        per_case_df = pd.DataFrame(per_case_rows)
+    if per_case_frames:
+        per_case_df = pd.concat(per_case_frames, ignore_index=True)
         per_case_path = os.path.join(output_dir, "conformance_case_deviations.csv")
         per_case_df.to_csv(per_case_path, index=False)
     return path
 
 
-def evaluate_models(event_log: object, models: Dict[str, Tuple], output_dir: str) -> pd.DataFrame:
-    rows = []
-    for name, (net, im, fm) in models.items():
-        try:
+MODEL_METRICS = ["fitness", "precision", "generalisation", "simplicity", "soundness"]
+
+
+def evaluate_model_metric(metric: str, event_log: object, net: object, im: object, fm: object) -> Any:
+    """Compute one quality metric for a Petri net, NaN when the backend is missing or fails."""
+    try:
+        if metric == "fitness":
             if fitness_evaluator is not None:
                 fitness = fitness_evaluator.apply(event_log, net, im, fm)
             elif pm4py_conformance is not None:
                 fitness = pm4py_conformance.fitness_alignments(event_log, net, im, fm)
             else:
-                fitness = {"averageFitness": np.nan}
-        except Exception:
-            fitness = {"averageFitness": np.nan}
-        try:
+                return np.nan
+            if isinstance(fitness, dict):
+                for key in ("averageFitness", "log_fitness", "fitness"):
+                    if key in fitness:
+                        return fitness.get(key)
+            return fitness
+        if metric == "precision":
             if precision_evaluator is not None:
-                precision = precision_evaluator.apply(event_log, net, im, fm)
-            elif pm4py_conformance is not None:
-                precision = pm4py_conformance.precision_alignments(event_log, net, im, fm)
-            else:
-                precision = np.nan
-        except Exception:
-            precision = np.nan
-        try:
+                return precision_evaluator.apply(event_log, net, im, fm)
+            if pm4py_conformance is not None:
+                return pm4py_conformance.precision_alignments(event_log, net, im, fm)
+        elif metric == "generalisation":
             if generalization_evaluator is not None:
-                generalisation = generalization_evaluator.apply(event_log, net, im, fm)
-            elif pm4py_conformance is not None:
-                generalisation = pm4py_conformance.generalization_tbr(event_log, net, im, fm)
-            else:
-                generalisation = np.nan
-        except Exception:
-            generalisation = np.nan
-        try:
+                return generalization_evaluator.apply(event_log, net, im, fm)
+            if pm4py_conformance is not None:
+                return pm4py_conformance.generalization_tbr(event_log, net, im, fm)
+        elif metric == "simplicity":
             if simplicity_evaluator is not None:
-                simplicity = simplicity_evaluator.apply(net)
-            elif pm4py_analysis is not None:
-                simplicity = pm4py_analysis.simplicity_petri_net(net, im, fm)
-            else:
-                simplicity = np.nan
-        except Exception:
-            simplicity = np.nan
-        try:
+                return simplicity_evaluator.apply(net)
+            if pm4py_analysis is not None:
+                return pm4py_analysis.simplicity_petri_net(net, im, fm)
+        elif metric == "soundness":
             if soundness_evaluator is not None:
-                soundness = soundness_evaluator.apply(net)
-            elif pm4py_analysis is not None:
-                soundness = pm4py_analysis.check_soundness(net, im, fm)[0]
-            else:
-                soundness = np.nan
-        except Exception:
-            soundness = np.nan
-        rows.append({
-            "model": name,
-            "fitness": (
-                fitness.get("averageFitness")
-                if isinstance(fitness, dict) and "averageFitness" in fitness
-                else fitness.get("log_fitness")
-                if isinstance(fitness, dict) and "log_fitness" in fitness
-                else fitness.get("fitness")
-                if isinstance(fitness, dict) and "fitness" in fitness
-                else fitness
-            ),
-            "precision": precision,
-            "generalisation": generalisation,
-            "simplicity": simplicity,
-            "soundness": soundness,
-        })
+                return soundness_evaluator.apply(net)
+            if pm4py_analysis is not None:
+                return pm4py_analysis.check_soundness(net, im, fm)[0]
+    except Exception:
+        return np.nan
+    return np.nan
+
+
+@instrumented
+def evaluate_models(event_log: object, models: Dict[str, Tuple], output_dir: str,
+                    workers: int = 1, task_timeout: Optional[float] = None) -> pd.DataFrame:
+    # Convert once up front: every replay-based metric would otherwise convert the DataFrame itself.
+    event_log = ensure_event_log(event_log) if models else event_log
+    tasks = {
+        (name, metric): (evaluate_model_metric, (metric, event_log, net, im, fm))
+        for name, (net, im, fm) in models.items()
+        for metric in MODEL_METRICS
+    }
+    results = run_process_tasks(tasks, workers=workers, timeout=task_timeout)
+    rows = []
+    for name in models:
+        row: Dict[str, Any] = {"model": name}
+        for metric in MODEL_METRICS:
+            status, value = results[(name, metric)]
+            if status != "ok":
+                logging.warning("Metric %s for %s model failed: %s", metric, name, value)
+                value = np.nan
+            row[metric] = value
+        rows.append(row)
     df = pd.DataFrame(rows)
     df.to_csv(os.path.join(output_dir, "model_metrics.csv"), index=False)
     return df
 
 
-def performance_analysis(event_log: object, output_dir: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
-    case_durations = []
-    case_duration_by_start = []
-    sojourn_times: Dict[str, List[float]] = {}
-    for trace in event_log:
-        if not trace:
-            continue
-        start_time = trace[0]["time:timestamp"]
-        end_time = trace[-1]["time:timestamp"]
-        duration = (end_time - start_time).total_seconds() / 3600.0
-        case_durations.append(duration)
-        case_duration_by_start.append((start_time, duration))
-        for idx, event in enumerate(trace):
-            act = event["concept:name"]
-            if idx < len(trace) - 1:
-                next_time = trace[idx + 1]["time:timestamp"]
-                sojourn = (next_time - event["time:timestamp"]).total_seconds() / 3600.0
-                sojourn_times.setdefault(act, []).append(sojourn)
+@instrumented
+def performance_analysis(event_log: object, output_dir: str,
+                         charts: Optional[List[Dict[str, Any]]] = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    df = as_event_dataframe(event_log)
+    cases = case_duration_frame(df) if not df.empty else pd.DataFrame(columns=["start", "end", "duration_hours"])
+    case_durations = cases["duration_hours"].to_numpy(dtype=float)
 
     duration_df = pd.DataFrame({"case_duration_hours": case_durations})
     duration_df.to_csv(
         os.path.join(output_dir, "case_durations.csv"), index=False
     )
 
-    plt.figure(figsize=(8, 5))
-    plt.hist(case_durations, bins=30, color="salmon", edgecolor="black")
-    plt.title("Distribution of Case Durations")
-    plt.xlabel("Duration (hours)")
-    plt.ylabel("Number of Cases")
-    plt.tight_layout()
-    duration_chart = os.path.join(output_dir, "case_duration_distribution.png")
-    plt.savefig(duration_chart)
-    plt.close()
-
-    plt.figure(figsize=(6, 6))
-    plt.boxplot(case_durations, vert=True, patch_artist=True)
-    plt.title("Case Duration Boxplot")
-    plt.ylabel("Duration (hours)")
-    plt.tight_layout()
-    boxplot_path = os.path.join(output_dir, "case_duration_boxplot.png")
-    plt.savefig(boxplot_path)
-    plt.close()
-
-    if case_durations:
-        sorted_durations = [item[1] for item in sorted(case_duration_by_start, key=lambda x: x[0])]
-        mean = np.mean(sorted_durations)
-        std = np.std(sorted_durations)
-        ucl = mean + 3 * std
-        lcl = max(0.0, mean - 3 * std)
-        plt.figure(figsize=(10, 5))
-        plt.plot(sorted_durations, marker="o", linestyle="-", color="steelblue")
-        plt.axhline(mean, color="green", linestyle="--", label="Mean")
-        plt.axhline(ucl, color="red", linestyle="--", label="UCL")
-        plt.axhline(lcl, color="red", linestyle="--", label="LCL")
-        plt.title("Case Duration SPC Chart")
-        plt.xlabel("Case Index")
-        plt.ylabel("Duration (hours)")
-        plt.legend()
-        plt.tight_layout()
-        spc_path = os.path.join(output_dir, "case_duration_spc.png")
-        plt.savefig(spc_path)
-        plt.close()
+    counts, edges = np.histogram(case_durations, bins=30)
+    specs = [
+        chart_spec("case_duration_distribution", os.path.join(output_dir, "case_duration_distribution.png"), "hist",
+                   "Distribution of Case Durations", "Duration (hours)", "Number of Cases", figsize=(8, 5),
+                   edges=edges, counts=counts, color="salmon"),
+        chart_spec("case_duration_boxplot", os.path.join(output_dir, "case_duration_boxplot.png"), "box",
+                   "Case Duration Boxplot", "", "Duration (hours)", figsize=(6, 6),
+                   stats=cbook.boxplot_stats(case_durations) if len(case_durations) else []),
+    ]
+    spc_path = os.path.join(output_dir, "case_duration_spc.png")
+    if len(case_durations):
+        sorted_durations = cases.sort_values("start", kind="stable")["duration_hours"].to_numpy()
+        mean = float(np.mean(sorted_durations))
+        std = float(np.std(sorted_durations))
+        specs.append(chart_spec(
+            "case_duration_spc", spc_path, "spc", "Case Duration SPC Chart", "Case Index", "Duration (hours)",
+            figsize=(10, 5), y=sorted_durations, mean=mean, ucl=mean + 3 * std, lcl=max(0.0, mean - 3 * std),
+        ))
+
+    dfg_path = os.path.join(output_dir, "directly_follows.csv")
+    if not df.empty:
+        dfg = directly_follows_graph(df)
+        dfg_edges_frame(dfg).to_csv(dfg_path, index=False)
+        df_sojourn = activity_sojourn_stats(df, dfg)
     else:
-        spc_path = os.path.join(output_dir, "case_duration_spc.png")
-
-    avg_sojourn = {act: float(np.mean(times)) for act, times in sojourn_times.items()}
-    df_sojourn = pd.DataFrame(list(avg_sojourn.items()), columns=["activity", "avg_sojourn_hours"])
+        pd.DataFrame(columns=["from", "to", "count", "mean_hours", "median_hours", "p95_hours"]).to_csv(dfg_path, index=False)
+        df_sojourn = pd.DataFrame(columns=["activity", "avg_sojourn_hours"])
     df_sojourn.to_csv(os.path.join(output_dir, "sojourn_times.csv"), index=False)
-
-    plt.figure(figsize=(10, 6))
-    df_sojourn.sort_values("avg_sojourn_hours", ascending=False).plot.bar(
-        x="activity", y="avg_sojourn_hours", color="olive", legend=False
-    )
-    plt.title("Average Sojourn Time per Activity")
-    plt.xlabel("Activity")
-    plt.ylabel("Sojourn Time (hours)")
-    plt.xticks(rotation=45, ha="right")
-    plt.tight_layout()
-    sojourn_chart = os.path.join(output_dir, "sojourn_time_chart.png")
-    plt.savefig(sojourn_chart)
-    plt.close()
-
-    metrics = compute_case_duration_stats(event_log)
+    ranked = df_sojourn.sort_values("avg_sojourn_hours", ascending=False)
+    specs.append(chart_spec(
+        "sojourn_time_chart", os.path.join(output_dir, "sojourn_time_chart.png"), "bar",
+        "Average Sojourn Time per Activity", "Activity", "Sojourn Time (hours)",
+        x=ranked["activity"].tolist(), y=ranked["avg_sojourn_hours"].to_numpy(dtype=float),
+        color="olive", rotation=45, ha="right",
+    ))
+    chart_artifacts = _render_or_collect(specs, charts)
+
+    metrics = compute_case_duration_stats(df)
     skew_flag = None
     if metrics.get("p95_hours") and metrics.get("median_hours"):
         ratio = metrics["p95_hours"] / max(metrics["median_hours"], 0.0001)
@@ -889,60 +2970,65 @@ def performance_analysis(event_log: object, output_dir: str) -> Tuple[Dict[str,
         "p95_to_median_ratio": skew_flag,
         "recommendations": recommendations,
     }
-    return {
-        "case_duration_distribution": duration_chart,
-        "case_duration_boxplot": boxplot_path,
-        "case_duration_spc": spc_path,
-        "sojourn_time_chart": sojourn_chart,
-    }, summary
+    chart_artifacts.setdefault("case_duration_spc", spc_path)
+    chart_artifacts["directly_follows"] = dfg_path
+    return chart_artifacts, summary
 
 
+@instrumented
 def organisational_analysis(event_log: object, output_dir: str) -> str:
-    resource_key = None
+    df = as_event_dataframe(event_log)
     candidate_keys = ["org:resource", "agent_name", "adjuster_name", "user", "user_type", "resource"]
-    for trace in event_log:
-        for event in trace:
-            for key in candidate_keys:
-                if key in event and event.get(key):
-                    resource_key = key
-                    break
-            if resource_key:
-                break
-        if resource_key:
-            break
-
-    handover_counts = {}
-    for trace in event_log:
-        prev_res = None
-        for event in trace:
-            res = event.get(resource_key) if resource_key else None
-            if prev_res and res and res != prev_res:
-                key = (prev_res, res)
-                handover_counts[key] = handover_counts.get(key, 0) + 1
-            prev_res = res
-    df_handovers = pd.DataFrame([
-        {"from": k[0], "to": k[1], "count": v}
-        for k, v in handover_counts.items()
-    ])
+    resource_key = detect_resource_column(df, candidate_keys)
+    if resource_key:
+        df_handovers = handover_counts(df, resource_key)
+    else:
+        df_handovers = pd.DataFrame(columns=["from", "to", "count"])
     output_path = os.path.join(output_dir, "handover_of_work.csv")
     df_handovers.to_csv(output_path, index=False)
+    matrix = df_handovers.pivot_table(index="from", columns="to", values="count", aggfunc="sum", fill_value=0)
+    matrix.to_csv(os.path.join(output_dir, "handover_of_work_matrix.csv"))
+    agent_performance = agent_performance_summary(df)
+    agent_performance_path = os.path.join(output_dir, "agent_performance_summary.csv")
+    if agent_performance is not None:
+        agent_performance.to_csv(agent_performance_path, index=False)
+    elif os.path.isfile(agent_performance_path):
+        os.remove(agent_performance_path)
     return output_path
 
 
-def compute_start_end(event_log: object) -> Dict[str, Dict[str, int]]:
-    if start_activities_get is None or end_activities_get is None:
-        raise RuntimeError("PM4Py start/end activity helpers are unavailable in this environment.")
-    start_fn = (
-        start_activities_get.get_start_activities
-        if hasattr(start_activities_get, "get_start_activities")
-        else start_activities_get
-    )
-    end_fn = (
-        end_activities_get.get_end_activities
-        if hasattr(end_activities_get, "get_end_activities")
-        else end_activities_get
+@instrumented
+def agent_performance_summary(event_log: object) -> Optional[pd.DataFrame]:
+    """Case duration statistics per primary agent (the org:resource with most events in the case).
+
+    Returns None when the log has no org:resource column.
+    """
+    df = as_event_dataframe(event_log)
+    if not {"case:concept:name", "time:timestamp", "org:resource"}.issubset(df.columns):
+        return None
+    case_times = df.groupby("case:concept:name")["time:timestamp"].agg(["min", "max"])
+    case_times["duration_hours"] = (case_times["max"] - case_times["min"]).dt.total_seconds() / 3600.0
+    agent_counts = df.groupby(["case:concept:name", "org:resource"]).size().reset_index(name="event_count")
+    agent_counts["rank"] = agent_counts.groupby("case:concept:name")["event_count"].rank(method="first", ascending=False)
+    primary_agent = agent_counts[agent_counts["rank"] == 1][["case:concept:name", "org:resource"]]
+    case_with_agent = case_times.join(primary_agent.set_index("case:concept:name"), how="left").dropna(subset=["org:resource"])
+    return (
+        case_with_agent.groupby("org:resource")["duration_hours"]
+        .agg(case_count="count", mean_hours="mean", median_hours="median", p90_hours=lambda x: x.quantile(0.9))
+        .sort_values("mean_hours", ascending=False)
+        .reset_index()
     )
-    return {
-        "start_activities": start_fn(event_log),
-        "end_activities": end_fn(event_log),
-    }
+
+
+@instrumented
+def compute_start_end(event_log: object) -> Dict[str, Dict[str, int]]:
+    """Start and end activity counts per activity, in order of first appearance."""
+    df = as_event_dataframe(event_log)
+    if df.empty:
+        return {"start_activities": {}, "end_activities": {}}
+    grouped = df.groupby("case:concept:name", sort=False)["concept:name"]
+    result = {}
+    for name, activities in (("start_activities", grouped.first()), ("end_activities", grouped.last())):
+        counts = activities.groupby(activities, sort=False).size()
+        result[name] = {activity: int(count) for activity, count in counts.items()}
+    return result
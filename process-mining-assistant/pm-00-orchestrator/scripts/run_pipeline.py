@@ -6,7 +6,7 @@ import logging
 import os
 import sys
 import subprocess
-from typing import Dict
+from typing import Any, Callable, Dict, List, Optional
 
 import pandas as pd
 
@@ -17,38 +17,86 @@ if COMMON_DIR not in sys.path:
     sys.path.insert(0, COMMON_DIR)
 
 from common import (
+    cached_file_hash,
+    compute_fingerprint,
+    downstream_stages,
+    ensure_cache_dir,
     ensure_output_dir,
     exit_with_error,
+    file_hash,
+    instrument,
     load_config,
+    load_json,
     merge_config,
     parse_list,
+    read_stage_state,
+    record_stage_entry,
     require_file,
+    reusable_stage_entry,
     save_json,
     setup_logging,
+    start_profiler,
     write_manifest,
+    write_stage_state,
     ExitCodes,
 )
+import process_mining_steps
 from process_mining_steps import (
+    STREAM_MODES,
     apply_filters,
+    as_event_dataframe,
+    build_variant_index,
     clean_event_log,
+    close_stream_cases,
     compute_arrival_metrics,
     compute_start_end,
     compute_statistics,
     compute_variant_stats,
-    convert_dataframe_to_event_log,
     discover_models,
     evaluate_models,
     load_event_log,
     load_csv_dataframe,
-    log_to_dataframe,
+    load_models,
+    load_stream_state,
     organisational_analysis,
     performance_analysis,
     plot_activity_distributions,
+    read_appended_chunks,
+    read_columnar_cache,
+    render_charts,
     run_data_quality_checks,
     save_models,
+    save_stream_state,
+    save_variant_index,
+    stream_summary,
+    update_stream_aggregates,
+    write_columnar_cache,
+    write_stream_outputs,
 )
 
 
+# Stage -> upstream stages. Dict order is a valid execution order.
+PIPELINE_DAG: Dict[str, List[str]] = {
+    "load": [],
+    "summary": ["load"],
+    "discover": ["load"],
+    "evaluate": ["load", "discover"],
+    "performance": ["load"],
+    "org": ["load"],
+    "report": ["load", "summary", "evaluate", "performance"],
+}
+
+STAGE_PARAM_KEYS: Dict[str, List[str]] = {
+    "summary": ["chart_format"],
+    "performance": ["chart_format"],
+    "discover": ["noise_threshold", "dependency_threshold", "frequency_threshold", "miner_selection", "variant_noise_threshold"],
+}
+
+# Parameters that never change results; every other parameter feeds the load stage fingerprint.
+RUN_CONTROL_KEYS = {"file", "output", "config", "verbose", "workers", "task_timeout", "no_cache", "incremental", "force", "profile",
+                    "chart_workers", "stream", "stream_mode", "closing_activities", "case_timeout_hours"}
+
+
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="End-to-end process mining CLI pipeline.")
     parser.add_argument("--file", required=True, help="Path to the event log file (CSV or XES).")
@@ -63,6 +111,8 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--frequency-threshold", type=float, default=0.0, help="Frequency threshold for heuristic miner.")
     parser.add_argument("--miner-selection", choices=["auto", "inductive", "heuristic", "both"], help="Miner selection strategy.")
     parser.add_argument("--variant-noise-threshold", type=float, help="Variant frequency threshold for auto selection.")
+    parser.add_argument("--workers", type=int, help="Processes for parallel discovery/evaluation tasks (default: 1, in-process).")
+    parser.add_argument("--task-timeout", type=float, help="Seconds before a discovery or metric task is abandoned (with --workers > 1).")
     parser.add_argument("--start-activities", help="Comma-separated start activities to retain.")
     parser.add_argument("--end-activities", help="Comma-separated end activities to retain.")
     parser.add_argument("--missing-value-threshold", type=float, help="Missing value threshold for dropping/imputation.")
@@ -87,6 +137,25 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--mask-strategy", choices=["hash", "redact", "tokenize"], help="Masking strategy for sensitive columns.")
     parser.add_argument("--mask-salt", help="Optional salt for hash masking.")
     parser.add_argument("--lifecycle-column", default="lifecycle:transition", help="Lifecycle column name for summaries.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the columnar event log cache under <output>/cache.")
+    parser.add_argument("--xes-engine", choices=["stream", "pm4py"],
+                        help="XES reader: streaming iterparse (default) or the pm4py importer.")
+    parser.add_argument("--chart-format", choices=["png", "data"],
+                        help="png (default) renders charts; data skips raster output and writes each chart's series as JSON.")
+    parser.add_argument("--chart-workers", type=int, help="Processes used to render charts (default: 1).")
+    parser.add_argument("--incremental", action="store_true", default=None,
+                        help="Skip stages whose input fingerprint matches the previous run and reuse their artifacts.")
+    parser.add_argument("--force", action="append", choices=list(PIPELINE_DAG),
+                        help="Re-run this stage and everything downstream of it (repeatable, with --incremental).")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for the whole run next to manifest.json.")
+    parser.add_argument("--stream", action="store_true", default=None,
+                        help="Fold only newly appended CSV events into <output>/stream_state and refresh summary and report.")
+    parser.add_argument("--stream-mode", choices=list(STREAM_MODES),
+                        help="offset (default) reads bytes past the last ingested offset; watermark keeps events newer than the last timestamp.")
+    parser.add_argument("--closing-activities", help="Comma-separated activities that complete a case (with --stream).")
+    parser.add_argument("--case-timeout-hours", type=float,
+                        help="Close cases idle this long before the newest event (with --stream).")
     parser.add_argument("--config", help="Optional JSON/YAML config file.")
     parser.add_argument("-v", "--verbose", action="count", default=0, help="Increase logging verbosity.")
     return parser.parse_args()
@@ -154,21 +223,69 @@ def generate_report(stats: Dict[str, int],
         handle.write("The output directory includes plots and CSVs for variants, activity distributions, case durations, sojourn times, and organisational handovers. Use these artifacts to identify bottlenecks, deviations, and improvement opportunities.\n")
 
 
-def main() -> None:
-    args = parse_arguments()
-    setup_logging(args.verbose)
-    run_env_detection(args.output)
-    try:
-        require_file(args.file)
-        config = load_config(args.config)
-        params = merge_config(args, config)
-        ensure_output_dir(params["output"])
-    except Exception as exc:
-        exit_with_error(str(exc))
+def stage_fingerprints(params: Dict[str, Any], source_sha256: str) -> Dict[str, str]:
+    """Fingerprint each stage from its parameters, its code and its upstream fingerprints."""
+    claimed = {key for keys in STAGE_PARAM_KEYS.values() for key in keys} | RUN_CONTROL_KEYS
+    steps_sha256 = file_hash(process_mining_steps.__file__)
+    pipeline_sha256 = file_hash(os.path.abspath(__file__))
+    fingerprints: Dict[str, str] = {}
+    for stage, upstream in PIPELINE_DAG.items():
+        if stage == "load":
+            stage_params = {key: value for key, value in params.items() if key not in claimed}
+        else:
+            stage_params = {key: params.get(key) for key in STAGE_PARAM_KEYS.get(stage, [])}
+        fingerprints[stage] = compute_fingerprint({
+            "stage": stage,
+            "params": stage_params,
+            "source_sha256": source_sha256 if stage == "load" else None,
+            # The report template lives in this script; every other stage is defined by the steps module.
+            "code_sha256": pipeline_sha256 if stage == "report" else steps_sha256,
+            "upstream": [fingerprints[name] for name in upstream],
+        })
+    return fingerprints
+
+
+class StageRunner:
+    """Record stage fingerprints in <output>/stage_state.json and decide which stages can be reused."""
+
+    def __init__(self, output_dir: str, fingerprints: Dict[str, str], incremental: bool, forced: List[str]):
+        self.output_dir = output_dir
+        self.fingerprints = fingerprints
+        self.incremental = incremental
+        self.forced = set(downstream_stages(PIPELINE_DAG, forced))
+        self.state = read_stage_state(output_dir)
+        self.statuses: Dict[str, str] = {}
+
+    def reuse(self, stage: str) -> Optional[Dict[str, Any]]:
+        if not self.incremental or stage in self.forced:
+            return None
+        entry = reusable_stage_entry(self.state, stage, self.fingerprints[stage])
+        if entry is not None:
+            self.statuses[stage] = "reused"
+            logging.info("Stage %s is up to date; reusing its artifacts.", stage)
+        return entry
+
+    def record(self, stage: str, artifacts: Dict[str, str], result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        record_stage_entry(self.state, stage, self.fingerprints[stage], artifacts, result)
+        write_stage_state(self.output_dir, self.state)
+        self.statuses[stage] = "ran"
+        return self.state["pipeline_stages"][stage]
+
+    def run(self, stage: str, compute: Callable[[], Any]) -> Dict[str, Any]:
+        """Return the reusable entry for stage, or run compute() -> (artifacts, result) and record it."""
+        entry = self.reuse(stage)
+        if entry is not None:
+            return entry
+        with instrument(f"stage:{stage}"):
+            artifacts, result = compute()
+        return self.record(stage, artifacts, result)
+
 
+def load_and_filter(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Ingest, quality-check and filter the log; returns the EventLog plus data quality outputs."""
     data_quality = {}
     quality_recommendations = {}
-    data_quality_path = None
+    artifacts = {}
     try:
         if params["format"] == "csv":
             df = load_csv_dataframe(
@@ -183,11 +300,12 @@ def main() -> None:
                 timestamp_timezone=params.get("timestamp_timezone"),
             )
             df, data_quality, quality_recommendations = run_data_quality_checks(df, params)
-            data_quality_path = os.path.join(params["output"], "data_quality.json")
-            save_json(data_quality, data_quality_path)
+            artifacts["data_quality"] = os.path.join(params["output"], "data_quality.json")
+            save_json(data_quality, artifacts["data_quality"])
             if quality_recommendations:
-                save_json(quality_recommendations, os.path.join(params["output"], "data_quality_recommendations.json"))
-            event_log = convert_dataframe_to_event_log(df)
+                artifacts["data_quality_recommendations"] = os.path.join(params["output"], "data_quality_recommendations.json")
+                save_json(quality_recommendations, artifacts["data_quality_recommendations"])
+            event_log = df
         else:
             event_log = load_event_log(
                 params["file"],
@@ -200,6 +318,8 @@ def main() -> None:
                 timestamp_dayfirst=bool(params.get("timestamp_dayfirst", False)),
                 timestamp_utc=params.get("timestamp_utc"),
                 timestamp_timezone=params.get("timestamp_timezone"),
+                cache_dir=None if params.get("no_cache") else ensure_cache_dir(params["output"]),
+                xes_engine=params.get("xes_engine") or "stream",
             )
         event_log = clean_event_log(event_log)
         event_log = apply_filters(
@@ -216,53 +336,216 @@ def main() -> None:
         exit_with_error(f"Validation error: {exc}", ExitCodes.MISSING_VALUES_ERROR)
     except Exception as exc:
         exit_with_error(f"Failed to load or filter event log: {exc}", ExitCodes.RUNTIME_ERROR)
+    return {"event_log": event_log, "data_quality": data_quality, "artifacts": artifacts}
+
+
+def stream_refresh(params: Dict[str, Any]) -> None:
+    """Fold newly appended events into the persisted aggregates and regenerate summary and report from them."""
+    closing_activities = parse_list(params.get("closing_activities")) or []
+    case_timeout_hours = params.get("case_timeout_hours")
+    if params["format"] != "csv":
+        exit_with_error("--stream supports CSV input only.")
+    if not closing_activities and case_timeout_hours is None:
+        exit_with_error("--stream needs --closing-activities and/or --case-timeout-hours to decide when cases end.")
+    output_dir = params["output"]
+    state_dir = os.path.join(output_dir, "stream_state")
+    state = load_stream_state(state_dir)
+    try:
+        chunks, source = read_appended_chunks(
+            params["file"],
+            state,
+            params["case"],
+            params["activity"],
+            params["timestamp"],
+            mode=params.get("stream_mode", "offset"),
+            resource_col=params.get("resource"),
+            timestamp_format=params.get("timestamp_format"),
+            timestamp_dayfirst=bool(params.get("timestamp_dayfirst", False)),
+            timestamp_utc=params.get("timestamp_utc"),
+            timestamp_timezone=params.get("timestamp_timezone"),
+        )
+        events_before = state["events"]
+        with instrument("stream:aggregate"):
+            for chunk in chunks:
+                update_stream_aggregates(state, chunk)
+        closed = close_stream_cases(state, closing_activities, case_timeout_hours)
+    except ValueError as exc:
+        exit_with_error(f"Validation error: {exc}")
+    state["source"] = source
+    save_stream_state(state, state_dir)
+    logging.info("Folded %d new events; closed %d cases, %d still open.",
+                 state["events"] - events_before, closed, len(state["open_cases"]))
+
+    summary = stream_summary(state)
+    artifacts = write_stream_outputs(state, output_dir)
+    artifacts["summary_stats"] = os.path.join(output_dir, "summary_stats.json")
+    save_json(summary, artifacts["summary_stats"])
+    metrics_path = os.path.join(output_dir, "model_metrics.csv")
+    artifacts["report"] = os.path.join(output_dir, "process_mining_report.md")
+    generate_report(
+        summary["stats"],
+        pd.read_csv(metrics_path) if os.path.isfile(metrics_path) else pd.DataFrame(),
+        summary["arrival_metrics"],
+        summary["start_end"],
+        load_json(os.path.join(output_dir, "data_quality.json")),
+        {"duration_stats": summary["duration_stats"]},
+        output_dir,
+        artifacts["report"],
+    )
+    artifacts["stream_state"] = os.path.join(state_dir, "aggregates.json")
+    write_manifest(output_dir, params, artifacts)
 
-    stats = compute_statistics(event_log)
-    start_end = compute_start_end(event_log)
-    arrival_metrics = compute_arrival_metrics(event_log)
-    save_json({"stats": stats, "arrival_metrics": arrival_metrics, "start_end": start_end},
-              os.path.join(params["output"], "summary_stats.json"))
 
-    df = log_to_dataframe(event_log)
-    dist_artifacts = plot_activity_distributions(df, params["output"])
-    variant_artifacts = compute_variant_stats(event_log, params["output"], top_n=10)
+def main() -> None:
+    args = parse_arguments()
+    setup_logging(args.verbose)
+    run_env_detection(args.output)
+    try:
+        require_file(args.file)
+        config = load_config(args.config)
+        params = merge_config(args, config)
+        ensure_output_dir(params["output"])
+        start_profiler(params.get("profile"))
+    except Exception as exc:
+        exit_with_error(str(exc))
+
+    if params.get("stream"):
+        stream_refresh(params)
+        return
 
-    models = discover_models(
-        event_log,
+    cache_dir = None if params.get("no_cache") else ensure_cache_dir(params["output"])
+    source_sha256 = (
+        cached_file_hash(params["file"], os.path.join(cache_dir, "hash_index.json")) if cache_dir else file_hash(params["file"])
+    )
+    fingerprints = stage_fingerprints(params, source_sha256)
+    runner = StageRunner(
         params["output"],
-        params["noise_threshold"],
-        params["dependency_threshold"],
-        params["frequency_threshold"],
-        params.get("miner_selection", "auto"),
-        float(params.get("variant_noise_threshold", 0.01)),
+        fingerprints,
+        incremental=bool(params.get("incremental")),
+        forced=parse_list(params.get("force")) or [],
     )
-    saved_models = save_models(models, params["output"])
-    model_metrics = evaluate_models(event_log, models, params["output"])
-    perf_artifacts, perf_summary = performance_analysis(event_log, params["output"])
-    if perf_summary.get("recommendations"):
-        save_json(perf_summary, os.path.join(params["output"], "performance_summary.json"))
-    org_artifact = organisational_analysis(event_log, params["output"])
-
-    report_path = os.path.join(params["output"], "process_mining_report.md")
-    generate_report(stats, model_metrics, arrival_metrics, start_end, data_quality, perf_summary, params["output"], report_path)
-
-    artifacts = {
-        **dist_artifacts,
-        **variant_artifacts,
-        **perf_artifacts,
-        "org_handover": org_artifact,
-        "model_metrics": os.path.join(params["output"], "model_metrics.csv"),
-        "report": report_path,
-    }
-    if saved_models:
-        artifacts["models_manifest"] = os.path.join(params["output"], "models_manifest.json")
-    if data_quality_path:
-        artifacts["data_quality"] = data_quality_path
-    if quality_recommendations:
-        artifacts["data_quality_recommendations"] = os.path.join(params["output"], "data_quality_recommendations.json")
-    if perf_summary.get("recommendations"):
-        artifacts["performance_summary"] = os.path.join(params["output"], "performance_summary.json")
-    write_manifest(params["output"], params, artifacts)
+    workers = int(params.get("workers", 1))
+    chart_format = params.get("chart_format", "png")
+    chart_workers = int(params.get("chart_workers", 1))
+    data: Dict[str, Any] = {}
+
+    load_entry = runner.reuse("load") if cache_dir else None
+    if load_entry is None:
+        with instrument("stage:load"):
+            loaded = load_and_filter(params)
+            data["df"] = as_event_dataframe(loaded["event_log"])
+            data["event_log"] = data["df"]
+        load_artifacts = dict(loaded["artifacts"])
+        if cache_dir:
+            # Persist the filtered log so later runs can skip ingest while re-running downstream stages.
+            entry_dir = write_columnar_cache(
+                data["df"],
+                cache_dir,
+                fingerprints["load"],
+                {"source_path": "pipeline:" + os.path.abspath(params["output"])},
+            )
+            load_artifacts["filtered_log_cache"] = os.path.join(entry_dir, "meta.json")
+        load_entry = runner.record("load", load_artifacts, {"data_quality": loaded["data_quality"]})
+
+    def event_df() -> pd.DataFrame:
+        if "df" not in data:
+            data["df"] = read_columnar_cache(cache_dir, fingerprints["load"])
+        return data["df"]
+
+    def event_log() -> pd.DataFrame:
+        if "event_log" not in data:
+            data["event_log"] = event_df()
+        return data["event_log"]
+
+    def run_summary():
+        df = event_df()
+        variant_index = build_variant_index(df)
+        data["variant_index"] = variant_index
+        variant_index_path = save_variant_index(variant_index, os.path.join(params["output"], "variant_index.npz"))
+        summary = {
+            "stats": compute_statistics(df, variant_index),
+            "start_end": compute_start_end(event_log()),
+            "arrival_metrics": compute_arrival_metrics(df),
+        }
+        summary_path = os.path.join(params["output"], "summary_stats.json")
+        save_json(summary, summary_path)
+        charts: List[Dict[str, Any]] = []
+        artifacts = {
+            **plot_activity_distributions(df, params["output"], charts=charts),
+            **compute_variant_stats(df, params["output"], top_n=10, variant_index=variant_index, charts=charts),
+            **render_charts(charts, chart_format=chart_format, workers=chart_workers),
+            "variant_index": variant_index_path,
+            "summary_stats": summary_path,
+        }
+        return artifacts, summary
+
+    summary_entry = runner.run("summary", run_summary)
+
+    def run_discover():
+        models = discover_models(
+            event_log(),
+            params["output"],
+            params["noise_threshold"],
+            params["dependency_threshold"],
+            params["frequency_threshold"],
+            params.get("miner_selection", "auto"),
+            float(params.get("variant_noise_threshold", 0.01)),
+            variant_index=data.get("variant_index") or build_variant_index(event_df()),
+            workers=workers,
+            task_timeout=params.get("task_timeout"),
+        )
+        data["models"] = models
+        saved_models = save_models(models, params["output"])
+        artifacts = {f"{name}_pnml": path for name, path in saved_models.items()}
+        if saved_models:
+            artifacts["models_manifest"] = os.path.join(params["output"], "models_manifest.json")
+        return artifacts, {}
+
+    runner.run("discover", run_discover)
+
+    def run_evaluate():
+        models = data.get("models")
+        if models is None:
+            models = load_models(os.path.join(params["output"], "models_manifest.json"))
+        evaluate_models(event_log(), models, params["output"], workers=workers, task_timeout=params.get("task_timeout"))
+        return {"model_metrics": os.path.join(params["output"], "model_metrics.csv")}, {}
+
+    evaluate_entry = runner.run("evaluate", run_evaluate)
+
+    def run_performance():
+        charts: List[Dict[str, Any]] = []
+        perf_artifacts, perf_summary = performance_analysis(event_df(), params["output"], charts=charts)
+        perf_artifacts.update(render_charts(charts, chart_format=chart_format, workers=chart_workers))
+        if perf_summary.get("recommendations"):
+            perf_artifacts["performance_summary"] = os.path.join(params["output"], "performance_summary.json")
+            save_json(perf_summary, perf_artifacts["performance_summary"])
+        return perf_artifacts, perf_summary
+
+    perf_entry = runner.run("performance", run_performance)
+    runner.run("org", lambda: ({"org_handover": organisational_analysis(event_df(), params["output"])}, {}))
+
+    def run_report():
+        summary = summary_entry["result"]
+        report_path = os.path.join(params["output"], "process_mining_report.md")
+        generate_report(
+            summary["stats"],
+            pd.read_csv(evaluate_entry["artifacts"]["model_metrics"]),
+            summary["arrival_metrics"],
+            summary["start_end"],
+            load_entry["result"].get("data_quality", {}),
+            perf_entry["result"],
+            params["output"],
+            report_path,
+        )
+        return {"report": report_path}, {}
+
+    runner.run("report", run_report)
+
+    artifacts: Dict[str, str] = {}
+    for stage in PIPELINE_DAG:
+        artifacts.update(runner.state["pipeline_stages"][stage]["artifacts"])
+    artifacts.pop("filtered_log_cache", None)
+    write_manifest(params["output"], params, artifacts, stages=runner.statuses)
 
     logging.info("Process mining analysis complete. Results saved in %s", params["output"])
 
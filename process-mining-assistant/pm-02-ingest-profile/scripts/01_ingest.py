@@ -5,8 +5,6 @@ import argparse
 import os
 import sys
 
-import pandas as pd
-
 COMMON_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
 )
@@ -17,8 +15,8 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, record_stage_failure, require_file, save_json, write_stage_manifest
-from process_mining_steps import load_event_log, log_to_dataframe, require_pm4py
+from common import ensure_cache_dir, ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, parse_list, record_stage_failure, require_file, save_json, start_profiler, write_stage_manifest
+from process_mining_steps import export_xes, load_event_log, normalize_timestamps, persist_parsed_timestamps, stream_csv_to_cache
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -33,18 +31,94 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--timestamp-dayfirst", action="store_true", help="Parse timestamps with day-first format.")
     parser.add_argument("--timestamp-utc", action="store_true", help="Parse timestamps as UTC.")
     parser.add_argument("--timestamp-timezone", help="Timezone to localize/convert timestamps.")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Chunked CSV ingest with bounded memory; writes the cache and CSV but skips the XES export.")
+    parser.add_argument("--chunk-rows", type=int, help="Rows per CSV chunk in streaming mode (default: sized from --max-memory-mb).")
+    parser.add_argument("--max-memory-mb", type=float, default=2048, help="Peak RSS ceiling in MB for streaming mode.")
+    parser.add_argument("--keep-columns", help="Comma-separated extra columns to keep in streaming mode (default: all).")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the columnar event log cache under <output>/cache.")
+    parser.add_argument("--xes-engine", choices=["stream", "pm4py"], default="stream",
+                        help="XES reader/writer: streaming iterparse (default) or the pm4py importer/exporter.")
+    parser.add_argument("--xes-gzip", action="store_true", help="Write normalised_log.xes.gz instead of plain XES.")
     parser.add_argument("--output", default="output", help="Output directory.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
 
+def run_streaming_ingest(args: argparse.Namespace, stage_dir: str) -> None:
+    cache_dir = ensure_cache_dir(args.output)
+    csv_path = os.path.join(stage_dir, "normalised_log.csv")
+    ingest_profile, sample = stream_csv_to_cache(
+        args.file,
+        args.case,
+        args.activity,
+        args.timestamp,
+        cache_dir,
+        resource_col=args.resource,
+        timestamp_format=args.timestamp_format,
+        timestamp_dayfirst=args.timestamp_dayfirst,
+        timestamp_utc=args.timestamp_utc,
+        timestamp_timezone=args.timestamp_timezone,
+        keep_columns=parse_list(args.keep_columns),
+        chunk_rows=args.chunk_rows,
+        max_memory_mb=args.max_memory_mb,
+        csv_output=csv_path,
+    )
+    sample.to_csv(os.path.join(stage_dir, "sample_rows.csv"), index=False)
+    profile_path = os.path.join(stage_dir, "ingest_profile.json")
+    save_json(ingest_profile, profile_path)
+    notebook_path = ensure_notebook(
+        args.output,
+        args.notebook_revision,
+        "01_ingest_profile.ipynb",
+        "Ingest and Profile",
+        context_lines=[
+            "",
+            f"- Input: {args.file}",
+            f"- Format: {args.format} (streaming, {ingest_profile['partitions']} case partitions)",
+            f"- Rows: {ingest_profile['row_count']}",
+            f"- Columns: {ingest_profile['column_count']}",
+        ],
+        code_lines=[
+            "import pandas as pd",
+            f"df = pd.read_csv(r\"{csv_path}\")",
+            "df.head()",
+        ],
+    )
+    artifacts = {
+        "normalised_log_csv": csv_path,
+        "sample_rows_csv": os.path.join(stage_dir, "sample_rows.csv"),
+        "ingest_profile_json": profile_path,
+        "event_log_cache_dir": ingest_profile["cache_entry"],
+    }
+    write_stage_manifest(
+        stage_dir,
+        vars(args),
+        artifacts,
+        args.notebook_revision,
+        notebook_path=notebook_path,
+        notes="Streaming ingest: events ordered by case hash partition, then case and timestamp; XES export skipped.",
+    )
+
+
 def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_01_ingest_profile")
+    start_profiler(args.profile)
     try:
         require_file(args.file)
-        event_log = load_event_log(
+        if args.streaming:
+            if args.format != "csv":
+                raise ValueError("--streaming supports CSV input only.")
+            if args.no_cache:
+                raise ValueError("--streaming writes the columnar cache and cannot be combined with --no-cache.")
+            run_streaming_ingest(args, stage_dir)
+            return
+        cache_dir = None if args.no_cache else ensure_cache_dir(args.output)
+        df = load_event_log(
             args.file,
             args.format,
             args.case,
@@ -55,9 +129,12 @@ def main() -> None:
             timestamp_dayfirst=args.timestamp_dayfirst,
             timestamp_utc=args.timestamp_utc,
             timestamp_timezone=args.timestamp_timezone,
+            cache_dir=cache_dir,
+            xes_engine=args.xes_engine,
         )
-        df = log_to_dataframe(event_log)
         df.to_csv(os.path.join(stage_dir, "normalised_log.csv"), index=False)
+        if cache_dir:
+            persist_parsed_timestamps(df, os.path.join(stage_dir, "normalised_log.csv"), cache_dir)
         df.head(50).to_csv(os.path.join(stage_dir, "sample_rows.csv"), index=False)
         ingest_profile = {
             "row_count": int(len(df)),
@@ -68,14 +145,12 @@ def main() -> None:
             "duplicate_rate": float(df.duplicated().mean()),
         }
         if "time:timestamp" in df.columns:
-            parsed = pd.to_datetime(df["time:timestamp"], errors="coerce")
+            parsed = normalize_timestamps(df["time:timestamp"])
             ingest_profile["timestamp_parse_failure_rate"] = float(parsed.isna().mean())
         profile_path = os.path.join(stage_dir, "ingest_profile.json")
         save_json(ingest_profile, profile_path)
-        require_pm4py()
-        import pm4py
-        normalised_xes = os.path.join(stage_dir, "normalised_log.xes")
-        pm4py.write_xes(event_log, normalised_xes)
+        normalised_xes = os.path.join(stage_dir, "normalised_log.xes.gz" if args.xes_gzip else "normalised_log.xes")
+        export_xes(df, normalised_xes, engine=args.xes_engine)
         notebook_path = ensure_notebook(
             args.output,
             args.notebook_revision,
@@ -100,6 +175,8 @@ def main() -> None:
             "sample_rows_csv": os.path.join(stage_dir, "sample_rows.csv"),
             "ingest_profile_json": profile_path,
         }
+        if cache_dir:
+            artifacts["event_log_cache_dir"] = os.path.join(cache_dir, "event_logs")
         write_stage_manifest(
             stage_dir,
             vars(args),
@@ -3,8 +3,11 @@
 
 import argparse
 import os
+import shutil
 import sys
-from typing import Any, Dict, List
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import pandas as pd
 
@@ -18,14 +21,34 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, load_json, record_stage_failure, save_json, write_stage_manifest
-from process_mining_steps import load_csv_dataframe
+from common import ensure_cache_dir, ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, load_json, record_stage_failure, save_json, start_profiler, write_stage_manifest
+from process_mining_steps import (
+    REQUIRED_EVENT_COLUMNS,
+    commit_columnar_cache,
+    csv_column_plan,
+    event_log_cache_key,
+    event_log_cache_options,
+    iter_csv_chunks,
+    load_csv_dataframe,
+    stream_event_partitions,
+)
+
+STANDARD_COLUMNS = ["case:concept:name", "concept:name", "time:timestamp", "org:resource"]
 
 
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Multi-source ingest using a JSON config.")
     parser.add_argument("--config", required=True, help="Path to multi-source ingest config (JSON).")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Chunked ingest with bounded memory (merge.strategy=concat only); also writes the columnar cache.")
+    parser.add_argument("--chunk-rows", type=int, default=500_000, help="Rows per CSV chunk in streaming mode.")
+    parser.add_argument("--max-memory-mb", type=float, default=2048, help="Peak RSS ceiling in MB for streaming mode.")
+    parser.add_argument("--partitions", type=int, default=8,
+                        help="Hash partitions spilled to disk in streaming mode and for merge.strategy=join.")
+    parser.add_argument("--workers", type=int, help="Processes used to load sources (default: one per source, up to CPU count).")
     parser.add_argument("--output", default="output", help="Output directory.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -43,43 +66,190 @@ def add_prefix(df: pd.DataFrame, prefix: str, exclude: List[str]) -> pd.DataFram
     return df.rename(columns=rename)
 
 
+def join_columns(df: pd.DataFrame, columns: List[str], delimiter: str) -> pd.Series:
+    """Vectorized row-wise join of column values; missing values render as "nan"."""
+    parts = [df[col].astype(str).fillna("nan") for col in columns]
+    if len(parts) == 1:
+        return parts[0]
+    return parts[0].str.cat(parts[1:], sep=delimiter)
+
+
 def build_event_id(df: pd.DataFrame, columns: List[str], delimiter: str) -> pd.DataFrame:
     if not columns:
         return df
     existing = [col for col in columns if col in df.columns]
     if not existing:
         return df
-    df["event_id"] = df[existing].astype(str).agg(delimiter.join, axis=1)
+    df["event_id"] = join_columns(df, existing, delimiter)
     return df
 
 
 def ingest_source(source: Dict[str, Any]) -> pd.DataFrame:
-    path = source["path"]
-    fmt = source.get("format", "csv")
-    if fmt != "csv":
-        raise ValueError(f"Unsupported format for multi-source ingest: {fmt}")
-    case_col = source.get("case", "case:concept:name")
-    activity_col = source.get("activity", "concept:name")
-    timestamp_col = source.get("timestamp", "time:timestamp")
-    resource_col = source.get("resource")
+    mapping = source_mapping(source)
     df = load_csv_dataframe(
-        path,
-        case_col,
-        activity_col,
-        timestamp_col,
-        resource_col=resource_col,
+        source["path"],
+        mapping["case_col"],
+        mapping["activity_col"],
+        mapping["timestamp_col"],
+        resource_col=mapping["resource_col"],
         timestamp_format=source.get("timestamp_format"),
         timestamp_dayfirst=bool(source.get("timestamp_dayfirst", False)),
         timestamp_utc=source.get("timestamp_utc"),
         timestamp_timezone=source.get("timestamp_timezone"),
     )
+    return transform_source_frame(df, source)
+
+
+def transform_source_frame(df: pd.DataFrame, source: Dict[str, Any]) -> pd.DataFrame:
     df = apply_column_map(df, source.get("column_map", {}))
-    df = add_prefix(df, source.get("prefix", ""), ["case:concept:name", "concept:name", "time:timestamp", "org:resource"])
-    df["source_system"] = source.get("name", os.path.basename(path))
+    df = add_prefix(df, source.get("prefix", ""), STANDARD_COLUMNS)
+    df["source_system"] = source.get("name", os.path.basename(source["path"]))
     df = build_event_id(df, source.get("event_id_columns", []), source.get("event_id_delimiter", "::"))
     return df
 
 
+def source_mapping(source: Dict[str, Any]) -> Dict[str, Any]:
+    fmt = source.get("format", "csv")
+    if fmt != "csv":
+        raise ValueError(f"Unsupported format for multi-source ingest: {fmt}")
+    return {
+        "case_col": source.get("case", "case:concept:name"),
+        "activity_col": source.get("activity", "concept:name"),
+        "timestamp_col": source.get("timestamp", "time:timestamp"),
+        "resource_col": source.get("resource"),
+        "keep_columns": source.get("keep_columns"),
+    }
+
+
+def source_output_columns(source: Dict[str, Any]) -> List[str]:
+    """Columns a source contributes after mapping, read from the CSV header only."""
+    mapping = source_mapping(source)
+    usecols, _ = csv_column_plan(**mapping)
+    header = pd.read_csv(source["path"], nrows=0, usecols=usecols)
+    rename_map = {
+        mapping["case_col"]: "case:concept:name",
+        mapping["activity_col"]: "concept:name",
+        mapping["timestamp_col"]: "time:timestamp",
+    }
+    if mapping["resource_col"]:
+        rename_map[mapping["resource_col"]] = "org:resource"
+    return list(transform_source_frame(header.rename(columns=rename_map), source).columns)
+
+
+def stream_sources(sources_cfg: List[Dict[str, Any]], config: Dict[str, Any], chunk_rows: int,
+                   max_memory_mb: float) -> Iterator[pd.DataFrame]:
+    """Yield normalised chunks from every source, aligned to the concatenated column layout."""
+    columns: List[str] = []
+    for source in sources_cfg:
+        columns.extend(col for col in source_output_columns(source) if col not in columns)
+    for source in sources_cfg:
+        mapping = source_mapping(source)
+        chunks = iter_csv_chunks(
+            source["path"],
+            mapping["case_col"],
+            mapping["activity_col"],
+            mapping["timestamp_col"],
+            resource_col=mapping["resource_col"],
+            timestamp_format=source.get("timestamp_format"),
+            timestamp_dayfirst=bool(source.get("timestamp_dayfirst", False)),
+            timestamp_utc=source.get("timestamp_utc"),
+            timestamp_timezone=source.get("timestamp_timezone"),
+            keep_columns=mapping["keep_columns"],
+            chunk_rows=chunk_rows,
+            max_memory_mb=max_memory_mb,
+        )
+        for chunk in chunks:
+            chunk = transform_source_frame(chunk, source).reindex(columns=columns)
+            chunk = apply_case_strategy(chunk, config)
+            yield chunk.dropna(subset=REQUIRED_EVENT_COLUMNS)
+
+
+def run_streaming_ingest(args: argparse.Namespace, config: Dict[str, Any], stage_dir: str) -> Dict[str, Any]:
+    strategy = config.get("merge", {}).get("strategy", "concat")
+    if strategy != "concat":
+        raise ValueError("--streaming supports merge.strategy=concat only.")
+    cache_dir = ensure_cache_dir(args.output)
+    combined_path = os.path.join(stage_dir, "normalised_log.csv")
+    chunks = stream_sources(config["sources"], config, args.chunk_rows, args.max_memory_mb)
+    staging_dir, parts, profile, _ = stream_event_partitions(chunks, cache_dir, args.partitions, csv_output=combined_path)
+    # Key the cache on the written CSV so later stages reading it with the standard columns hit the cache.
+    options = event_log_cache_options("csv", "case:concept:name", "concept:name", "time:timestamp", resource_col="org:resource")
+    key = event_log_cache_key(combined_path, options, cache_dir)
+    profile["cache_entry"] = commit_columnar_cache(
+        staging_dir, cache_dir, key, parts, {"source_path": os.path.abspath(combined_path), "options": options}
+    )
+    profile["source_systems"] = sorted(source.get("name", os.path.basename(source["path"])) for source in config["sources"])
+    return profile
+
+
+def run_parallel(func: Callable[..., Any], items: List[Any], workers: Optional[int], *extra: Any) -> List[Any]:
+    """Apply func to each item in a process pool, preserving input order."""
+    workers = workers or min(len(items), os.cpu_count() or 1)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item, *extra) for item in items]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items, *[[value] * len(items) for value in extra]))
+
+
+def canonical_key(values: pd.Series) -> pd.Series:
+    """String form of a join key that is equal whenever pandas' merge would match the values.
+
+    Sources can hold the same key in different dtypes (a single null turns an integer
+    case column into float64), so 1 and 1.0 must map to the same string, and every
+    null to one token.
+    """
+    if pd.api.types.is_bool_dtype(values):
+        values = values.astype("Int64")
+    if pd.api.types.is_float_dtype(values):
+        integral = values.notna() & (values % 1 == 0) & (values.abs() < 2**63)
+        text = values.astype(str)
+        text[integral] = values[integral].astype("int64").astype(str)
+    else:
+        text = values.astype(str)
+    return text.mask(values.isna(), "nan")
+
+
+def key_partitions(df: pd.DataFrame, join_keys: List[str], partitions: int) -> pd.Series:
+    keys = pd.DataFrame({col: canonical_key(df[col]) for col in join_keys}, index=df.index)
+    hashed = pd.util.hash_pandas_object(keys, index=False)
+    return pd.Series(hashed.to_numpy() % partitions, index=df.index)
+
+
+def spill_source_partitions(source: Dict[str, Any], join_keys: List[str], partitions: int, spill_dir: str) -> List[str]:
+    """Load one source and write it as key-sorted hash partitions; returns one file per partition."""
+    df = ingest_source(source)
+    part_ids = key_partitions(df, join_keys, partitions)
+    source_dir = tempfile.mkdtemp(prefix="source-", dir=spill_dir)
+    paths = []
+    for part_id in range(partitions):
+        path = os.path.join(source_dir, f"part_{part_id:05d}.pkl")
+        df[part_ids == part_id].sort_values(join_keys, kind="stable").to_pickle(path)
+        paths.append(path)
+    return paths
+
+
+def merge_partition(paths: List[str], join_keys: List[str], how: str) -> pd.DataFrame:
+    merged = pd.read_pickle(paths[0])
+    for path in paths[1:]:
+        merged = merged.merge(pd.read_pickle(path), on=join_keys, how=how, suffixes=("", "_dup"))
+    return merged
+
+
+def join_sources_partitioned(sources_cfg: List[Dict[str, Any]], merge_cfg: Dict[str, Any], partitions: int,
+                             workers: Optional[int], spill_root: str) -> pd.DataFrame:
+    """Join sources partition by partition; equal keys always land in the same partition of every source."""
+    join_keys = merge_cfg.get("join_keys", ["case:concept:name"])
+    how = merge_cfg.get("how", "outer")
+    spill_dir = tempfile.mkdtemp(prefix="join-", dir=spill_root)
+    try:
+        source_parts = run_parallel(spill_source_partitions, sources_cfg, workers, join_keys, partitions, spill_dir)
+        by_partition = [list(paths) for paths in zip(*source_parts)]
+        merged = run_parallel(merge_partition, by_partition, workers, join_keys, how)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+    return pd.concat(merged, ignore_index=True)
+
+
 def merge_sources(sources: List[pd.DataFrame], config: Dict[str, Any]) -> pd.DataFrame:
     if not sources:
         return pd.DataFrame()
@@ -106,7 +276,7 @@ def apply_case_strategy(df: pd.DataFrame, config: Dict[str, Any]) -> pd.DataFram
     existing = [col for col in columns if col in df.columns]
     if not existing:
         raise ValueError("case_id_strategy columns not found in merged data.")
-    df["case:concept:name"] = df[existing].astype(str).agg(delimiter.join, axis=1)
+    df["case:concept:name"] = join_columns(df, existing, delimiter)
     return df
 
 
@@ -114,24 +284,33 @@ def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_01_ingest_profile")
+    start_profiler(args.profile)
     try:
         config = load_json(args.config)
         sources_cfg = config.get("sources", [])
         if not sources_cfg:
             raise ValueError("No sources defined in config.")
-        sources = [ingest_source(source) for source in sources_cfg]
-        combined = merge_sources(sources, config)
-        combined = apply_case_strategy(combined, config)
-        combined = combined.dropna(subset=["case:concept:name", "concept:name", "time:timestamp"])
         combined_path = os.path.join(stage_dir, "normalised_log.csv")
-        combined.to_csv(combined_path, index=False)
-        profile = {
-            "row_count": int(len(combined)),
-            "column_count": int(len(combined.columns)),
-            "columns": list(combined.columns),
-            "missing_rates": {col: float(combined[col].isna().mean()) for col in combined.columns},
-            "source_systems": sorted(combined["source_system"].unique().tolist()) if "source_system" in combined.columns else [],
-        }
+        if args.streaming:
+            profile = run_streaming_ingest(args, config, stage_dir)
+        else:
+            merge_cfg = config.get("merge", {"strategy": "concat"})
+            if merge_cfg.get("strategy", "concat") == "join":
+                combined = join_sources_partitioned(
+                    sources_cfg, merge_cfg, args.partitions, args.workers, ensure_cache_dir(args.output)
+                )
+            else:
+                combined = merge_sources(run_parallel(ingest_source, sources_cfg, args.workers), config)
+            combined = apply_case_strategy(combined, config)
+            combined = combined.dropna(subset=REQUIRED_EVENT_COLUMNS)
+            combined.to_csv(combined_path, index=False)
+            profile = {
+                "row_count": int(len(combined)),
+                "column_count": int(len(combined.columns)),
+                "columns": list(combined.columns),
+                "missing_rates": {col: float(combined[col].isna().mean()) for col in combined.columns},
+                "source_systems": sorted(combined["source_system"].unique().tolist()) if "source_system" in combined.columns else [],
+            }
         profile_path = os.path.join(stage_dir, "ingest_profile.json")
         save_json(profile, profile_path)
         notebook_path = ensure_notebook(
@@ -156,9 +335,11 @@ def main() -> None:
             "ingest_profile_json": profile_path,
             "ingest_config_json": args.config,
         }
+        if args.streaming:
+            artifacts["event_log_cache_dir"] = profile["cache_entry"]
         write_stage_manifest(
             stage_dir,
-            {"output": args.output, "config": args.config, "notebook_revision": args.notebook_revision},
+            vars(args),
             artifacts,
             args.notebook_revision,
             notebook_path=notebook_path,
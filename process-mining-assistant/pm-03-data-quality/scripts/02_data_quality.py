@@ -15,7 +15,7 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, record_stage_failure, require_file, save_json, write_stage_manifest, ExitCodes
+from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, record_stage_failure, require_file, save_json, start_profiler, write_stage_manifest, ExitCodes
 from process_mining_steps import load_csv_dataframe, run_data_quality_checks
 
 
@@ -55,6 +55,8 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--mask-salt", help="Optional salt for hash masking.")
     parser.add_argument("--lifecycle-column", default="lifecycle:transition",
                         help="Lifecycle column name for summary metrics.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -63,6 +65,7 @@ def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_02_data_quality")
+    start_profiler(args.profile)
     try:
         require_file(args.file)
         df = load_csv_dataframe(
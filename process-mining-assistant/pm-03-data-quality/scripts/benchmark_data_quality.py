@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Benchmark the vectorized data quality checks against the legacy row-wise implementation."""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+COMMON_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
+)
+ORCHESTRATOR_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "pm-00-orchestrator", "scripts")
+)
+for path in (COMMON_DIR, ORCHESTRATOR_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from common import exit_with_error, parse_list, save_json
+import process_mining_steps
+from process_mining_steps import run_data_quality_checks
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark legacy vs vectorized data quality checks.")
+    parser.add_argument("--rows", default="1000000,10000000", help="Comma-separated synthetic log sizes.")
+    parser.add_argument("--events-per-case", type=int, default=8, help="Average events per case.")
+    parser.add_argument("--activities", type=int, default=25, help="Number of distinct activities.")
+    parser.add_argument("--missing-timestamp-rate", type=float, default=0.08,
+                        help="Share of timestamps blanked to force imputation.")
+    parser.add_argument("--impute-strategy", choices=["median", "mean"], default="median", help="Imputation strategy.")
+    parser.add_argument("--mask-strategy", choices=["hash", "redact", "tokenize"], default="hash", help="Masking strategy.")
+    parser.add_argument("--legacy-max-rows", type=int, help="Skip the legacy run above this many rows.")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed.")
+    parser.add_argument("--output", default="benchmark_data_quality.json", help="JSON results path.")
+    return parser.parse_args()
+
+
+def _legacy_impute_timestamps(df: pd.DataFrame, strategy: str) -> pd.Series:
+    if strategy not in ("median", "mean"):
+        raise ValueError(f"Unsupported timestamp_impute_strategy: {strategy}")
+    fills = getattr(df.groupby("concept:name")["time:timestamp"], strategy)()
+    filled = df.apply(
+        lambda row: fills.get(row["concept:name"], pd.NaT) if pd.isna(row["time:timestamp"]) else row["time:timestamp"],
+        axis=1,
+    )
+    return filled.fillna(getattr(filled, strategy)())
+
+
+def _legacy_mask_column_values(series: pd.Series, column: str, strategy: str, salt: str = "") -> pd.Series:
+    if strategy == "redact":
+        return pd.Series("***", index=series.index)
+    if strategy == "tokenize":
+        tokens = {value: f"{column}_{idx}" for idx, value in enumerate(series.astype(str).unique())}
+        return series.astype(str).map(tokens)
+    return series.astype(str).apply(lambda value: hashlib.sha256((salt + value).encode("utf-8")).hexdigest())
+
+
+def _legacy_check_case_order(df: pd.DataFrame) -> Tuple[float, int]:
+    if df.empty:
+        return 0.0, 0
+    unsorted_cases = 0
+    total_cases = 0
+    for _, group in df.groupby("case:concept:name"):
+        total_cases += 1
+        if group["time:timestamp"].isna().any():
+            continue
+        if not group["time:timestamp"].is_monotonic_increasing:
+            unsorted_cases += 1
+    if total_cases == 0:
+        return 0.0, 0
+    return unsorted_cases / total_cases, unsorted_cases
+
+
+@contextmanager
+def legacy_kernels() -> Iterator[None]:
+    """Temporarily swap the vectorized helpers for the legacy row-wise ones."""
+    originals = {
+        "impute_timestamps": process_mining_steps.impute_timestamps,
+        "mask_column_values": process_mining_steps.mask_column_values,
+        "check_case_order": process_mining_steps.check_case_order,
+    }
+    process_mining_steps.impute_timestamps = _legacy_impute_timestamps
+    process_mining_steps.mask_column_values = _legacy_mask_column_values
+    process_mining_steps.check_case_order = _legacy_check_case_order
+    try:
+        yield
+    finally:
+        for name, func in originals.items():
+            setattr(process_mining_steps, name, func)
+
+
+def synthetic_log(rows: int, events_per_case: int, activities: int, missing_rate: float, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    num_cases = max(rows // max(events_per_case, 1), 1)
+    case_idx = np.sort(rng.integers(0, num_cases, size=rows))
+    offsets = rng.exponential(scale=3600.0, size=rows).cumsum().astype("int64")
+    timestamps = pd.to_datetime("2024-01-01") + pd.to_timedelta(offsets, unit="s")
+    # Swap a small share of neighbouring events to produce case order violations.
+    swap = np.flatnonzero(rng.random(rows - 1) < 0.01)
+    ts_values = timestamps.to_numpy().copy()
+    ts_values[swap], ts_values[swap + 1] = ts_values[swap + 1], ts_values[swap]
+    df = pd.DataFrame({
+        "case:concept:name": np.char.add("C", case_idx.astype(str)),
+        "concept:name": np.char.add("Activity ", rng.integers(0, activities, size=rows).astype(str)),
+        "time:timestamp": ts_values,
+        "org:resource": np.char.add("user", rng.integers(0, 500, size=rows).astype(str)),
+        "customer_email": np.char.add(np.char.add("c", (case_idx % 50000).astype(str)), "@example.com"),
+    })
+    df.loc[rng.random(rows) < missing_rate, "time:timestamp"] = pd.NaT
+    return df
+
+
+def benchmark_config(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "missing_value_threshold": 0.05,
+        "timestamp_parse_threshold": 1.0,
+        "impute_missing_timestamps": True,
+        "timestamp_impute_strategy": args.impute_strategy,
+        "auto_mask_sensitive": True,
+        "sensitive_column_patterns": ["email", "resource"],
+        "mask_strategy": args.mask_strategy,
+        "mask_salt": "bench",
+    }
+
+
+def timed_run(df: pd.DataFrame, config: Dict[str, Any]) -> Tuple[float, Dict[str, Any], Dict[str, Any]]:
+    start = time.perf_counter()
+    _, quality, recommendations = run_data_quality_checks(df.copy(), dict(config))
+    return time.perf_counter() - start, quality, recommendations
+
+
+def main() -> None:
+    args = parse_arguments()
+    sizes = [int(item) for item in parse_list(args.rows) or []]
+    if not sizes:
+        exit_with_error("No benchmark sizes provided.")
+    config = benchmark_config(args)
+    results: List[Dict[str, Any]] = []
+    for rows in sizes:
+        df = synthetic_log(rows, args.events_per_case, args.activities, args.missing_timestamp_rate, args.seed)
+        vector_seconds, quality, recommendations = timed_run(df, config)
+        entry: Dict[str, Any] = {"rows": rows, "vectorized_seconds": vector_seconds}
+        if args.legacy_max_rows is None or rows <= args.legacy_max_rows:
+            with legacy_kernels():
+                legacy_seconds, legacy_quality, legacy_recommendations = timed_run(df, config)
+            entry.update({
+                "legacy_seconds": legacy_seconds,
+                "speedup": legacy_seconds / vector_seconds if vector_seconds else None,
+                "quality_identical": legacy_quality == quality,
+                "recommendations_identical": legacy_recommendations == recommendations,
+            })
+        results.append(entry)
+        print(entry)
+    save_json({"config": config, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,14 +15,15 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, parse_list, record_stage_failure, require_file, save_json, write_stage_manifest
+from common import ensure_cache_dir, ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, parse_list, record_stage_failure, require_file, save_json, start_profiler, write_stage_manifest
 from process_mining_steps import (
-    apply_filters,
     clean_event_log,
     compute_statistics,
+    export_xes,
+    filter_event_log,
     load_event_log,
-    log_to_dataframe,
-    require_pm4py,
+    persist_parsed_timestamps,
+    save_variant_index,
 )
 
 
@@ -45,7 +46,13 @@ def parse_arguments() -> argparse.Namespace:
                         help="Filter activities below the minimum frequency threshold.")
     parser.add_argument("--min-activity-frequency", type=float, default=0.01,
                         help="Minimum activity frequency to retain when filtering.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the columnar event log cache under <output>/cache.")
+    parser.add_argument("--xes-engine", choices=["stream", "pm4py"], default="stream",
+                        help="XES reader/writer: streaming iterparse (default) or the pm4py importer/exporter.")
+    parser.add_argument("--xes-gzip", action="store_true", help="Write filtered_log.xes.gz instead of plain XES.")
     parser.add_argument("--output", default="output", help="Output directory.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -54,9 +61,11 @@ def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_03_clean_filter")
+    start_profiler(args.profile)
     try:
         require_file(args.file)
-        event_log = load_event_log(
+        cache_dir = None if args.no_cache else ensure_cache_dir(args.output)
+        df = load_event_log(
             args.file,
             args.format,
             args.case,
@@ -67,38 +76,30 @@ def main() -> None:
             timestamp_dayfirst=args.timestamp_dayfirst,
             timestamp_utc=args.timestamp_utc,
             timestamp_timezone=args.timestamp_timezone,
+            cache_dir=cache_dir,
+            xes_engine=args.xes_engine,
         )
-        before_stats = compute_statistics(event_log)
-        event_log = clean_event_log(event_log)
-        if args.auto_filter_rare_activities:
-            df = log_to_dataframe(event_log)
-            if "concept:name" in df.columns:
-                freq = df["concept:name"].value_counts(normalize=True)
-                keep = freq[freq >= args.min_activity_frequency].index.tolist()
-                if keep:
-                    require_pm4py()
-                    import pm4py
-                    event_log = pm4py.filter_event_attribute_values(
-                        event_log, "concept:name", keep, level="event"
-                    )
-                    event_log = [trace for trace in event_log if len(trace) > 0]
-        event_log = apply_filters(
-            event_log,
+        df = clean_event_log(df)
+        df, before_index, variant_index = filter_event_log(
+            df,
             start_activities=parse_list(args.start_activities),
             end_activities=parse_list(args.end_activities),
+            min_activity_frequency=args.min_activity_frequency if args.auto_filter_rare_activities else None,
+            top_variants=args.top_variants,
         )
-        if args.top_variants:
-            require_pm4py()
-            import pm4py
-            event_log = pm4py.filter_variants_top_k(event_log, args.top_variants)
-        after_stats = compute_statistics(event_log)
-        df = log_to_dataframe(event_log)
+        before_stats = compute_statistics(df, before_index)
+        after_stats = compute_statistics(df, variant_index)
         filtered_csv = os.path.join(stage_dir, "filtered_log.csv")
         df.to_csv(filtered_csv, index=False)
-        require_pm4py()
-        import pm4py
-        filtered_xes = os.path.join(stage_dir, "filtered_log.xes")
-        pm4py.write_xes(event_log, filtered_xes)
+        if cache_dir:
+            persist_parsed_timestamps(df, filtered_csv, cache_dir)
+        # The filtered CSV is written with the standard column names, whatever the input used.
+        variant_index_path = save_variant_index(
+            variant_index, os.path.join(stage_dir, "variant_index.npz"), source_path=filtered_csv,
+            columns={"case": "case:concept:name", "activity": "concept:name"}, cache_dir=cache_dir,
+        )
+        filtered_xes = os.path.join(stage_dir, "filtered_log.xes.gz" if args.xes_gzip else "filtered_log.xes")
+        export_xes(df, filtered_xes, engine=args.xes_engine)
         summary = {
             "start_activities": parse_list(args.start_activities),
             "end_activities": parse_list(args.end_activities),
@@ -130,6 +131,7 @@ def main() -> None:
             "filtered_log_csv": filtered_csv,
             "filtered_log_xes": filtered_xes,
             "filter_summary_json": summary_path,
+            "variant_index_npz": variant_index_path,
         }
         write_stage_manifest(
             stage_dir,
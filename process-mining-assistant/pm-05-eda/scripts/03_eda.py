@@ -6,6 +6,7 @@ import os
 import sys
 
 import numpy as np
+import pandas as pd
 
 COMMON_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
@@ -17,15 +18,18 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, save_json, write_stage_manifest
+from common import ensure_cache_dir, ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, save_json, start_profiler, write_stage_manifest
 from process_mining_steps import (
     compute_arrival_metrics,
     compute_start_end,
     compute_statistics,
     compute_variant_stats,
     load_event_log,
-    log_to_dataframe,
+    load_or_build_variant_index,
     plot_activity_distributions,
+    render_charts,
+    save_variant_index,
+    variant_frequency_table,
 )
 
 
@@ -44,8 +48,16 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--timestamp-dayfirst", action="store_true", help="Parse timestamps with day-first format.")
     parser.add_argument("--timestamp-utc", action="store_true", help="Parse timestamps as UTC.")
     parser.add_argument("--timestamp-timezone", help="Timezone to localize/convert timestamps.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the columnar event log cache under <output>/cache.")
+    parser.add_argument("--xes-engine", choices=["stream", "pm4py"], default="stream",
+                        help="XES reader/writer: streaming iterparse (default) or the pm4py importer/exporter.")
     parser.add_argument("--output", default="output", help="Output directory.")
     parser.add_argument("--advanced", action="store_true", help="Generate advanced diagnostics artifacts.")
+    parser.add_argument("--chart-format", choices=["png", "data"], default="png",
+                        help="png renders charts; data skips raster output and writes each chart's series as JSON.")
+    parser.add_argument("--chart-workers", type=int, default=1, help="Processes used to render charts.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -54,6 +66,7 @@ def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_04_eda")
+    start_profiler(args.profile)
     try:
         if args.use_filtered or (not args.input_log and not args.file):
             candidate = os.path.join(args.output, "stage_03_clean_filter", "filtered_log.csv")
@@ -68,7 +81,8 @@ def main() -> None:
         if not input_format:
             raise ValueError("Unable to infer input format; set --format or --input-format.")
         require_file(input_log)
-        event_log = load_event_log(
+        cache_dir = None if args.no_cache else ensure_cache_dir(args.output)
+        df = load_event_log(
             input_log,
             input_format,
             args.case,
@@ -79,16 +93,25 @@ def main() -> None:
             timestamp_dayfirst=args.timestamp_dayfirst,
             timestamp_utc=args.timestamp_utc,
             timestamp_timezone=args.timestamp_timezone,
+            cache_dir=cache_dir,
+            xes_engine=args.xes_engine,
         )
-        stats = compute_statistics(event_log)
-        start_end = compute_start_end(event_log)
-        arrival_metrics = compute_arrival_metrics(event_log)
+        columns = {"case": args.case, "activity": args.activity}
+        variant_index = load_or_build_variant_index(df, input_log, columns, cache_dir)
+        variant_index_path = save_variant_index(
+            variant_index, os.path.join(stage_dir, "variant_index.npz"), source_path=input_log,
+            columns=columns, cache_dir=cache_dir,
+        )
+        stats = compute_statistics(df, variant_index)
+        start_end = compute_start_end(df)
+        arrival_metrics = compute_arrival_metrics(df)
         summary_path = os.path.join(stage_dir, "summary_stats.json")
         save_json({"stats": stats, "arrival_metrics": arrival_metrics, "start_end": start_end},
                   summary_path)
-        df = log_to_dataframe(event_log)
-        plot_activity_distributions(df, stage_dir)
-        compute_variant_stats(event_log, stage_dir, top_n=10)
+        charts = []
+        plot_activity_distributions(df, stage_dir, charts=charts)
+        compute_variant_stats(df, stage_dir, top_n=10, variant_index=variant_index, charts=charts)
+        chart_artifacts = render_charts(charts, chart_format=args.chart_format, workers=args.chart_workers)
         advanced_artifacts = {}
         if args.advanced:
             case_lengths = df.groupby("case:concept:name")["concept:name"].size()
@@ -103,13 +126,8 @@ def main() -> None:
             case_length_summary_path = os.path.join(stage_dir, "case_length_summary.json")
             save_json(case_length_summary, case_length_summary_path)
 
-            variants = (
-                df.groupby("case:concept:name")["concept:name"]
-                .apply(lambda x: " -> ".join(x.astype(str)))
-                .value_counts()
-                .reset_index()
-            )
-            variants.columns = ["variant", "count"]
+            variants = variant_frequency_table(variant_index)
+            variants = pd.DataFrame({"variant": variants["activities"].map(" -> ".join), "count": variants["count"]})
             variants["percent"] = variants["count"] / variants["count"].sum() * 100
             variants["cum_percent"] = variants["percent"].cumsum()
             variant_coverage_path = os.path.join(stage_dir, "variant_coverage.csv")
@@ -144,9 +162,12 @@ def main() -> None:
         )
         artifacts = {
             "summary_stats_json": summary_path,
+            "variant_index_npz": variant_index_path,
             "variant_counts_csv": os.path.join(stage_dir, "variant_counts.csv"),
-            "variant_pareto_png": os.path.join(stage_dir, "variant_pareto.png"),
         }
+        artifacts.update({
+            f"{name}_{os.path.splitext(path)[1].lstrip('.')}": path for name, path in chart_artifacts.items()
+        })
         artifacts.update(advanced_artifacts)
         write_stage_manifest(
             stage_dir,
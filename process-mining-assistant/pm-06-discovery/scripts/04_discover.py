@@ -4,6 +4,7 @@
 import argparse
 import os
 import sys
+import time
 
 COMMON_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
@@ -15,8 +16,8 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, write_stage_manifest
-from process_mining_steps import discover_models, evaluate_models, load_event_log, save_models
+from common import ensure_cache_dir, ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, start_profiler, write_stage_manifest
+from process_mining_steps import discover_models, evaluate_models, holdout_variant_cases, load_event_log, load_or_build_variant_index, sample_event_log, sample_variant_cases, sampled_fitness_estimates, save_models, subset_variant_index, write_sampling_summary
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -34,12 +35,25 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--timestamp-dayfirst", action="store_true", help="Parse timestamps with day-first format.")
     parser.add_argument("--timestamp-utc", action="store_true", help="Parse timestamps as UTC.")
     parser.add_argument("--timestamp-timezone", help="Timezone to localize/convert timestamps.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the columnar event log cache under <output>/cache.")
+    parser.add_argument("--xes-engine", choices=["stream", "pm4py"], default="stream",
+                        help="XES reader/writer: streaming iterparse (default) or the pm4py importer/exporter.")
     parser.add_argument("--output", default="output", help="Output directory.")
     parser.add_argument("--noise-threshold", type=float, default=0.0, help="Noise threshold for inductive miner.")
     parser.add_argument("--dependency-threshold", type=float, default=0.5, help="Dependency threshold for heuristic miner.")
     parser.add_argument("--frequency-threshold", type=float, default=0.0, help="Frequency threshold for heuristic miner.")
     parser.add_argument("--miner-selection", choices=["auto", "inductive", "heuristic", "both"], default="auto", help="Miner selection strategy.")
     parser.add_argument("--variant-noise-threshold", type=float, default=0.01, help="Variant frequency threshold for auto selection.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for parallel discovery/evaluation tasks (1 runs in-process).")
+    parser.add_argument("--task-timeout", type=float, help="Seconds before a discovery or metric task is abandoned (with --workers > 1).")
+    parser.add_argument("--sample-size", type=int, help="Discover and evaluate on this many variant-stratified cases.")
+    parser.add_argument("--sample-margin", type=float,
+                        help="Size the case sample so mean fitness is estimated within +/- this margin.")
+    parser.add_argument("--sample-confidence", type=float, default=0.95, help="Confidence level for sample sizing and intervals.")
+    parser.add_argument("--sample-seed", type=int, default=0, help="Random seed for case sampling.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -48,6 +62,7 @@ def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_05_discover")
+    start_profiler(args.profile)
     try:
         if args.use_filtered or (not args.input_log and not args.file):
             candidate = os.path.join(args.output, "stage_03_clean_filter", "filtered_log.csv")
@@ -62,6 +77,7 @@ def main() -> None:
         if not input_format:
             raise ValueError("Unable to infer input format; set --format or --input-format.")
         require_file(input_log)
+        cache_dir = None if args.no_cache else ensure_cache_dir(args.output)
         event_log = load_event_log(
             input_log,
             input_format,
@@ -73,7 +89,24 @@ def main() -> None:
             timestamp_dayfirst=args.timestamp_dayfirst,
             timestamp_utc=args.timestamp_utc,
             timestamp_timezone=args.timestamp_timezone,
+            cache_dir=cache_dir,
+            xes_engine=args.xes_engine,
         )
+        sampling = args.sample_size is not None or args.sample_margin is not None
+        variant_index = None
+        if args.miner_selection == "auto" or sampling:
+            variant_index = load_or_build_variant_index(
+                event_log, input_log, {"case": args.case, "activity": args.activity}, cache_dir
+            )
+        started = time.monotonic()
+        if sampling:
+            full_log = event_log
+            full_index = variant_index
+            sample = sample_variant_cases(
+                full_index, args.sample_size, args.sample_margin, args.sample_confidence, args.sample_seed
+            )
+            event_log = sample_event_log(event_log, sample)
+            variant_index = subset_variant_index(full_index, sample["case_positions"])
         models = discover_models(
             event_log,
             stage_dir,
@@ -82,9 +115,24 @@ def main() -> None:
             args.frequency_threshold,
             args.miner_selection,
             args.variant_noise_threshold,
+            variant_index=variant_index,
+            workers=args.workers,
+            task_timeout=args.task_timeout,
         )
-        evaluate_models(event_log, models, stage_dir)
+        evaluate_models(event_log, models, stage_dir, workers=args.workers, task_timeout=args.task_timeout)
         model_artifacts = save_models(models, stage_dir)
+        sampling_path = None
+        if sampling:
+            # Replay on cases the models were not mined from, so fitness is an out-of-sample estimate.
+            holdout = holdout_variant_cases(full_index, sample)
+            estimates = {}
+            if holdout["holdout_cases"]:
+                estimates = sampled_fitness_estimates(
+                    sample_event_log(full_log, holdout), models, holdout["population_cases"], args.sample_confidence
+                )
+            sampling_path = write_sampling_summary(
+                stage_dir, sample, full_index, variant_index, time.monotonic() - started, estimates, holdout
+            )
         notebook_path = ensure_notebook(
             args.output,
             args.notebook_revision,
@@ -108,6 +156,8 @@ def main() -> None:
         }
         if model_artifacts:
             artifacts["models_manifest_json"] = f"{stage_dir}/models_manifest.json"
+        if sampling_path:
+            artifacts["sampling_summary_json"] = sampling_path
         write_stage_manifest(
             stage_dir,
             vars(args),
@@ -4,6 +4,10 @@
 import argparse
 import os
 import sys
+import time
+
+import numpy as np
+import pandas as pd
 
 COMMON_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
@@ -15,8 +19,8 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, write_stage_manifest
-from process_mining_steps import conformance_diagnostics, discover_models, evaluate_models, load_event_log, load_models
+from common import ensure_cache_dir, ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, start_profiler, write_stage_manifest
+from process_mining_steps import conformance_diagnostics, discover_models, evaluate_models, load_event_log, load_models, load_or_build_variant_index, mining_sample_case_ids, sample_event_log, sample_variant_cases, subset_variant_index, write_sampling_summary
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -34,14 +38,31 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--timestamp-dayfirst", action="store_true", help="Parse timestamps with day-first format.")
     parser.add_argument("--timestamp-utc", action="store_true", help="Parse timestamps as UTC.")
     parser.add_argument("--timestamp-timezone", help="Timezone to localize/convert timestamps.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the columnar event log cache under <output>/cache.")
+    parser.add_argument("--xes-engine", choices=["stream", "pm4py"], default="stream",
+                        help="XES reader/writer: streaming iterparse (default) or the pm4py importer/exporter.")
     parser.add_argument("--output", default="output", help="Output directory.")
     parser.add_argument("--noise-threshold", type=float, default=0.0, help="Noise threshold for inductive miner.")
     parser.add_argument("--dependency-threshold", type=float, default=0.5, help="Dependency threshold for heuristic miner.")
     parser.add_argument("--frequency-threshold", type=float, default=0.0, help="Frequency threshold for heuristic miner.")
     parser.add_argument("--miner-selection", choices=["auto", "inductive", "heuristic", "both"], default="auto", help="Miner selection strategy.")
     parser.add_argument("--variant-noise-threshold", type=float, default=0.01, help="Variant frequency threshold for auto selection.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes for parallel discovery/evaluation tasks (1 runs in-process).")
+    parser.add_argument("--task-timeout", type=float, help="Seconds before a discovery or metric task is abandoned (with --workers > 1).")
     parser.add_argument("--conformance-method", choices=["alignments", "token"], default="alignments",
                         help="Conformance method: alignments or token replay.")
+    parser.add_argument("--alignment-batch-size", type=int, default=200,
+                        help="Variants aligned per worker task (alignments only).")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="Do not checkpoint finished alignment batches under the stage directory.")
+    parser.add_argument("--sample-size", type=int, help="Check conformance on this many variant-stratified cases.")
+    parser.add_argument("--sample-margin", type=float,
+                        help="Size the case sample so mean fitness is estimated within +/- this margin.")
+    parser.add_argument("--sample-confidence", type=float, default=0.95, help="Confidence level for sample sizing and intervals.")
+    parser.add_argument("--sample-seed", type=int, default=0, help="Random seed for case sampling.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -50,6 +71,7 @@ def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_06_conformance")
+    start_profiler(args.profile)
     try:
         if args.use_filtered or (not args.input_log and not args.file):
             candidate = os.path.join(args.output, "stage_03_clean_filter", "filtered_log.csv")
@@ -64,6 +86,7 @@ def main() -> None:
         if not input_format:
             raise ValueError("Unable to infer input format; set --format or --input-format.")
         require_file(input_log)
+        cache_dir = None if args.no_cache else ensure_cache_dir(args.output)
         event_log = load_event_log(
             input_log,
             input_format,
@@ -75,9 +98,34 @@ def main() -> None:
             timestamp_dayfirst=args.timestamp_dayfirst,
             timestamp_utc=args.timestamp_utc,
             timestamp_timezone=args.timestamp_timezone,
+            cache_dir=cache_dir,
+            xes_engine=args.xes_engine,
         )
-        models_manifest = os.path.join(args.output, "stage_05_discover", "models_manifest.json")
+        sampling = args.sample_size is not None or args.sample_margin is not None
+        variant_index = None
+        if args.miner_selection == "auto" or args.conformance_method == "alignments" or sampling:
+            variant_index = load_or_build_variant_index(
+                event_log, input_log, {"case": args.case, "activity": args.activity}, cache_dir
+            )
+        started = time.monotonic()
+        discover_dir = os.path.join(args.output, "stage_05_discover")
+        models_manifest = os.path.join(discover_dir, "models_manifest.json")
         models = load_models(models_manifest) if os.path.isfile(models_manifest) else {}
+        sample = None
+        if sampling:
+            full_index = variant_index
+            # Models mined from a sample fit those cases by construction; estimate on the others.
+            mined = mining_sample_case_ids(discover_dir) if models else None
+            exclude = None
+            if mined:
+                exclude = np.flatnonzero(np.isin(full_index["case_ids"].astype(str), mined))
+            sample = sample_variant_cases(
+                full_index, args.sample_size, args.sample_margin, args.sample_confidence, args.sample_seed, exclude
+            )
+            if not sample["sample_cases"]:
+                raise ValueError("Every case was used to mine the models; no cases are left for a sampled estimate.")
+            event_log = sample_event_log(event_log, sample)
+            variant_index = subset_variant_index(full_index, sample["case_positions"])
         if not models:
             models = discover_models(
                 event_log,
@@ -87,9 +135,36 @@ def main() -> None:
                 args.frequency_threshold,
                 args.miner_selection,
                 args.variant_noise_threshold,
+                variant_index=variant_index,
+                workers=args.workers,
+                task_timeout=args.task_timeout,
+            )
+        evaluate_models(event_log, models, stage_dir, workers=args.workers, task_timeout=args.task_timeout)
+        conformance_path = conformance_diagnostics(
+            event_log,
+            models,
+            stage_dir,
+            method=args.conformance_method,
+            variant_index=variant_index,
+            workers=args.workers,
+            batch_size=args.alignment_batch_size,
+            checkpoint=not args.no_checkpoint,
+            population_cases=sample["population_cases"] if sample else None,
+            confidence=args.sample_confidence,
+        )
+        sampling_path = None
+        if sample:
+            estimates = {}
+            if conformance_path:
+                for row in pd.read_csv(conformance_path).to_dict("records"):
+                    estimates[row["model"]] = {
+                        "estimate": row["fitness_estimate"],
+                        "ci_low": row["fitness_ci_low"],
+                        "ci_high": row["fitness_ci_high"],
+                    }
+            sampling_path = write_sampling_summary(
+                stage_dir, sample, full_index, variant_index, time.monotonic() - started, estimates
             )
-        evaluate_models(event_log, models, stage_dir)
-        conformance_path = conformance_diagnostics(event_log, models, stage_dir, method=args.conformance_method)
         notebook_path = ensure_notebook(
             args.output,
             args.notebook_revision,
@@ -115,6 +190,8 @@ def main() -> None:
         per_case_path = os.path.join(stage_dir, "conformance_case_deviations.csv")
         if os.path.isfile(per_case_path):
             artifacts["conformance_case_deviations_csv"] = per_case_path
+        if sampling_path:
+            artifacts["sampling_summary_json"] = sampling_path
         write_stage_manifest(
             stage_dir,
             vars(args),
@@ -5,8 +5,6 @@ import argparse
 import os
 import sys
 
-import pandas as pd
-
 COMMON_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
 )
@@ -17,8 +15,8 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, save_json, write_stage_manifest
-from process_mining_steps import load_event_log, log_to_dataframe, performance_analysis
+from common import ensure_cache_dir, ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, save_json, start_profiler, write_stage_manifest
+from process_mining_steps import as_event_dataframe, load_event_dataframe, performance_analysis, render_charts
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -36,9 +34,17 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--timestamp-dayfirst", action="store_true", help="Parse timestamps with day-first format.")
     parser.add_argument("--timestamp-utc", action="store_true", help="Parse timestamps as UTC.")
     parser.add_argument("--timestamp-timezone", help="Timezone to localize/convert timestamps.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the columnar event log cache under <output>/cache.")
+    parser.add_argument("--xes-engine", choices=["stream", "pm4py"], default="stream",
+                        help="XES reader/writer: streaming iterparse (default) or the pm4py importer/exporter.")
     parser.add_argument("--output", default="output", help="Output directory.")
     parser.add_argument("--advanced", action="store_true", help="Generate advanced performance diagnostics.")
     parser.add_argument("--sla-hours", type=float, default=72.0, help="SLA threshold in hours.")
+    parser.add_argument("--chart-format", choices=["png", "data"], default="png",
+                        help="png renders charts; data skips raster output and writes each chart's series as JSON.")
+    parser.add_argument("--chart-workers", type=int, default=1, help="Processes used to render charts.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -47,6 +53,7 @@ def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_07_performance")
+    start_profiler(args.profile)
     try:
         if args.use_filtered or (not args.input_log and not args.file):
             candidate = os.path.join(args.output, "stage_03_clean_filter", "filtered_log.csv")
@@ -61,7 +68,7 @@ def main() -> None:
         if not input_format:
             raise ValueError("Unable to infer input format; set --format or --input-format.")
         require_file(input_log)
-        event_log = load_event_log(
+        df = load_event_dataframe(
             input_log,
             input_format,
             args.case,
@@ -72,8 +79,13 @@ def main() -> None:
             timestamp_dayfirst=args.timestamp_dayfirst,
             timestamp_utc=args.timestamp_utc,
             timestamp_timezone=args.timestamp_timezone,
+            cache_dir=None if args.no_cache else ensure_cache_dir(args.output),
+            xes_engine=args.xes_engine,
         )
-        perf_artifacts, perf_summary = performance_analysis(event_log, stage_dir)
+        df = as_event_dataframe(df)
+        charts = []
+        perf_artifacts, perf_summary = performance_analysis(df, stage_dir, charts=charts)
+        perf_artifacts.update(render_charts(charts, chart_format=args.chart_format, workers=args.chart_workers))
         if perf_summary:
             summary_path = os.path.join(stage_dir, "performance_summary.json")
             save_json(perf_summary, summary_path)
@@ -81,9 +93,6 @@ def main() -> None:
             summary_path = None
         advanced_artifacts = {}
         if args.advanced:
-            df = log_to_dataframe(event_log)
-            df = df.sort_values(["case:concept:name", "time:timestamp"])
-            df["time:timestamp"] = pd.to_datetime(df["time:timestamp"], errors="coerce")
             df["next_time"] = df.groupby("case:concept:name")["time:timestamp"].shift(-1)
             df["wait_hours"] = (df["next_time"] - df["time:timestamp"]).dt.total_seconds() / 3600.0
             wait_stats = df.groupby("concept:name")["wait_hours"].agg(
@@ -15,8 +15,8 @@ for path in (COMMON_DIR, ORCHESTRATOR_DIR):
     if path not in sys.path:
         sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, write_stage_manifest
-from process_mining_steps import load_event_log, organisational_analysis
+from common import ensure_cache_dir, ensure_notebook, ensure_output_dir, ensure_stage_dir, exit_with_error, infer_format_from_path, record_stage_failure, require_file, start_profiler, write_stage_manifest
+from process_mining_steps import load_event_dataframe, organisational_analysis
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -34,7 +34,12 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument("--timestamp-dayfirst", action="store_true", help="Parse timestamps with day-first format.")
     parser.add_argument("--timestamp-utc", action="store_true", help="Parse timestamps as UTC.")
     parser.add_argument("--timestamp-timezone", help="Timezone to localize/convert timestamps.")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the columnar event log cache under <output>/cache.")
+    parser.add_argument("--xes-engine", choices=["stream", "pm4py"], default="stream",
+                        help="XES reader/writer: streaming iterparse (default) or the pm4py importer/exporter.")
     parser.add_argument("--output", default="output", help="Output directory.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -43,6 +48,7 @@ def main() -> None:
     args = parse_arguments()
     ensure_output_dir(args.output)
     stage_dir = ensure_stage_dir(args.output, "stage_08_org_mining")
+    start_profiler(args.profile)
     try:
         if args.use_filtered or (not args.input_log and not args.file):
             candidate = os.path.join(args.output, "stage_03_clean_filter", "filtered_log.csv")
@@ -57,7 +63,7 @@ def main() -> None:
         if not input_format:
             raise ValueError("Unable to infer input format; set --format or --input-format.")
         require_file(input_log)
-        event_log = load_event_log(
+        df = load_event_dataframe(
             input_log,
             input_format,
             args.case,
@@ -68,8 +74,10 @@ def main() -> None:
             timestamp_dayfirst=args.timestamp_dayfirst,
             timestamp_utc=args.timestamp_utc,
             timestamp_timezone=args.timestamp_timezone,
+            cache_dir=None if args.no_cache else ensure_cache_dir(args.output),
+            xes_engine=args.xes_engine,
         )
-        handover_path = organisational_analysis(event_log, stage_dir)
+        handover_path = organisational_analysis(df, stage_dir)
         notebook_path = ensure_notebook(
             args.output,
             args.notebook_revision,
@@ -85,7 +93,13 @@ def main() -> None:
                 "handover.head()",
             ],
         )
-        artifacts = {"handover_of_work_csv": handover_path}
+        artifacts = {
+            "handover_of_work_csv": handover_path,
+            "handover_of_work_matrix_csv": os.path.join(stage_dir, "handover_of_work_matrix.csv"),
+        }
+        agent_performance_path = os.path.join(stage_dir, "agent_performance_summary.csv")
+        if os.path.isfile(agent_performance_path):
+            artifacts["agent_performance_summary_csv"] = agent_performance_path
         write_stage_manifest(
             stage_dir,
             vars(args),
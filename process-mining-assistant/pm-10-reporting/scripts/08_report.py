@@ -11,16 +11,24 @@ import pandas as pd
 COMMON_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
 )
-if COMMON_DIR not in sys.path:
-    sys.path.insert(0, COMMON_DIR)
+ORCHESTRATOR_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "pm-00-orchestrator", "scripts")
+)
+for path in (COMMON_DIR, ORCHESTRATOR_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
 
-from common import ensure_notebook, ensure_stage_dir, exit_with_error, write_stage_manifest
+from common import ensure_cache_dir, ensure_notebook, ensure_stage_dir, exit_with_error, start_profiler, write_stage_manifest
 
 
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate a report from process mining artifacts.")
     parser.add_argument("--output", default="output", help="Directory containing analysis results.")
     parser.add_argument("--report", default="process_mining_report.md", help="Report filename.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the columnar event log cache when the agent summary has to be derived from the filtered log.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"],
+                        help="Write a profiler dump for this stage next to its manifest.")
     parser.add_argument("--notebook-revision", default="R1.00", help="Notebook revision label.")
     return parser.parse_args()
 
@@ -28,6 +36,7 @@ def parse_arguments() -> argparse.Namespace:
 def main() -> None:
     args = parse_arguments()
     stage_dir = ensure_stage_dir(args.output, "stage_09_report")
+    start_profiler(args.profile)
     summary_path = os.path.join(args.output, "stage_04_eda", "summary_stats.json")
     variant_counts_path = os.path.join(args.output, "stage_04_eda", "variant_counts.csv")
     variant_coverage_path = os.path.join(args.output, "stage_04_eda", "variant_coverage.csv")
@@ -61,39 +70,31 @@ def main() -> None:
         variant_counts = pd.read_csv(variant_counts_path)
     waiting_stats = pd.read_csv(waiting_stats_path) if os.path.isfile(waiting_stats_path) else None
 
-    agent_perf_path = None
+    # Org mining persists the agent summary; only derive it here when that stage has not run.
     agent_perf = None
-    if os.path.isfile(filtered_log_path):
-        df = pd.read_csv(filtered_log_path)
-        if {"case:concept:name", "time:timestamp", "org:resource"}.issubset(df.columns):
-            df = df.copy()
-            df["time:timestamp"] = pd.to_datetime(df["time:timestamp"], errors="coerce")
-            case_times = df.groupby("case:concept:name")["time:timestamp"].agg(["min", "max"])
-            case_times["duration_hours"] = (
-                (case_times["max"] - case_times["min"]).dt.total_seconds() / 3600.0
-            )
-            agent_counts = (
-                df.groupby(["case:concept:name", "org:resource"])
-                .size()
-                .reset_index(name="event_count")
-            )
-            agent_counts["rank"] = agent_counts.groupby("case:concept:name")["event_count"].rank(
-                method="first", ascending=False
-            )
-            primary_agent = agent_counts[agent_counts["rank"] == 1][
-                ["case:concept:name", "org:resource"]
-            ]
-            case_with_agent = case_times.join(
-                primary_agent.set_index("case:concept:name"), how="left"
-            ).dropna(subset=["org:resource"])
-            agent_perf = (
-                case_with_agent.groupby("org:resource")["duration_hours"]
-                .agg(case_count="count", mean_hours="mean", median_hours="median", p90_hours=lambda x: x.quantile(0.9))
-                .sort_values("mean_hours", ascending=False)
-                .reset_index()
-            )
-            agent_perf_path = os.path.join(stage_dir, "agent_performance_summary.csv")
+    agent_perf_path = os.path.join(args.output, "stage_08_org_mining", "agent_performance_summary.csv")
+    if not os.path.isfile(agent_perf_path):
+        agent_perf_path = os.path.join(args.output, "agent_performance_summary.csv")
+    if os.path.isfile(agent_perf_path):
+        agent_perf = pd.read_csv(agent_perf_path)
+    elif os.path.isfile(filtered_log_path):
+        # Imported here so reports built from persisted aggregates do not pay for loading pm4py.
+        from process_mining_steps import agent_performance_summary, load_event_dataframe
+
+        df = load_event_dataframe(
+            filtered_log_path,
+            "csv",
+            "case:concept:name",
+            "concept:name",
+            "time:timestamp",
+            cache_dir=None if args.no_cache else ensure_cache_dir(args.output),
+        )
+        agent_perf = agent_performance_summary(df)
+        agent_perf_path = os.path.join(stage_dir, "agent_performance_summary.csv")
+        if agent_perf is not None:
             agent_perf.to_csv(agent_perf_path, index=False)
+    if agent_perf is None:
+        agent_perf_path = None
 
     report_path = os.path.join(stage_dir, args.report)
     with open(report_path, "w", encoding="utf-8") as handle:
@@ -3,8 +3,10 @@
 
 import argparse
 import os
+import shutil
 import sys
 import zipfile
+from typing import Any, Dict, List, Optional
 
 COMMON_DIR = os.path.abspath(
     os.path.join(os.path.dirname(__file__), "..", "..", "pm-99-utils-and-standards", "scripts")
@@ -12,34 +14,109 @@ COMMON_DIR = os.path.abspath(
 if COMMON_DIR not in sys.path:
     sys.path.insert(0, COMMON_DIR)
 
-from common import exit_with_error, save_json
+from common import cached_file_hashes, ensure_cache_dir, exit_with_error, load_json, save_json
+
+# Formats that are already compressed; deflating them again costs time and saves nothing.
+STORED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svgz", ".pdf",
+    ".zip", ".gz", ".bz2", ".xz", ".zst", ".7z",
+    ".docx", ".xlsx", ".pptx", ".parquet",
+}
+COPY_CHUNK_BYTES = 1024 * 1024
 
 
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Export artifacts.")
     parser.add_argument("--output", default="output", help="Directory containing artifacts.")
     parser.add_argument("--zip", dest="zip_path", help="Optional zip output path.")
+    parser.add_argument("--workers", type=int, default=1, help="Threads hashing changed files in parallel (1 hashes serially).")
+    parser.add_argument("--full", action="store_true",
+                        help="Rebuild the zip instead of appending to an existing one whose entries are unchanged.")
     return parser.parse_args()
 
 
+def add_file(zf: zipfile.ZipFile, abs_path: str, rel_path: str) -> None:
+    """Stream one file into the zip in chunks, deflated or stored depending on its format."""
+    info = zipfile.ZipInfo.from_file(abs_path, arcname=rel_path)
+    if os.path.splitext(rel_path)[1].lower() in STORED_EXTENSIONS:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    with open(abs_path, "rb") as source, zf.open(info, "w") as target:
+        shutil.copyfileobj(source, target, COPY_CHUNK_BYTES)
+
+
+def reusable_entries(zip_path: str, hashes: Dict[str, str], previous: Dict[str, str]) -> Optional[List[str]]:
+    """Entries of the previous zip when every one is still an artifact with an unchanged hash, else None.
+
+    zipfile cannot drop or replace an entry, so the old zip is only reused when new files can
+    be appended to it; a changed or removed artifact means the zip is rebuilt.
+    """
+    if not previous or not os.path.isfile(zip_path):
+        return None
+    try:
+        with zipfile.ZipFile(zip_path) as old:
+            names = old.namelist()
+    except zipfile.BadZipFile:
+        return None
+    if all(name in hashes and previous.get(name) == hashes[name] for name in names):
+        return names
+    return None
+
+
+def write_zip(output_dir: str, zip_path: str, files: List[str], hashes: Dict[str, str],
+              previous: Dict[str, str]) -> Dict[str, int]:
+    """Write the zip, appending to a copy of the previous export when none of its entries changed."""
+    reused = reusable_entries(zip_path, hashes, previous)
+    kept = set(reused or [])
+    changed = [rel_path for rel_path in files if rel_path not in kept]
+    if reused is not None and not changed:
+        return {"reused": len(reused), "compressed": 0}
+    temp_path = zip_path + ".tmp"
+    if reused is None:
+        reused = []
+        mode = "w"
+    else:
+        shutil.copyfile(zip_path, temp_path)
+        mode = "a"
+    with zipfile.ZipFile(temp_path, mode, zipfile.ZIP_DEFLATED) as zf:
+        for rel_path in changed:
+            add_file(zf, os.path.join(output_dir, rel_path), rel_path)
+    os.replace(temp_path, zip_path)
+    return {"reused": len(reused), "compressed": len(changed)}
+
+
 def main() -> None:
     args = parse_arguments()
     if not os.path.isdir(args.output):
         exit_with_error(f"Output directory not found: {args.output}")
 
     files = []
-    for root, _, filenames in os.walk(args.output):
+    for root, dirnames, filenames in os.walk(args.output):
+        if root == args.output and "cache" in dirnames:
+            dirnames.remove("cache")
         for name in filenames:
             path = os.path.join(root, name)
             files.append(os.path.relpath(path, args.output))
+    index_path = os.path.join(args.output, "artifact_index.json")
+    zip_abs = os.path.abspath(args.zip_path) if args.zip_path else None
+    # The index and the zip itself (when written inside the output tree) are not artifacts.
+    files = sorted(
+        rel_path for rel_path in files
+        if rel_path != "artifact_index.json" and os.path.abspath(os.path.join(args.output, rel_path)) not in (zip_abs, f"{zip_abs}.tmp")
+    )
 
-    save_json({"artifacts": sorted(files)}, os.path.join(args.output, "artifact_index.json"))
+    hash_index = os.path.join(ensure_cache_dir(args.output), "hash_index.json")
+    digests = cached_file_hashes([os.path.join(args.output, rel_path) for rel_path in files], hash_index, args.workers)
+    hashes = {rel_path: digests[os.path.join(args.output, rel_path)] for rel_path in files}
+    previous = load_json(index_path)
+    index: Dict[str, Any] = {"artifacts": files, "sha256": hashes}
 
     if args.zip_path:
-        with zipfile.ZipFile(args.zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            for rel_path in files:
-                abs_path = os.path.join(args.output, rel_path)
-                zf.write(abs_path, arcname=rel_path)
+        previous_hashes = {} if args.full or previous.get("zip_path") != zip_abs else previous.get("sha256", {})
+        index["zip_path"] = zip_abs
+        index["zip_entries"] = write_zip(args.output, args.zip_path, files, hashes, previous_hashes)
+    save_json(index, index_path)
 
 
 if __name__ == "__main__":
@@ -2,13 +2,22 @@
 """Shared utilities for the process mining CLI workflow."""
 
 import argparse
+import functools
 import hashlib
 import json
 import logging
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 
 class ExitCodes:
@@ -80,13 +89,21 @@ def save_text(lines: List[str], output_path: str) -> None:
             handle.write(line.rstrip("\n") + "\n")
 
 
-def write_manifest(output_dir: str, params: Dict[str, Any], artifacts: Dict[str, str]) -> None:
+def write_manifest(output_dir: str, params: Dict[str, Any], artifacts: Dict[str, str],
+                   stages: Optional[Dict[str, str]] = None) -> None:
     """Write a simple manifest describing run parameters and artifacts."""
     manifest = {
         "generated_at": datetime.utcnow().isoformat() + "Z",
         "parameters": params,
         "artifacts": artifacts,
     }
+    if stages:
+        manifest["stages"] = stages
+    profile_path = stop_profiler(output_dir)
+    if profile_path:
+        manifest["artifacts"] = dict(artifacts, profile=profile_path)
+    if _STEP_RECORDS:
+        manifest["instrumentation"] = step_records()
     save_json(manifest, os.path.join(output_dir, "manifest.json"))
 
 
@@ -98,12 +115,189 @@ def file_hash(path: str) -> str:
     return hasher.hexdigest()
 
 
+def cached_file_hash(path: str, index_path: str) -> str:
+    """Return file_hash(path), reusing a stored digest when size and mtime are unchanged."""
+    return cached_file_hashes([path], index_path)[path]
+
+
+def cached_file_hashes(paths: List[str], index_path: str, workers: int = 1) -> Dict[str, str]:
+    """cached_file_hash for a batch: the index is read once and, if anything was hashed, written once.
+
+    Stale files are hashed on `workers` threads (hashlib releases the GIL on large reads). The
+    index is replaced atomically, so an interrupted run or a concurrent stage never leaves it
+    half written; with concurrent writers the last one wins, which only costs a re-hash later.
+    """
+    index = load_json(index_path, default={})
+    digests: Dict[str, str] = {}
+    stale = []
+    for path in paths:
+        stat = os.stat(path)
+        entry = index.get(os.path.abspath(path), {})
+        if entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("sha256"):
+            digests[path] = entry["sha256"]
+        else:
+            stale.append((path, stat))
+    if not stale:
+        return digests
+    if workers > 1 and len(stale) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(file_hash, [path for path, _ in stale]))
+    else:
+        fresh = [file_hash(path) for path, _ in stale]
+    for (path, stat), digest in zip(stale, fresh):
+        digests[path] = digest
+        index[os.path.abspath(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    save_json(index, temp_path)
+    os.replace(temp_path, index_path)
+    return digests
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process in MB, or None when it cannot be determined."""
+    try:
+        import psutil  # type: ignore
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as handle:
+            pages = int(handle.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def max_rss_mb() -> Optional[float]:
+    """High-water mark of this process's resident set size in MB, or None when unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+_STEP_RECORDS: List[Dict[str, Any]] = []
+_STEP_DEPTH = 0
+_ACTIVE_PROFILER: Optional[Tuple[str, Any]] = None
+
+
+def _event_counts(obj: Any, with_cases: bool) -> Dict[str, int]:
+    """Row/case counts for an event DataFrame or pm4py EventLog; empty for anything else."""
+    columns = getattr(obj, "columns", None)
+    if columns is not None and hasattr(obj, "__len__"):
+        counts = {"rows": int(len(obj))}
+        if with_cases and "case:concept:name" in columns:
+            counts["cases"] = int(obj["case:concept:name"].nunique())
+        return counts
+    if type(obj).__name__ == "EventLog":
+        counts = {"cases": int(len(obj))}
+        if with_cases:
+            counts["rows"] = int(sum(len(trace) for trace in obj))
+        return counts
+    return {}
+
+
+@contextmanager
+def instrument(name: str, data: Any = None) -> Iterator[Dict[str, Any]]:
+    """Record wall time, CPU time and memory for a block; counts come from `data` when given.
+
+    The yielded record can be updated by the caller. Records are collected per process
+    and written into the stage manifest by write_stage_manifest / write_manifest.
+    """
+    global _STEP_DEPTH
+    record: Dict[str, Any] = {"name": name, "depth": _STEP_DEPTH}
+    # Counting cases needs a pass over the data, so only outermost steps pay for it.
+    record.update(_event_counts(data, with_cases=_STEP_DEPTH == 0))
+    rss_start = current_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    _STEP_DEPTH += 1
+    try:
+        yield record
+    except BaseException as exc:
+        record["error"] = type(exc).__name__
+        raise
+    finally:
+        _STEP_DEPTH -= 1
+        record["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+        record["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+        rss_end = current_rss_mb()
+        if rss_start is not None and rss_end is not None:
+            record["rss_delta_mb"] = round(rss_end - rss_start, 3)
+        peak = max_rss_mb()
+        if peak is not None:
+            record["max_rss_mb"] = round(peak, 3)
+        _STEP_RECORDS.append(record)
+
+
+def instrumented(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorator form of instrument(); counts come from the first positional argument, else the result."""
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with instrument(func.__name__, args[0] if args else None) as record:
+            result = func(*args, **kwargs)
+            if "rows" not in record and "cases" not in record:
+                record.update(_event_counts(result, with_cases=False))
+            return result
+    return wrapper
+
+
+def step_records() -> List[Dict[str, Any]]:
+    """Instrumentation records collected so far, in completion order."""
+    return list(_STEP_RECORDS)
+
+
+def start_profiler(mode: Optional[str]) -> None:
+    """Start a process-wide profiler ("cprofile" or "pyinstrument"); the dump is written with the stage manifest."""
+    global _ACTIVE_PROFILER
+    if not mode:
+        return
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler  # type: ignore
+        except ImportError as exc:
+            raise RuntimeError("pyinstrument is required for --profile pyinstrument. Install pyinstrument.") from exc
+        profiler = Profiler()
+        profiler.start()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    _ACTIVE_PROFILER = (mode, profiler)
+
+
+def stop_profiler(output_dir: str) -> Optional[str]:
+    """Stop the active profiler and write its dump into output_dir, returning the path."""
+    global _ACTIVE_PROFILER
+    if _ACTIVE_PROFILER is None:
+        return None
+    mode, profiler = _ACTIVE_PROFILER
+    _ACTIVE_PROFILER = None
+    if mode == "pyinstrument":
+        profiler.stop()
+        path = os.path.join(output_dir, "profile.html")
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(profiler.output_html())
+    else:
+        profiler.disable()
+        path = os.path.join(output_dir, "profile.prof")
+        profiler.dump_stats(path)
+    return path
+
+
 def ensure_stage_dir(output_root: str, stage_name: str) -> str:
     stage_dir = os.path.join(output_root, stage_name)
     os.makedirs(stage_dir, exist_ok=True)
     return stage_dir
 
 
+def ensure_cache_dir(output_root: str) -> str:
+    cache_dir = os.path.join(output_root, "cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
 def stage_state_path(stage_dir: str) -> str:
     return os.path.join(stage_dir, "stage_state.json")
 
@@ -116,6 +310,44 @@ def write_stage_state(stage_dir: str, payload: Dict[str, Any]) -> None:
     save_json(payload, stage_state_path(stage_dir))
 
 
+def compute_fingerprint(payload: Any) -> str:
+    """Stable sha256 of a JSON-serialisable payload (keys sorted, unknown types stringified)."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def downstream_stages(dag: Dict[str, List[str]], roots: List[str]) -> List[str]:
+    """Return roots plus every stage that depends on them, in DAG order."""
+    selected = set(roots)
+    changed = True
+    while changed:
+        changed = False
+        for stage, upstream in dag.items():
+            if stage not in selected and selected.intersection(upstream):
+                selected.add(stage)
+                changed = True
+    return [stage for stage in dag if stage in selected]
+
+
+def reusable_stage_entry(state: Dict[str, Any], stage: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """Return the recorded stage entry when its fingerprint matches and all its artifacts still exist."""
+    entry = state.get("pipeline_stages", {}).get(stage)
+    if not entry or entry.get("fingerprint") != fingerprint:
+        return None
+    if not all(os.path.isfile(path) for path in entry.get("artifacts", {}).values()):
+        return None
+    return entry
+
+
+def record_stage_entry(state: Dict[str, Any], stage: str, fingerprint: str,
+                       artifacts: Dict[str, str], result: Optional[Dict[str, Any]] = None) -> None:
+    state.setdefault("pipeline_stages", {})[stage] = {
+        "fingerprint": fingerprint,
+        "artifacts": {name: path for name, path in artifacts.items() if path},
+        "result": result or {},
+        "updated_at": datetime.utcnow().isoformat() + "Z",
+    }
+
+
 def record_stage_failure(stage_dir: str, message: str, next_steps: List[str], attempt_limit: int = 2) -> int:
     state = read_stage_state(stage_dir)
     failures = int(state.get("failure_count", 0)) + 1
@@ -135,7 +367,9 @@ def record_stage_failure(stage_dir: str, message: str, next_steps: List[str], at
 
 
 def infer_format_from_path(path: str) -> Optional[str]:
-    ext = os.path.splitext(path)[1].lower()
+    root, ext = os.path.splitext(path.lower())
+    if ext == ".gz":
+        ext = os.path.splitext(root)[1]
     if ext == ".csv":
         return "csv"
     if ext == ".xes":
@@ -190,6 +424,11 @@ def write_stage_manifest(stage_dir: str,
         "artifacts": artifacts,
         "notes": notes or "",
     }
+    profile_path = stop_profiler(stage_dir)
+    if profile_path:
+        manifest["artifacts"] = dict(artifacts, profile=profile_path)
+    if _STEP_RECORDS:
+        manifest["instrumentation"] = step_records()
     if notebook_path:
         manifest["notebook"] = {
             "path": notebook_path,